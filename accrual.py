@@ -0,0 +1,95 @@
+"""
+Yıllık izin hakkı hesaplama (İş Kanunu 4857, madde 53)
+
+Çalışan her hizmet yılını doldurduğunda o yılın iznini hak eder:
+
+    1-5. yıl  (beş yıl dahil)        14 gün
+    6-14. yıl                        20 gün
+    15. yıl ve sonrası               26 gün
+
+İlk yılını doldurmamış çalışanın hakkı yoktur. Kullanılmayan izin yanmaz,
+sonraki yıla devreder. employees.annual_leave_days bu yılın hakkı ile
+devredenin toplamı, yani işe girişten beri hak edilen izindir; kalan izin
+eskisi gibi annual_leave_days - used_leave_days olur. carry_over_days önceki
+yıllardan devreden kullanılmamış kısımdır.
+
+Hesap tek bir UPDATE ... FROM ifadesiyle bütün çalışanlar için birlikte
+yapılır. Yalnızca son çalıştırmadan beri yıldönümü geçen ya da bakiye
+defterine hareket yazılan çalışanlara bakılır ve yalnızca değeri değişen
+satırlar yazılır. Başlangıç tarihi olmayan ya da bozuk olan çalışanlara
+dokunulmaz.
+
+Hak elle de girilebilir (annual_leave_override): bu, yasal kademelerin yerine
+geçen yıllık gün sayısıdır ve içinde bulunulan hizmet yılının başında verilir;
+toplam hak override * (tamamlanan yıl + 1) olur. Böylece elle hakkı girilen
+çalışanın kalan izni de işe girişten beri kullanılanla karşılaştırılır.
+Başlangıç tarihi olmayan çalışan için yalnızca bir yıllık hak yazılır.
+"""
+
+import time
+from datetime import date
+
+# (hak edilen ilk hizmet yılı, gün); her kademe bir sonrakinin başına kadar sürer
+ENTITLEMENT_STEPS = ((1, 14), (6, 20), (15, 26))
+
+
+def entitlement(years):
+    """Tamamlanan hizmet yılı için işe girişten beri hak edilen toplam gün."""
+    total = 0
+    for index, (first, days) in enumerate(ENTITLEMENT_STEPS):
+        last = ENTITLEMENT_STEPS[index + 1][0] - 1 if index + 1 < len(ENTITLEMENT_STEPS) else years
+        total += days * max(0, min(years, last) - first + 1)
+    return total
+
+
+def entitlement_sql(years):
+    """entitlement() ile aynı hesabı yapan SQL ifadesi."""
+    terms = []
+    for index, (first, days) in enumerate(ENTITLEMENT_STEPS):
+        if index + 1 < len(ENTITLEMENT_STEPS):
+            last = ENTITLEMENT_STEPS[index + 1][0] - 1
+            terms.append(f'{days} * max(0, min({years}, {last}) - {first - 1})')
+        else:
+            terms.append(f'{days} * max(0, {years} - {first - 1})')
+    return ' + '.join(terms)
+
+
+def service_years_sql(start, as_of):
+    """as_of (ISO tarih) itibarıyla tamamlanan hizmet yılı; 29 Şubat girişlerinin yıldönümü 1 Mart'tır."""
+    return (f"max(0, CAST(strftime('%Y', {as_of}) AS INTEGER) - CAST(strftime('%Y', {start}) AS INTEGER)"
+            f" - (strftime('%m-%d', {as_of}) < strftime('%m-%d', {start})))")
+
+
+def run(db, as_of=None, full=False):
+    """Hakları as_of tarihine göre günceller; (güncellenen çalışan, saniye) döndürür.
+
+    full=True ise değişiklik olup olmadığına bakılmadan bütün çalışanlar hesaplanır.
+    """
+    started = time.perf_counter()
+    as_of = (as_of or date.today()).isoformat()
+    # Başlangıç tarihi olmayanlar yalnızca elle girilmiş hakla hesaplanır (0. yıl)
+    years = f"COALESCE({service_years_sql('e.start_date', ':as_of')}, 0)"
+    with db.transaction() as conn:
+        watermark = conn.execute("SELECT value FROM app_meta WHERE key = 'accrual_ledger_id'").fetchone()[0]
+        latest = conn.execute('SELECT COALESCE(MAX(id), 0) FROM leave_ledger').fetchone()[0]
+        # Yıldönümü geçenler ya da defterine yeni hareket yazılanlar
+        changed = '' if full else f'''AND (e.accrued_years IS NOT {years}
+            OR e.id IN (SELECT employee_id FROM leave_ledger WHERE id > :watermark))'''
+        cursor = conn.execute(f'''
+            UPDATE employees SET annual_leave_days = a.total, carry_over_days = a.carry_over, accrued_years = a.years
+            FROM (SELECT id, years,
+                         CASE WHEN override IS NULL THEN {entitlement_sql('years')}
+                              ELSE override * (years + 1) END AS total,
+                         max(0, CASE WHEN override IS NULL THEN {entitlement_sql('max(0, years - 1)')}
+                                     ELSE override * years END - used) AS carry_over
+                  FROM (SELECT e.id, {years} AS years, e.annual_leave_override AS override,
+                               e.used_leave_days AS used FROM employees e
+                        WHERE e.deleted_at IS NULL
+                          AND (e.annual_leave_override IS NOT NULL OR julianday(e.start_date) IS NOT NULL)
+                          {changed})) AS a
+            WHERE employees.id = a.id
+              AND (annual_leave_days IS NOT a.total OR carry_over_days IS NOT a.carry_over OR accrued_years IS NOT a.years)''',
+            {'as_of': as_of, 'watermark': watermark})
+        updated = cursor.rowcount
+        conn.execute("UPDATE app_meta SET value = ? WHERE key = 'accrual_ledger_id'", (latest,))
+    return updated, round(time.perf_counter() - started, 3)
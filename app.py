@@ -5,605 +5,1421 @@
 """
 
 import os
-from flask import Flask, render_template_string, request, redirect, url_for, flash, session
+import atexit
+import threading
+from contextlib import contextmanager
+from flask import (Flask, render_template, stream_template, stream_with_context, get_flashed_messages, request, redirect,
+                   url_for, flash, session, jsonify, Response, g, has_request_context)
 import sqlite3
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from werkzeug.http import is_resource_modified
+from werkzeug.local import LocalProxy
 import hashlib
+import base64
+import re
+import io
+import csv
+import itertools
+import click
+from jinja2 import FileSystemBytecodeCache
+import migrations
+import leave_ledger
+import leave_summary
+import bulk_import
+import instrumentation
+from instrumentation import timed_query, logger
+import work_calendar
+from work_calendar import to_day, from_day
+import intake_queue
+import export
+import archive
+import change_feed
+import compression
+import static_assets
+import employee_search
+import tenants
+import accrual
+import passwords
+from passwords import hash_password
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'secure-izin-takip-2024')
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-# Ana sayfa şablonu
-INDEX_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="tr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>İzin Takip Sistemi</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { 
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-            min-height: 100vh; 
-        }
-        .main-card { 
-            background: rgba(255, 255, 255, 0.95); 
-            border-radius: 20px; 
-            box-shadow: 0 15px 35px rgba(0, 0, 0, 0.1); 
-        }
-        .btn-custom { 
-            border-radius: 15px; 
-            padding: 15px 30px; 
-            font-size: 1.2rem; 
-            font-weight: 600; 
-        }
-    </style>
-</head>
-<body>
-    <div class="container-fluid d-flex align-items-center justify-content-center min-vh-100">
-        <div class="main-card p-5 text-center" style="max-width: 500px; width: 90%;">
-            <h1 class="mb-4">🔐 Günkent Sitesi İzin Takip Sistemi</h1>
-            <p class="text-muted mb-4">Lütfen kullanıcı türünü seçin</p>
-            <div class="d-grid gap-3">
-                <a href="/employee_login" class="btn btn-success btn-custom">👤 İşçi Girişi</a>
-                <a href="/employer_login" class="btn btn-warning btn-custom">👔 İşveren Girişi</a>
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-'''
-
-# Giriş şablonları
-LOGIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="tr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ title }}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { 
-            background: linear-gradient(135deg, {{ bg_color }}); 
-            min-height: 100vh; 
-        }
-        .login-card { 
-            background: rgba(255, 255, 255, 0.95); 
-            border-radius: 20px; 
-            box-shadow: 0 15px 35px rgba(0, 0, 0, 0.1); 
-        }
-    </style>
-</head>
-<body>
-    <div class="container-fluid d-flex align-items-center justify-content-center min-vh-100">
-        <div class="login-card p-5" style="max-width: 500px; width: 90%;">
-            <h2 class="text-center mb-4">{{ title }}</h2>
-            
-            {% with messages = get_flashed_messages(with_categories=true) %}
-                {% if messages %}
-                    {% for category, message in messages %}
-                        <div class="alert alert-{{ 'danger' if category == 'danger' else 'success' }} alert-dismissible fade show">
-                            {{ message }}
-                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                        </div>
-                    {% endfor %}
-                {% endif %}
-            {% endwith %}
-            
-            <form method="POST">
-                {% if show_employee_select %}
-                <div class="mb-3">
-                    <label class="form-label">Çalışan Adı</label>
-                    <select class="form-select" name="employee_name" required>
-                        <option value="">Seçiniz...</option>
-                        {% for emp in employees %}
-                            <option value="{{ emp.name }}">{{ emp.name }}</option>
-                        {% endfor %}
-                    </select>
-                </div>
-                {% endif %}
-                
-                <div class="mb-3">
-                    <label class="form-label">Şifre</label>
-                    <input type="password" class="form-control" name="password" required placeholder="Şifrenizi giriniz">
-                    {% if show_demo_info %}
-                        <div class="form-text">Varsayılan şifre: admin123</div>
-                    {% endif %}
-                </div>
-                
-                <div class="d-grid gap-2">
-                    <button type="submit" class="btn btn-primary btn-lg">🔓 Giriş Yap</button>
-                    <a href="/" class="btn btn-outline-secondary">← Ana Sayfa</a>
-                </div>
-            </form>
-        </div>
-    </div>
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-</body>
-</html>
-'''
-
-# Panel şablonu
-PANEL_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="tr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ title }}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { 
-            background: linear-gradient(135deg, {{ bg_color }}); 
-            min-height: 100vh; 
-        }
-        .panel-card { 
-            background: rgba(255, 255, 255, 0.95); 
-            border-radius: 20px; 
-            box-shadow: 0 15px 35px rgba(0, 0, 0, 0.1); 
-        }
-    </style>
-</head>
-<body>
-    <div class="container my-4">
-        <div class="panel-card p-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h2>{{ title }}</h2>
-                <div>
-                    <a href="/logout" class="btn btn-outline-danger me-2">🔓 Çıkış</a>
-                    <a href="/" class="btn btn-outline-secondary">← Ana Sayfa</a>
-                </div>
-            </div>
-            
-            {% with messages = get_flashed_messages(with_categories=true) %}
-                {% if messages %}
-                    {% for category, message in messages %}
-                        <div class="alert alert-{{ 'danger' if category == 'danger' else 'success' }} alert-dismissible fade show">
-                            {{ message }}
-                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                        </div>
-                    {% endfor %}
-                {% endif %}
-            {% endwith %}
-            
-            {{ content|safe }}
-        </div>
-    </div>
-    
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-    function deleteEmployee(name) {
-        if (confirm('⚠️ UYARI: ' + name + ' adlı çalışanı kalıcı olarak silmek istediğinizden emin misiniz?\\n\\n• Tüm izin kayıtları silinecek\\n• Bu işlem geri alınamaz!\\n\\nDevam etmek istiyor musunuz?')) {
-            fetch('/delete_employee', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: 'employee_name=' + encodeURIComponent(name)
-            }).then(response => {
-                if (response.ok) {
-                    alert('✅ ' + name + ' başarıyla silindi!');
-                    location.reload();
-                } else {
-                    alert('❌ Silme işlemi başarısız! Lütfen tekrar deneyin.');
-                }
-            }).catch(error => {
-                alert('❌ Bağlantı hatası! Lütfen tekrar deneyin.');
-            });
-        }
-    }
-    </script>
-</body>
-</html>
-'''
+# Talep satırına (takma adı l) çalışan adı, izin türü ve durum kodunu ekler.
+# CROSS JOIN: birleştirme sırası sabit, talepler her zaman önce okunur.
+LEAVE_JOINS = '''CROSS JOIN main.employees e ON e.id = l.employee_id
+    CROSS JOIN main.leave_types t ON t.id = l.leave_type_id CROSS JOIN main.leave_statuses s ON s.id = l.status_id'''
+
+# R*Tree üzerinden tarih aralığıyla kesişen talepler (günler 1970'ten itibaren)
+LEAVES_IN_RANGE_SQL = f'''SELECT l.id, l.employee_id, e.name, t.name, l.start_day, l.end_day, s.code
+    FROM leave_intervals r CROSS JOIN leave_requests l ON l.id = r.id {LEAVE_JOINS}
+    WHERE r.start_day <= ? AND r.end_day >= ?'''
+
+# Çalışanın izin geçmişi; arşivlenmiş eski talepler de görünür. Parametreler (çalışan, çalışan)
+EMPLOYEE_LEAVES_SQL = (
+    'SELECT t.name, l.start_day, l.end_day, s.code, l.request_date AS request_date '
+    f'FROM main.leave_requests l {LEAVE_JOINS} WHERE l.employee_id = ? UNION ALL '
+    'SELECT t.name, l.start_day, l.end_day, s.code, l.request_date AS request_date '
+    f'FROM archive.leave_requests l {LEAVE_JOINS} WHERE l.employee_id = ? ORDER BY request_date DESC')
+
+# Giriş: satır ada göre (UNIQUE indeks) bulunur
+EMPLOYEE_LOGIN_SQL = 'SELECT id, password_hash FROM employees WHERE name = ? AND deleted_at IS NULL'
+
+
+def leaves_in_range_sql(status_count):
+    """LEAVES_IN_RANGE_SQL'in durum süzgeçli hali; parametreler (bitiş, başlangıç, *durum kimlikleri)."""
+    return LEAVES_IN_RANGE_SQL + f" AND l.status_id IN ({','.join('?' * status_count)})"
+
+# Panel listelerinde bir sayfadaki en fazla satır sayısı
+PAGE_SIZE = 50
+
+# Toplu onay/ret isteğinde kabul edilen en fazla talep sayısı
+MAX_BATCH_SIZE = 1000
+
+LEAVE_TYPES = ['Yıllık İzin', 'Hastalık İzni', 'Mazeret İzni']
+LEAVE_STATUSES = {'pending': '⏳ Beklemede', 'approved': '✅ Onaylandı', 'rejected': '❌ Reddedildi', 'all': 'Tümü'}
+# leave_statuses tablosundaki sabit kimlikler (göç 10)
+STATUS_IDS = {'pending': 1, 'approved': 2, 'rejected': 3}
+
+def _leave_dict(row):
+    """(id, çalışan, tür, başlangıç günü, bitiş günü, durum) satırını şablonların beklediği sözlüğe çevirir."""
+    return {'id': row[0], 'employee_name': row[1], 'leave_type': row[2], 'start_date': from_day(row[3]),
+            'end_date': from_day(row[4]), 'status': row[5]}
+
+def _employee_dict(row):
+    return {'id': row[0], 'name': row[1], 'start_date': row[2], 'annual_leave_days': row[3], 'used_leave_days': row[4]}
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode('|'.join(str(v) for v in values).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+# Şifre özetleri worker iş parçacığında değil, sınırlı bir havuzda hesaplanır
+hasher = passwords.HashingExecutor()
+
+class SchemaVersionError(RuntimeError):
+    pass
 
 class SecureDatabase:
-    def __init__(self):
-        self.db_path = "secure_izin.db"
-        self.init_database()
+    # Her bağlantıda uygulanan ayarlar: WAL günlüğü, WAL ile güvenli olan NORMAL
+    # senkronizasyon, ~16 MB sayfa önbelleği, 128 MB mmap ve kilit beklemesi
+    PRAGMAS = (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -16000),
+        ('mmap_size', 134217728),
+        ('busy_timeout', 5000),
+        ('temp_store', 'MEMORY'),
+        # Yabancı anahtarlar (ON DELETE CASCADE) bağlantı başına açılır
+        ('foreign_keys', 'ON'),
+    )
+
+    def __init__(self, db_path=None, archive_path=None):
+        self.db_path = db_path or os.environ.get('IZIN_DB_PATH', 'secure_izin.db')
+        self.archive_path = archive_path or os.environ.get('IZIN_ARCHIVE_PATH') or archive.default_path(self.db_path)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Çalışan önbelleği: (sürüm, veri) çiftleri; sürüm app_meta'dan okunur
+        self._roster = None
+        self._employee_cache = {}
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        # Şema sürümünün doğrulandığı süreç (worker başına bir kez)
+        self._attached_pid = None
     
-    def init_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY, name TEXT UNIQUE, password_hash TEXT,
-            start_date TEXT, annual_leave_days INTEGER DEFAULT 20, used_leave_days INTEGER DEFAULT 0)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS leave_requests (
-            id INTEGER PRIMARY KEY, employee_name TEXT, leave_type TEXT,
-            start_date TEXT, end_date TEXT, reason TEXT, status TEXT DEFAULT 'pending',
-            request_date TEXT DEFAULT CURRENT_TIMESTAMP)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS employers (
-            id INTEGER PRIMARY KEY, password_hash TEXT)''')
+    def _connect(self):
+        # isolation_level=None: işlemler transaction() ile açıkça yönetilir
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False,
+                               factory=instrumentation.InstrumentedConnection)
+        for name, value in self.PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+        archive.attach(conn, self.archive_path)
+        with self._connections_lock:
+            self._connections.append((os.getpid(), conn))
+        return conn
+    
+    def _thread_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # gunicorn --preload ile fork sonrası ebeveynin bağlantısı kullanılmaz
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def connection(self):
+        """İş parçacığına (ve sürece) özel, yeniden kullanılan bağlantıyı döndürür."""
+        conn = self._thread_connection()
+        if self._attached_pid != os.getpid():
+            self.attach(conn)
+        return conn
+    
+    def attach(self, conn):
+        """Worker başına ucuz kontrol: yalnızca şema sürümüne bakar.
         
-        conn.commit()
-        conn.close()
-        self.add_demo_data()
+        Şema güncel değilse `flask --app app init-db` çalıştırılmalıdır;
+        IZIN_AUTO_MIGRATE=1 ise göçler burada uygulanır.
+        """
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version < migrations.LATEST_VERSION:
+            if os.environ.get('IZIN_AUTO_MIGRATE') != '1':
+                raise SchemaVersionError(f'{self.db_path} şema sürümü {version}, beklenen {migrations.LATEST_VERSION}; '
+                                         f'önce `flask --app app init-db` çalıştırın')
+            self.bootstrap()
+        self._attached_pid = os.getpid()
+    
+    @contextmanager
+    def transaction(self):
+        """Yazma işlemi: BEGIN IMMEDIATE ... COMMIT, hata olursa ROLLBACK."""
+        conn = self.connection()
+        if conn.in_transaction:
+            # İç içe çağrılar dıştaki işleme katılır
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        try:
+            conn.execute('COMMIT')
+        except BaseException:
+            # COMMIT başarısızsa (SQLITE_BUSY, ertelenmiş yabancı anahtar) işlem açık kalır;
+            # geri alınmazsa bu iş parçacığının sonraki işlemleri ona katılırdı
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+    
+    def close(self):
+        """Bu sürecin açtığı tüm bağlantıları kapatır (çıkışta çağrılır)."""
+        pid = os.getpid()
+        with self._connections_lock:
+            mine = [conn for owner, conn in self._connections if owner == pid]
+            self._connections = [(owner, conn) for owner, conn in self._connections if owner != pid]
+        for conn in mine:
+            try:
+                conn.execute('PRAGMA optimize')
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+    
+    def bootstrap(self, seed_demo=False):
+        """Tek seferlik kurulum: göçler, varsayılan işveren ve isteğe bağlı demo verisi."""
+        applied = migrations.migrate(self._thread_connection())
+        self._attached_pid = os.getpid()
+        self.ensure_employer()
+        if seed_demo:
+            self.add_demo_data()
+        return applied
+    
+    def explain_hot_queries(self):
+        """Tam tablo taraması ya da geçici sıralama kullanan sorguları döndürür."""
+        conn = self.connection()
+        problems = {}
+        for name, (sql, params) in HOT_QUERIES.items():
+            plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+            # Kısıtlı sanal tablo (R*Tree) okuması "SCAN ... VIRTUAL TABLE INDEX n:<kısıt>" görünür
+            bad = [step for step in plan
+                   if (step.startswith('SCAN ') and not re.search(r'VIRTUAL TABLE INDEX \d+:\S', step))
+                   or 'TEMP B-TREE' in step]
+            if bad:
+                problems[name] = plan
+        return problems
     
     def add_demo_data(self):
-        if not self.get_all_employees():
+        if self.connection().execute('SELECT 1 FROM employees LIMIT 1').fetchone() is None:
             # Demo çalışanlar (şifre: 123456)
             for name in ["Ahmet Yılmaz", "Ayşe Demir", "Mehmet Kaya"]:
                 self.add_employee(name, "123456", 20)
-        
+    
+    def ensure_employer(self):
         # İşveren şifresi (admin123)
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM employers')
-        if cursor.fetchone()[0] == 0:
-            cursor.execute('INSERT INTO employers (password_hash) VALUES (?)', (hash_password("admin123"),))
-            conn.commit()
-        conn.close()
+        if self.connection().execute('SELECT 1 FROM employers LIMIT 1').fetchone() is not None:
+            return
+        # Özet yazma kilidi alınmadan hesaplanır; kilit yalnızca INSERT süresince tutulur
+        password_hash = hasher.run(hash_password, "admin123")
+        with self.transaction() as conn:
+            if conn.execute('SELECT COUNT(*) FROM employers').fetchone()[0] == 0:
+                conn.execute('INSERT INTO employers (password_hash) VALUES (?)', (password_hash,))
+    
+    def set_employer_password(self, password):
+        """Bu sitenin işveren şifresini değiştirir (her sitenin şifresi ayrıdır)."""
+        password_hash = hasher.run(hash_password, password)
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM employers')
+            conn.execute('INSERT INTO employers (password_hash) VALUES (?)', (password_hash,))
     
+    # KDF süresi yavaş sorgu günlüğüne yazılmasın diye timed_query yok
     def verify_employer(self, password):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM employers WHERE password_hash = ?', (hash_password(password),))
-        result = cursor.fetchone()[0] > 0
-        conn.close()
-        return result
+        """Şifre bu sitenin işveren şifresiyse True (havuz doluysa passwords.HashingBusy)."""
+        for employer_id, stored in self.connection().execute('SELECT id, password_hash FROM employers').fetchall():
+            if hasher.run(passwords.check, password, stored):
+                self._upgrade_hash('employers', employer_id, stored, password)
+                return True
+        return False
     
     def verify_employee(self, name, password):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM employees WHERE name = ? AND password_hash = ?', 
-                      (name, hash_password(password)))
-        result = cursor.fetchone()[0] > 0
-        conn.close()
-        return result
-    
-    def add_employee(self, name, password, annual_leave=20):
+        """Giriş bilgileri doğruysa çalışanın kimliğini, değilse None döndürür.
+        
+        Satır ada göre (UNIQUE indeks) bulunur; özet hasher havuzunda doğrulanır.
+        """
+        row = self.connection().execute(EMPLOYEE_LOGIN_SQL, (name,)).fetchone()
+        if not hasher.run(passwords.check, password, row[1] if row else None):
+            return None
+        self._upgrade_hash('employees', row[0], row[1], password)
+        return row[0]
+    
+    def _upgrade_hash(self, table, row_id, stored, password):
+        """Eski (tuzsuz) ya da eski parametreli özeti başarılı girişte yenisiyle değiştirir."""
+        if not passwords.needs_rehash(stored):
+            return
+        try:
+            new_hash = hasher.run(hash_password, password)
+        except passwords.HashingBusy:
+            # Giriş yine de başarılı; yükseltme bir sonraki girişe kalır
+            return
+        with self.transaction() as conn:
+            conn.execute(f'UPDATE {table} SET password_hash = ? WHERE id = ? AND password_hash = ?', (new_hash, row_id, stored))
+    
+    @timed_query
+    def add_employee(self, name, password, annual_leave=None):
+        """Çalışanı ekler; ad kayıtlıysa False. Özet havuzu doluysa passwords.HashingBusy.
+
+        annual_leave verilirse yasal kademelerin yerine geçen yıllık gün olarak
+        saklanır ve hemen kullanılabilir; verilmezse hak kıdemden hesaplanır
+        (ilk yıl 0). Bkz. accrual.py.
+        """
+        # Özet işlem dışında ve giriş doğrulamalarıyla aynı sınırlı havuzda hesaplanır
+        password_hash = hasher.run(hash_password, password)
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('INSERT INTO employees (name, password_hash, start_date, annual_leave_days) VALUES (?, ?, ?, ?)',
-                         (name, hash_password(password), datetime.now().strftime("%Y-%m-%d"), annual_leave))
-            conn.commit()
+            with self.transaction() as conn:
+                conn.execute('''INSERT INTO employees (name, password_hash, start_date, annual_leave_days, annual_leave_override, accrued_years)
+                                VALUES (?, ?, ?, ?, ?, ?)''',
+                             (name, password_hash, datetime.now().strftime("%Y-%m-%d"),
+                              accrual.entitlement(0) if annual_leave is None else annual_leave, annual_leave, 0))
             return True
         except sqlite3.IntegrityError:
-            print(f"Employee {name} already exists")
+            logger.info('Çalışan zaten kayıtlı: %s', name)
             return False
-        except Exception as e:
-            print(f"Error adding employee {name}: {str(e)}")
+        except Exception:
+            logger.exception('Çalışan eklenemedi: %s', name)
             return False
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
-    def delete_employee(self, name):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM employees WHERE name = ?', (name,))
-        cursor.execute('DELETE FROM leave_requests WHERE employee_name = ?', (name,))
-        conn.commit()
-        conn.close()
+    @timed_query
+    def delete_employee(self, employee_id):
+        """Çalışanı pasifleştirir (deleted_at) ve bitmiş taleplerini arşive taşır; geçmiş silinmez.
+
+        Çalışanın adını, bulunamazsa None döndürür.
+        """
+        with self.transaction() as conn:
+            row = conn.execute('UPDATE employees SET deleted_at = CURRENT_TIMESTAMP WHERE id = ? AND deleted_at IS NULL RETURNING name',
+                               (employee_id,)).fetchone()
+            if row is None:
+                return None
+            archive.archive_employee(conn, employee_id)
+            return row[0]
+    
+    @timed_query
+    def rename_employee(self, employee_id, new_name):
+        """Çalışanın adını değiştirir; talepler kimliğe bağlı olduğundan başka tablo değişmez."""
+        try:
+            with self.transaction() as conn:
+                return conn.execute('UPDATE employees SET name = ? WHERE id = ? AND deleted_at IS NULL',
+                                    (new_name, employee_id)).rowcount > 0
+        except sqlite3.IntegrityError:
+            logger.info('Çalışan adı kullanımda: %s', new_name)
+            return False
     
+    def roster_version(self):
+        return self.connection().execute("SELECT value FROM app_meta WHERE key = 'roster_version'").fetchone()[0]
+    
+    @timed_query
     def get_all_employees(self):
+        """Çalışan listesi (önbellekten; dönen liste değiştirilmemelidir)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT name, start_date, annual_leave_days, used_leave_days FROM employees')
-            employees = cursor.fetchall()
-            print(f"Found {len(employees)} employees in database")
-            return [{'name': row[0], 'start_date': row[1], 'annual_leave_days': row[2], 'used_leave_days': row[3]} 
-                   for row in employees]
-        except Exception as e:
-            print(f"Error getting employees: {str(e)}")
+            version = self.roster_version()
+            cached = self._roster
+            if cached is not None and cached[0] == version:
+                self.cache_stats['hits'] += 1
+                return cached[1]
+            self.cache_stats['misses'] += 1
+            cursor = self.connection().execute('SELECT id, name, start_date, annual_leave_days, used_leave_days FROM employees WHERE deleted_at IS NULL')
+            employees = [_employee_dict(row) for row in cursor.fetchall()]
+            self._roster = (version, employees)
+            return employees
+        except SchemaVersionError:
+            raise
+        except Exception:
+            logger.exception('Çalışan listesi okunamadı')
             return []
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
-    def get_employee(self, name):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT name, start_date, annual_leave_days, used_leave_days FROM employees WHERE name = ?', (name,))
+    def cache_info(self):
+        total = self.cache_stats['hits'] + self.cache_stats['misses']
+        return dict(self.cache_stats, hit_ratio=round(self.cache_stats['hits'] / total, 3) if total else None,
+                    cached_employees=len(self._employee_cache), roster_cached=self._roster is not None)
+    
+    @timed_query
+    def count_employees(self):
+        return self.connection().execute('SELECT COUNT(*) FROM employees WHERE deleted_at IS NULL').fetchone()[0]
+    
+    @timed_query
+    def get_employees_page(self, after_name=None, limit=PAGE_SIZE):
+        """İsme göre sıralı, anahtar tabanlı çalışan sayfası: (satırlar, sonraki_isim)."""
+        cursor = self.connection().execute(
+            'SELECT id, name, start_date, annual_leave_days, used_leave_days FROM employees WHERE name > ? AND deleted_at IS NULL ORDER BY name LIMIT ?',
+            (after_name or '', limit + 1))
+        rows = cursor.fetchall()
+        next_name = rows[limit - 1][1] if len(rows) > limit else None
+        return [_employee_dict(row) for row in rows[:limit]], next_name
+    
+    @timed_query
+    def search_employees(self, query, limit=10):
+        """Ada göre aktif çalışan araması (Türkçe harf duyarsız): [{'id', 'name'}, ...]."""
+        return [{'id': row[0], 'name': row[1]} for row in employee_search.search(self.connection(), query, limit)]
+    
+    @timed_query
+    def get_employee(self, employee_id):
+        version = self.roster_version()
+        cached = self._employee_cache.get(employee_id)
+        if cached is not None and cached[0] == version:
+            self.cache_stats['hits'] += 1
+            return cached[1]
+        self.cache_stats['misses'] += 1
+        if len(self._employee_cache) > 10000:
+            self._employee_cache = {}
+        cursor = self.connection().execute('SELECT id, name, start_date, annual_leave_days, used_leave_days FROM employees WHERE id = ? AND deleted_at IS NULL',
+                                           (employee_id,))
         row = cursor.fetchone()
-        conn.close()
-        return {'name': row[0], 'start_date': row[1], 'annual_leave_days': row[2], 'used_leave_days': row[3]} if row else None
-    
-    def add_leave_request(self, employee_name, leave_type, start_date, end_date, reason=""):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO leave_requests (employee_name, leave_type, start_date, end_date, reason) VALUES (?, ?, ?, ?, ?)',
-                      (employee_name, leave_type, start_date, end_date, reason))
-        conn.commit()
-        conn.close()
-    
-    def get_employee_leaves(self, employee_name):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT leave_type, start_date, end_date, status FROM leave_requests WHERE employee_name = ? ORDER BY request_date DESC', (employee_name,))
-        leaves = cursor.fetchall()
-        conn.close()
-        return [{'leave_type': row[0], 'start_date': row[1], 'end_date': row[2], 'status': row[3]} for row in leaves]
+        employee = _employee_dict(row) if row else None
+        self._employee_cache[employee_id] = (version, employee)
+        return employee
     
+    @timed_query
+    def add_leave_request(self, employee_id, leave_type, start_date, end_date, reason=""):
+        with self.transaction() as conn:
+            leave_type_id = conn.execute('SELECT id FROM leave_types WHERE name = ?', (leave_type,)).fetchone()[0]
+            start_day, end_day = to_day(start_date), to_day(end_date)
+            conn.execute('INSERT INTO leave_requests (employee_id, leave_type_id, start_day, end_day, reason) VALUES (?, ?, ?, ?, ?)',
+                         (employee_id, leave_type_id, start_day, end_day, reason))
+            leave_summary.apply(conn, employee_id, leave_type_id, start_day, end_day, STATUS_IDS['pending'])
+    
+    @timed_query
+    def iter_employee_leaves(self, employee_id):
+        """Satırları imleçten tek tek üretir (akışlı şablon için)."""
+        cursor = self.connection().execute(EMPLOYEE_LEAVES_SQL, (employee_id, employee_id))
+        for row in cursor:
+            yield {'leave_type': row[0], 'start_date': from_day(row[1]), 'end_date': from_day(row[2]), 'status': row[3]}
+    
+    def get_employee_leaves(self, employee_id):
+        return list(self.iter_employee_leaves(employee_id))
+    
+    @timed_query
     def get_all_leave_requests(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, employee_name, leave_type, start_date, end_date, status FROM leave_requests ORDER BY request_date DESC')
-        leaves = cursor.fetchall()
-        conn.close()
-        return [{'id': row[0], 'employee_name': row[1], 'leave_type': row[2], 'start_date': row[3], 'end_date': row[4], 'status': row[5]} for row in leaves]
+        cursor = self.connection().execute(f'SELECT l.id, e.name, t.name, l.start_day, l.end_day, s.code FROM leave_requests l {LEAVE_JOINS} '
+                                           'ORDER BY l.request_date DESC')
+        return [_leave_dict(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _leave_filters(status=None, employee_name=None, leave_type=None, date_from=None, date_to=None, prefix='',
+                       intervals='main.leave_intervals'):
+        """leave_requests filtreleri için (koşullar, parametreler); tarih geçersizse ValueError."""
+        where, params = [], []
+        if status:
+            where.append(f'{prefix}status_id = ?')
+            params.append(STATUS_IDS.get(status, 0))
+        # Ad ve tür bir kez kimliğe çevrilir; talepler kimlik indeksinden okunur
+        if employee_name:
+            where.append(f'{prefix}employee_id = (SELECT id FROM main.employees WHERE name = ?)')
+            params.append(employee_name)
+        if leave_type:
+            where.append(f'{prefix}leave_type_id = (SELECT id FROM main.leave_types WHERE name = ?)')
+            params.append(leave_type)
+        # Tarih aralığı ile kesişen talepler (R*Tree üzerinden)
+        if date_from or date_to:
+            where.append(f'{prefix}id IN (SELECT id FROM {intervals} WHERE start_day <= ? AND end_day >= ?)')
+            params.extend([to_day(date_to) if date_to else 2 ** 31 - 1, to_day(date_from) if date_from else -2 ** 31])
+        return where, params
+    
+    @classmethod
+    def _leave_page_query(cls, sources, status=None, employee_name=None, leave_type=None,
+                          date_from=None, date_to=None, position=None):
+        """Sayfa sorgusu (sql, parametreler); son parametre (LIMIT) çağırana kalır. Tarih geçersizse ValueError."""
+        parts, params = [], []
+        for schema in sources:
+            where, branch_params = cls._leave_filters(status, employee_name, leave_type, date_from, date_to, prefix='l.',
+                                                      intervals=f'{schema}.leave_intervals')
+            if position:
+                where.append('(l.request_date, l.id) < (?, ?)')
+                branch_params.extend(position)
+            parts.append(f'SELECT l.id AS id, e.name, t.name, l.start_day, l.end_day, s.code, l.request_date AS request_date, '
+                         f"{int(schema == 'archive')} AS archived, l.employee_id FROM {schema}.leave_requests l {LEAVE_JOINS}"
+                         + (' WHERE ' + ' AND '.join(where) if where else ''))
+            params.extend(branch_params)
+        return ' UNION ALL '.join(parts) + ' ORDER BY request_date DESC, id DESC LIMIT ?', params
     
+    @timed_query
+    def get_leave_requests_page(self, status='pending', employee_name=None, leave_type=None,
+                                date_from=None, date_to=None, cursor=None, limit=PAGE_SIZE):
+        """request_date/id üzerinden anahtar tabanlı (keyset) sayfalama.
+
+        (satırlar, sonraki_imleç) döndürür; son sayfada imleç None olur.
+        """
+        try:
+            # Tarih aralığı arşivlenmiş döneme uzanıyorsa arşiv de okunur
+            sources = ['main'] + (['archive'] if (date_from or date_to) and self._archive_reaches(date_from) else [])
+            position = decode_cursor(cursor) if cursor else None
+            position = (position[0], int(position[1])) if position and len(position) == 2 and position[1].isdigit() else None
+            sql, params = self._leave_page_query(sources, status, employee_name, leave_type, date_from, date_to, position)
+        except ValueError:
+            return [], None
+        rows = self.connection().execute(sql, params + [limit + 1]).fetchall()
+        
+        next_cursor = encode_cursor(rows[limit - 1][6], rows[limit - 1][0]) if len(rows) > limit else None
+        return [dict(_leave_dict(row), archived=bool(row[7]), employee_id=row[8]) for row in rows[:limit]], next_cursor
+    
+    @timed_query
+    def iter_leave_export(self, status=None, employee_name=None, leave_type=None, date_from=None, date_to=None):
+        """Dışa aktarım satırlarını (çalışan bilgileriyle) imleçten tek tek üretir."""
+        parts, params = [], []
+        for schema in ('main', 'archive') if self._archive_reaches(date_from) else ('main',):
+            where, branch_params = self._leave_filters(status, employee_name, leave_type, date_from, date_to, prefix='l.',
+                                                       intervals=f'{schema}.leave_intervals')
+            # Gün sayıları SQLite'ta ISO tarihe çevrilir (export.py ISO tarih bekler)
+            parts.append(f'''SELECT l.id AS id, e.name, e.start_date AS hire_date, e.annual_leave_days, e.used_leave_days, t.name,
+                                    date(l.start_day * 86400, 'unixepoch') AS leave_start, date(l.end_day * 86400, 'unixepoch'),
+                                    s.code, l.request_date, l.reason
+                             FROM {schema}.leave_requests l {LEAVE_JOINS}'''
+                         + (' WHERE ' + ' AND '.join(where) if where else ''))
+            params.extend(branch_params)
+        yield from self.connection().execute(' UNION ALL '.join(parts) + ' ORDER BY leave_start, id', params)
+    
+    def _archive_reaches(self, date_from):
+        """date_from'dan başlayan bir aralık arşivlenmiş taleplere uzanıyor mu?"""
+        end = archive.max_end_day(self.connection())
+        return end is not None and (not date_from or to_day(date_from) <= end)
+    
+    @timed_query
     def update_leave_status(self, leave_id, status):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('UPDATE leave_requests SET status = ? WHERE id = ?', (status, leave_id))
-        conn.commit()
-        conn.close()
+        """Durumu değiştirir; bakiye hareketi aynı işlemde uygulanır."""
+        with self.transaction() as conn:
+            return leave_ledger.apply_status_change(conn, leave_id, status) is not None
+    
+    @timed_query
+    def get_leaves_in_range(self, date_from, date_to, statuses=('approved',)):
+        """[date_from, date_to] ile kesişen izinler (R*Tree aralık sorgusu)."""
+        rows = self.connection().execute(leaves_in_range_sql(len(statuses)),
+                                         (to_day(date_to), to_day(date_from), *(STATUS_IDS.get(status, 0) for status in statuses)))
+        # Sonuç küçüktür; Python'da sıralanır, sorgu planı HOT_QUERIES'te denetlenenle aynı kalır
+        return [dict(_leave_dict((row[0], *row[2:])), employee_id=row[1]) for row in sorted(rows, key=lambda row: (row[2], row[4]))]
+    
+    @timed_query
+    def find_leave_conflicts(self, leave_id):
+        """Talep ile çakışan onaylı izinler: (çalışanın kendi izinleri, diğer çalışanlar)."""
+        row = self.connection().execute('SELECT employee_id, start_day, end_day FROM leave_requests WHERE id = ?',
+                                        (leave_id,)).fetchone()
+        if row is None or row[1] is None or row[2] is None:
+            return [], []
+        overlapping = self.get_leaves_in_range(row[1], row[2])
+        overlapping = [leave for leave in overlapping if str(leave['id']) != str(leave_id)]
+        own = [leave for leave in overlapping if leave['employee_id'] == row[0]]
+        others = [leave for leave in overlapping if leave['employee_id'] != row[0]]
+        return own, others
+    
+    @timed_query
+    def update_leave_statuses(self, leave_ids, status):
+        """Birden çok talebi tek işlemde günceller; özet sözlüğü döndürür."""
+        summary = {'status': status, 'updated': [], 'not_found': [], 'balance_changes': {}}
+        with self.transaction() as conn:
+            for leave_id in leave_ids:
+                result = leave_ledger.apply_status_change(conn, leave_id, status)
+                if result is None:
+                    summary['not_found'].append(leave_id)
+                    continue
+                summary['updated'].append(leave_id)
+                employee_name, _, delta = result
+                if delta:
+                    changes = summary['balance_changes']
+                    changes[employee_name] = changes.get(employee_name, 0) + delta
+        return summary
+    
+    @timed_query
+    def reconcile_leave_balances(self):
+        with self.transaction() as conn:
+            return leave_ledger.reconcile(conn)
+    
+    @timed_query
+    def archive_leave_requests(self, before=None, batch_size=archive.BATCH_SIZE):
+        return archive.archive_closed(self, before, batch_size)
+    
+    @timed_query
+    def accrue_leave(self, as_of=None, full=False):
+        """Kıdeme göre izin haklarını günceller: (güncellenen çalışan, saniye)."""
+        return accrual.run(self, as_of, full)
+    
+    @timed_query
+    def rebuild_usage_summaries(self):
+        with self.transaction() as conn:
+            return leave_summary.rebuild(conn)
+    
+    @timed_query
+    def get_usage_by_month(self, year, status='approved'):
+        """Yılın ayları x izin türleri için toplam iş günü (yalnızca özet tablosu okunur)."""
+        cursor = self.connection().execute(
+            'SELECT u.month, t.name, u.days, u.requests FROM leave_usage_totals u CROSS JOIN leave_types t ON t.id = u.leave_type_id '
+            'WHERE u.month BETWEEN ? AND ? AND u.status_id = ? ORDER BY u.month, t.name',
+            (year * 100 + 1, year * 100 + 12, STATUS_IDS.get(status, 0)))
+        return [{'month': f'{row[0] // 100:04d}-{row[0] % 100:02d}', 'leave_type': row[1], 'days': row[2], 'requests': row[3]}
+                for row in cursor.fetchall()]
+    
+    @timed_query
+    def get_usage_by_employee(self, year, status='approved', employee_name=None, after_name=None, limit=PAGE_SIZE):
+        """Çalışan x izin türü başına yıllık iş günü; ada göre sayfalı.
+
+        ({çalışan: {tür: gün}}, sonraki_çalışan) döndürür.
+        """
+        months = (year * 100 + 1, year * 100 + 12)
+        status_id = STATUS_IDS.get(status, 0)
+        conn = self.connection()
+        if employee_name:
+            employees = conn.execute('SELECT id, name FROM employees WHERE name = ?', (employee_name,)).fetchall()
+        else:
+            # Silinmiş çalışanların arşivdeki kullanımı da raporda yer alır
+            employees = conn.execute(
+                'SELECT id, name FROM employees e WHERE name > ? AND EXISTS (SELECT 1 FROM leave_usage_monthly u '
+                'WHERE u.employee_id = e.id AND u.month BETWEEN ? AND ? AND u.status_id = ?) ORDER BY name LIMIT ?',
+                (after_name or '', *months, status_id, limit + 1)).fetchall()
+        next_name = employees[limit - 1][1] if len(employees) > limit else None
+        employees = employees[:limit]
+        usage = {name: {} for _, name in employees}
+        if employees:
+            placeholders = ','.join('?' * len(employees))
+            for name, leave_type, days in conn.execute(
+                    f'SELECT e.name, t.name, SUM(u.days) FROM leave_usage_monthly u CROSS JOIN employees e ON e.id = u.employee_id '
+                    f'CROSS JOIN leave_types t ON t.id = u.leave_type_id WHERE u.employee_id IN ({placeholders}) '
+                    'AND u.month BETWEEN ? AND ? AND u.status_id = ? GROUP BY u.employee_id, u.leave_type_id',
+                    (*(employee_id for employee_id, _ in employees), *months, status_id)):
+                usage[name][leave_type] = days
+        return usage, next_name
+    
+    @timed_query
+    def site_summary(self, year):
+        """Siteler arası rapor için sitenin özeti: çalışan ve bekleyen talep sayısı, aylık kullanım."""
+        pending = self.connection().execute('SELECT COUNT(*) FROM leave_requests WHERE status_id = ?',
+                                            (STATUS_IDS['pending'],)).fetchone()[0]
+        return {'employees': self.count_employees(), 'pending': pending, 'months': self.get_usage_by_month(year)}
+
+def _hot_page(sources=('main',), **filters):
+    sql, params = SecureDatabase._leave_page_query(sources, **filters)
+    return sql, (*params, PAGE_SIZE + 1)
+
+# Sık çalışan sorgular (yukarıdaki yöntemlerin kullandığı SQL'in kendisi); her
+# biri bir indeks üzerinden çalışmalı (tam tarama yok).
+# `flask --app app check-query-plans` bunları EXPLAIN QUERY PLAN ile denetler.
+HOT_QUERIES = {
+    'iter_employee_leaves': (EMPLOYEE_LEAVES_SQL, (1, 1)),
+    'verify_employee': (EMPLOYEE_LOGIN_SQL, ('x',)),
+    'archive_candidates': (archive.CLOSED_CANDIDATES_SQL, (19358, 19358, *archive.CLOSED_STATUSES, archive.BATCH_SIZE)),
+    'get_leaves_in_range': (leaves_in_range_sql(1), (19800, 19790, STATUS_IDS['approved'])),
+    'leave_requests_page': _hot_page(status='pending'),
+    'leave_requests_page_next': _hot_page(status='pending', position=('2024-01-01 00:00:00', 1000)),
+    'leave_requests_page_all': _hot_page(position=('2024-01-01 00:00:00', 1000)),
+    'employee_leave_requests_page': _hot_page(employee_name='x'),
+}
+
+def merge_site_summaries(summaries):
+    """Site özetlerini toplar; hata veren siteler toplama katılmaz."""
+    totals = {'employees': 0, 'pending': 0, 'months': {}}
+    for summary in summaries:
+        if 'error' in summary:
+            continue
+        totals['employees'] += summary['employees']
+        totals['pending'] += summary['pending']
+        for row in summary['months']:
+            merged = totals['months'].setdefault((row['month'], row['leave_type']), dict(row, days=0, requests=0))
+            merged['days'] += row['days']
+            merged['requests'] += row['requests']
+    totals['months'] = [totals['months'][key] for key in sorted(totals['months'])]
+    return totals
+
+instrumentation.setup_logging()
+instrumentation.init_app(app)
+
+# Her sitenin kendi veritabanı vardır (tenants.py); IZIN_SITES_FILE yoksa tek site
+SITES = tenants.load_sites()
+DEFAULT_SITE = next(iter(SITES))
+site_pool = tenants.DatabasePool(SITES, lambda site: SecureDatabase(site.db_path, site.archive_path or archive.default_path(site.db_path)))
+# Worker kapanırken bağlantıları düzgünce kapat
+atexit.register(site_pool.close_all)
+
+def background_site():
+    """İstek dışında (CLI komutları) kullanılan site: IZIN_SITE ya da ilk site."""
+    slug = os.environ.get('IZIN_SITE') or DEFAULT_SITE
+    if slug not in SITES:
+        raise tenants.UnknownSiteError(slug)
+    return SITES[slug]
+
+def get_db():
+    """Geçerli sitenin veritabanı: istekte select_site()'ın seçtiği, dışında background_site()."""
+    if has_request_context() and 'db' in g:
+        return g.db
+    return site_pool.pin(background_site().slug)
+
+# Kodun geri kalanı `db` üzerinden çalışır; her erişim geçerli siteye yönlenir
+db = LocalProxy(get_db)
+
+# Site seçimi istekteki "site" alanından yalnızca giriş ekranlarında kabul edilir
+SITE_CHOICE_ENDPOINTS = ('employee_login', 'employer_login', 'search_employees')
+
+@app.before_request
+def select_site():
+    """Site: yol öneki (/s/<site>), alt alan adı, giriş formundaki seçim ya da oturum."""
+    if request.endpoint == 'static':
+        return
+    explicit = request.environ.get('izin.site') or tenants.site_from_host(SITES, request.host)
+    if explicit is None and request.endpoint in SITE_CHOICE_ENDPOINTS and request.values.get('site') in SITES:
+        explicit = request.values['site']
+    if explicit and session.get('site', DEFAULT_SITE) != explicit:
+        if session.get('user_type'):
+            # Başka sitede açılmış oturum bu sitede geçerli değil
+            session.clear()
+        session['site'] = explicit
+    slug = explicit or session.get('site')
+    if slug not in SITES:
+        slug = DEFAULT_SITE
+    g.site = SITES[slug]
+    g.site_explicit = explicit is not None
+    g.db = site_pool.acquire(slug)
+    intake = get_intake()
+    if intake is not None:
+        # Boşaltıcı her worker'da sitenin ilk isteğinde başlar (ebeveyn süreçte değil)
+        intake.ensure_drainer()
+
+@app.teardown_request
+def release_site(exc):
+    # Akışlı yanıtlarda akış bittikten sonra çalışır
+    if g.pop('db', None) is not None:
+        site_pool.release(g.site.slug)
+
+@app.context_processor
+def site_context():
+    return {'site': g.get('site') or SITES[DEFAULT_SITE]}
+
+app.wsgi_app = tenants.SitePrefixMiddleware(app.wsgi_app, SITES)
+
+def _cache_metrics():
+    handles = site_pool.open_handles()
+    return [
+        ('roster_cache_hits_total', 'counter', 'Çalışan önbelleği isabetleri', {}, sum(h.cache_stats['hits'] for h in handles)),
+        ('roster_cache_misses_total', 'counter', 'Çalışan önbelleği ıskaları', {}, sum(h.cache_stats['misses'] for h in handles)),
+        ('site_databases_open', 'gauge', 'Açık site veritabanı nesneleri', {}, len(handles)),
+        ('site_databases_evicted_total', 'counter', 'Havuzdan çıkarılan site veritabanları', {}, site_pool.stats['evicted']),
+    ]
+
+instrumentation.metrics.register_collector(_cache_metrics)
+instrumentation.metrics.register_collector(
+    lambda: [('change_feed_streams', 'gauge', 'Açık canlı güncelleme (SSE) bağlantıları', {}, change_feed.open_streams())])
 
-db = SecureDatabase()
+# IZIN_INTAKE_MODE=queue: izin talepleri önce diskteki kuyruğa yazılır ve arka
+# planda partiler halinde aktarılır (toplu başvuru dönemlerinde kilit beklemesi olmaz).
+# Her sitenin ayrı kuyruğu ve boşaltıcısı vardır.
+INTAKE_ENABLED = os.environ.get('IZIN_INTAKE_MODE') == 'queue'
+intakes = {}
+_intakes_lock = threading.Lock()
+
+def get_intake():
+    """Geçerli sitenin giriş kuyruğu; kuyruk kipi kapalıysa None."""
+    if not INTAKE_ENABLED:
+        return None
+    site = g.site if has_request_context() and 'site' in g else background_site()
+    with _intakes_lock:
+        intake = intakes.get(site.slug)
+        if intake is None:
+            base = os.environ.get('IZIN_INTAKE_DIR')
+            if base:
+                directory = os.path.join(base, site.slug) if len(SITES) > 1 else base
+            else:
+                directory = os.path.splitext(site.db_path)[0] + '_intake'
+            # Boşaltıcı iş parçacığı veritabanını süreç boyunca tutar
+            intake = intakes[site.slug] = intake_queue.IntakeQueue(site_pool.pin(site.slug), directory,
+                                                                   fsync=os.environ.get('IZIN_INTAKE_FSYNC', '1') == '1')
+            # Önce kuyruk boşaltılır, sonra bağlantılar kapanır (atexit ters sırayla çalışır)
+            atexit.register(intake.stop)
+    return intake
+
+if INTAKE_ENABLED:
+    instrumentation.metrics.register_collector(
+        lambda: [('intake_queue_depth', 'gauge', 'Kuyrukta aktarılmayı bekleyen izin talepleri', {'site': slug}, intake.depth())
+                 for slug, intake in list(intakes.items())])
+
+# Şablonlar başlangıçta bir kez derlenir; istek başına yeniden ayrıştırılmaz.
+# Derlenmiş kod diskte önbelleklenir, böylece her worker yeniden derlemez.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+TEMPLATES = {name: app.jinja_env.get_template(name)
+             for name in ('index.html', 'login.html', 'employee_panel.html', 'employer_panel.html', 'availability.html',
+                          'reports.html')}
+
+# Statik dosyalar içerik özetiyle sürümlenir (?v=...) ve uzun süre önbelleklenir
+assets = static_assets.AssetVersions(app.static_folder, app.static_url_path)
+app.jinja_env.globals['asset_url'] = assets.url
+app.jinja_env.globals['asset_integrity'] = assets.integrity
+# Şablon ya da statik dosya değişince panel ETag'leri de değişir
+BUILD_ID = static_assets.build_id(app.static_folder, os.path.join(app.root_path, app.template_folder))
+
+if os.environ.get('IZIN_COMPRESSION', '1') == '1':
+    app.wsgi_app = compression.CompressionMiddleware(app.wsgi_app)
+
+@app.after_request
+def static_cache_headers(response):
+    if request.endpoint == 'static':
+        if assets.is_current(request.view_args.get('filename'), request.args.get('v')):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = static_assets.FAR_FUTURE
+            response.cache_control.immutable = True
+        else:
+            # Sürümsüz adres: her seferinde ETag ile doğrulanır
+            response.cache_control.no_cache = True
+    return response
+
+def panel_validators(*scope):
+    """Panel verisinin sürümünden (değişiklik akışı, arşiv, kuyruk) türetilen (akış kimliği, ETag, Last-Modified)."""
+    conn = db.connection()
+    intake = get_intake()
+    feed_id, changed_at = change_feed.latest(conn)
+    version = (BUILD_ID, g.site.slug, feed_id, archive.version(conn), intake.depth() if intake is not None else 0, *scope)
+    etag = hashlib.sha1(repr(version).encode()).hexdigest()[:20]
+    return feed_id, etag, changed_at
+
+def with_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Tarayıcı kopyasını saklar ama her seferinde sunucuya sorar
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def not_modified(etag, last_modified):
+    """İstemcideki kopya güncelse 304 yanıtı, değilse None."""
+    if session.get('_flashes') or is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return with_validators(Response(status=304), etag, last_modified)
+
+@app.cli.command('init-db')
+@click.option('--demo', is_flag=True, help='Boş veritabanına demo çalışanları ekle')
+@click.option('--all-sites', is_flag=True, help='IZIN_SITE yerine tanımlı bütün siteler')
+def init_db(demo, all_sites):
+    """Veritabanını kurar ya da bekleyen göçleri uygular (dağıtımda bir kez)."""
+    for site in (SITES.values() if all_sites else [background_site()]):
+        with site_pool.lease(site.slug) as handle:
+            applied = handle.bootstrap(seed_demo=demo or os.environ.get('IZIN_SEED_DEMO') == '1')
+        click.echo(f'✅ {site.name}: şema sürümü {migrations.LATEST_VERSION}' + (f' (uygulanan: {applied})' if applied else ' (güncel)'))
+
+@app.cli.command('set-employer-password')
+@click.password_option(help='Yeni işveren şifresi')
+def set_employer_password(password):
+    """IZIN_SITE ile seçilen sitenin işveren şifresini değiştirir."""
+    db.set_employer_password(password)
+    click.echo(f'✅ {background_site().name} işveren şifresi güncellendi')
+
+@app.cli.command('sites-report')
+@click.option('--year', type=int, default=lambda: date.today().year)
+def sites_report(year):
+    """Bütün sitelerin özetini paralel sorgular ve birleştirir."""
+    results = tenants.fan_out(site_pool, lambda handle, site: handle.site_summary(year))
+    for slug, summary in results.items():
+        if 'error' in summary:
+            click.echo(f"❌ {SITES[slug].name}: {summary['error']}")
+        else:
+            days = sum(row['days'] for row in summary['months'])
+            click.echo(f"{SITES[slug].name}: {summary['employees']} çalışan, {summary['pending']} bekleyen talep, {days} gün izin")
+    totals = merge_site_summaries(results.values())
+    click.echo(f"Toplam: {totals['employees']} çalışan, {totals['pending']} bekleyen talep, "
+               f"{sum(row['days'] for row in totals['months'])} gün izin ({year})")
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Sık çalışan sorguların indeks kullandığını doğrular."""
+    problems = db.explain_hot_queries()
+    for name, plan in problems.items():
+        click.echo(f'❌ {name}: ' + ' | '.join(plan))
+    if problems:
+        raise SystemExit(1)
+    click.echo(f'✅ {len(HOT_QUERIES)} sorgunun tamamı indeks kullanıyor')
+
+@app.cli.command('reconcile-leave')
+def reconcile_leave():
+    """Kullanılan izin günlerini bakiye defterinden yeniden hesaplar."""
+    fixed = db.reconcile_leave_balances()
+    click.echo(f'✅ {fixed} çalışanın bakiyesi düzeltildi')
+
+@app.cli.command('fetch-assets')
+def fetch_assets():
+    """Bootstrap dosyalarını static/vendor altına indirir (sonrasında CDN kullanılmaz)."""
+    try:
+        written = static_assets.fetch_vendor(app.static_folder)
+    except static_assets.VendorIntegrityError as e:
+        click.echo(f'❌ Özet tutmuyor, dosyalar yazılmadı: {e}')
+        raise SystemExit(1)
+    for path in written:
+        click.echo(f'✅ {path}')
+
+@app.cli.command('archive-leaves')
+@click.option('--days', default=archive.ARCHIVE_AFTER_DAYS, show_default=True, help='Bu kadar günden eski kapanmış talepler taşınır')
+@click.option('--batch-size', default=archive.BATCH_SIZE, show_default=True)
+def archive_leaves(days, batch_size):
+    """Eski onaylı/reddedilmiş talepleri arşiv veritabanına taşır."""
+    moved, seconds = db.archive_leave_requests(date.today() - timedelta(days=days), batch_size)
+    click.echo(f'✅ {moved} talep arşive taşındı ({seconds} sn) → {db.archive_path}')
+
+@app.cli.command('accrue-leave')
+@click.option('--as-of', help='Hesap tarihi (YYYY-AA-GG, varsayılan bugün)')
+@click.option('--full', is_flag=True, help='Değişmemiş çalışanlar dahil hepsini yeniden hesapla')
+@click.option('--all-sites', is_flag=True, help='IZIN_SITE yerine tanımlı bütün siteler')
+def accrue_leave(as_of, full, all_sites):
+    """Yıllık izin haklarını kıdeme göre hesaplar (günlük zamanlanmış iş olarak çalıştırılır)."""
+    try:
+        as_of = date.fromisoformat(as_of) if as_of else None
+    except ValueError:
+        raise click.BadParameter('tarih YYYY-AA-GG biçiminde olmalı')
+    for site in (SITES.values() if all_sites else [background_site()]):
+        with site_pool.lease(site.slug) as handle:
+            updated, seconds = handle.accrue_leave(as_of, full)
+        click.echo(f'✅ {site.name}: {updated} çalışanın izin hakkı güncellendi ({seconds} sn)')
+
+@app.cli.command('rebuild-summaries')
+def rebuild_summaries():
+    """İzin kullanım özetlerini tüm taleplerden yeniden hesaplar."""
+    count, seconds = db.rebuild_usage_summaries()
+    click.echo(f'✅ {count} özet satırı yazıldı ({seconds} sn)')
+
+@app.cli.command('import-employees')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'json']), help='Varsayılan: dosya uzantısından')
+@click.option('--batch-size', default=bulk_import.BATCH_SIZE, show_default=True)
+def import_employees_command(path, fmt, batch_size):
+    """Çalışanları CSV/JSON dosyasından tek işlemde içe aktarır."""
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        report = bulk_import.import_employees(db, stream, fmt or bulk_import.detect_format(path), hash_password,
+                                              batch_size=batch_size)
+    for number, name in report['duplicates']:
+        click.echo(f'  satır {number}: {name} zaten kayıtlı')
+    for number, message in report['errors']:
+        click.echo(f'  satır {number}: {message}')
+    click.echo(f"✅ {report['inserted']} çalışan eklendi, {len(report['duplicates'])} tekrar, "
+               f"{len(report['errors'])} hata ({report['seconds']} sn)")
+
+@app.cli.command('export-leaves')
+@click.option('--format', 'fmt', type=click.Choice(sorted(export.WRITERS)), default='csv', show_default=True)
+@click.option('--status', type=click.Choice(sorted(LEAVE_STATUSES)), default='all', show_default=True)
+@click.option('--from', 'date_from', help='YYYY-AA-GG; bu tarihle kesişen izinler')
+@click.option('--to', 'date_to', help='YYYY-AA-GG')
+@click.option('--output', '-o', type=click.File('wb'), default='-', help='Varsayılan: standart çıktı')
+def export_leaves_command(fmt, status, date_from, date_to, output):
+    """İzin geçmişini bordro için CSV/XLSX olarak dışa aktarır (akış halinde)."""
+    try:
+        for value in (date_from, date_to):
+            if value:
+                date.fromisoformat(value)
+    except ValueError:
+        raise click.BadParameter('tarih YYYY-AA-GG biçiminde olmalı')
+    rows = db.iter_leave_export(status=None if status == 'all' else status, date_from=date_from, date_to=date_to)
+    for chunk in export.WRITERS[fmt](rows):
+        output.write(chunk)
+
+@app.cli.command('drain-intake')
+def drain_intake():
+    """Giriş kuyruğunda bekleyen izin taleplerini hemen veritabanına aktarır."""
+    intake = get_intake()
+    if intake is None:
+        raise click.ClickException('IZIN_INTAKE_MODE=queue tanımlı değil')
+    click.echo(f'✅ {intake.drain()} talep aktarıldı')
 
 @app.route('/')
 def index():
-    return render_template_string(INDEX_TEMPLATE)
+    return render_template(TEMPLATES['index.html'])
+
+login_ip_throttle = passwords.LoginThrottle(passwords.IP_FAILURE_LIMIT, passwords.LOGIN_WINDOW)
+login_account_throttle = passwords.LoginThrottle(passwords.ACCOUNT_FAILURE_LIMIT, passwords.LOGIN_WINDOW)
+
+instrumentation.metrics.register_collector(lambda: [
+    ('password_hash_pending', 'gauge', 'Özet havuzunda çalışan ve sırada bekleyen doğrulamalar', {}, hasher.pending()),
+    ('password_hash_rejected_total', 'counter', 'Havuz dolu olduğu için geri çevrilen girişler', {}, hasher.stats['rejected']),
+    ('login_throttled_total', 'counter', 'Başarısız deneme sınırına takılan girişler', {},
+     login_ip_throttle.blocked_total + login_account_throttle.blocked_total),
+])
+
+def attempt_login(account, verify):
+    """Sınırlar ve özet havuzu üzerinden giriş denemesi.
+    
+    (verify() sonucu, None) ya da geri çevrildiyse (None, (durum kodu, başlıklar)) döndürür.
+    """
+    # Hesap sınırı IP'ye bağlıdır; başka bir istemci hesabı kilitleyemez
+    account = (g.site.slug, account, request.remote_addr)
+    wait = max(login_ip_throttle.retry_after(request.remote_addr), login_account_throttle.retry_after(account))
+    if wait:
+        flash('Çok fazla hatalı deneme! Lütfen daha sonra tekrar deneyin.', 'danger')
+        return None, (429, {'Retry-After': str(wait)})
+    try:
+        result = verify()
+    except passwords.HashingBusy:
+        flash('Sistem şu anda yoğun, lütfen birkaç saniye sonra tekrar deneyin.', 'warning')
+        return None, (503, {'Retry-After': '2'})
+    if result is None or result is False:
+        login_ip_throttle.failed(request.remote_addr)
+        login_account_throttle.failed(account)
+    else:
+        login_account_throttle.succeeded(account)
+    return result, None
+
+def _site_choices():
+    """Giriş formundaki site listesi (site adresten belli değilse ve birden çok site varsa)."""
+    return [] if g.site_explicit or len(SITES) == 1 else list(SITES.values())
 
 @app.route('/employee_login', methods=['GET', 'POST'])
 def employee_login():
+    status, headers = 200, {}
     if request.method == 'POST':
-        name = request.form.get('employee_name')
-        password = request.form.get('password')
-        if db.verify_employee(name, password):
+        name = request.form.get('employee_name', '')
+        password = request.form.get('password', '')
+        employee_id, refused = attempt_login(f'employee:{name}', lambda: db.verify_employee(name, password))
+        if employee_id is not None:
             session['user_type'] = 'employee'
-            session['user_name'] = name
-            return redirect('/employee_panel')
-        flash('Hatalı giriş bilgileri!', 'danger')
+            session['site'] = g.site.slug
+            session['user_id'] = employee_id
+            return redirect(url_for('employee_panel'))
+        if refused:
+            status, headers = refused
+        else:
+            flash('Hatalı giriş bilgileri!', 'danger')
     
-    employees = db.get_all_employees()
-    return render_template_string(LOGIN_TEMPLATE, title="🔐 Günkent Sitesi İzin Takip Sistemi", show_employee_select=True, 
-                                employees=employees, show_demo_info=False, bg_color="#56ab2f 0%, #a8e6cf 100%")
+    return render_template(TEMPLATES['login.html'], title=f"🔐 {g.site.name} İzin Takip Sistemi", show_employee_select=True, 
+                                site_choices=_site_choices(), show_demo_info=False, bg_color="#56ab2f 0%, #a8e6cf 100%"), status, headers
 
 @app.route('/employer_login', methods=['GET', 'POST'])
 def employer_login():
+    status, headers = 200, {}
     if request.method == 'POST':
-        password = request.form.get('password')
-        if db.verify_employer(password):
+        password = request.form.get('password', '')
+        ok, refused = attempt_login('employer', lambda: db.verify_employer(password))
+        if ok:
             session['user_type'] = 'employer'
-            return redirect('/employer_panel')
-        flash('Hatalı işveren şifresi!', 'danger')
+            session['site'] = g.site.slug
+            return redirect(url_for('employer_panel'))
+        if refused:
+            status, headers = refused
+        else:
+            flash('Hatalı işveren şifresi!', 'danger')
     
-    return render_template_string(LOGIN_TEMPLATE, title="🔐 İşveren Girişi", show_employee_select=False, 
-                                employees=[], show_demo_info=True, bg_color="#ff6b6b 0%, #ffa726 100%")
+    return render_template(TEMPLATES['login.html'], title="🔐 İşveren Girişi", show_employee_select=False, 
+                                site_choices=_site_choices(), show_demo_info=True, bg_color="#ff6b6b 0%, #ffa726 100%"), status, headers
+
+@app.route('/api/employees/search')
+def search_employees():
+    """Giriş ekranı ve işveren paneli için ad önerileri (yalnızca kimlik ve ad)."""
+    matches = db.search_employees(request.args.get('q', ''),
+                                  request.args.get('limit', 10, type=int))
+    response = jsonify({'employees': matches})
+    # Ad listesi kısa süre değişmez; aynı öneki yazan istemci sunucuya tekrar gitmez
+    response.cache_control.private = True
+    response.cache_control.max_age = 30
+    return response
 
 @app.route('/employee_panel')
 def employee_panel():
     if session.get('user_type') != 'employee':
-        return redirect('/')
-    
-    employee = db.get_employee(session['user_name'])
-    leaves = db.get_employee_leaves(session['user_name'])
-    
-    content = f'''
-    <div class="row mb-4">
-    <div class="col-md-6"><div class="card bg-primary text-white"><div class="card-body text-center">
-    <h5>📅 Yıllık İzin</h5><h3>{employee['annual_leave_days']} Gün</h3></div></div></div>
-    <div class="col-md-6"><div class="card bg-warning text-white"><div class="card-body text-center">
-    <h5>✅ Kullanılan</h5><h3>{employee['used_leave_days']} Gün</h3></div></div></div>
-    </div>
-    
-    <div class="card mb-4"><div class="card-header"><h5>📝 İzin Talebi</h5></div><div class="card-body">
-    <form action="/add_leave_request" method="POST">
-    <div class="row">
-    <div class="col-md-4 mb-3"><select class="form-select" name="leave_type" required>
-    <option value="Yıllık İzin">Yıllık İzin</option><option value="Hastalık İzni">Hastalık İzni</option>
-    <option value="Mazeret İzni">Mazeret İzni</option></select></div>
-    <div class="col-md-3 mb-3"><input type="date" class="form-control" name="start_date" required></div>
-    <div class="col-md-3 mb-3"><input type="date" class="form-control" name="end_date" required></div>
-    <div class="col-md-2 mb-3"><button type="submit" class="btn btn-success w-100">Gönder</button></div>
-    </div>
-    <textarea class="form-control" name="reason" placeholder="Açıklama" rows="2"></textarea>
-    </form></div></div>
-    
-    <div class="card"><div class="card-header"><h5>📋 İzin Geçmişim</h5></div><div class="card-body">
-    '''
-    
-    if leaves:
-        content += '<div class="table-responsive"><table class="table table-striped"><thead><tr><th>Tür</th><th>Tarih</th><th>Durum</th></tr></thead><tbody>'
-        for leave in leaves:
-            status_badge = {'approved': 'success">✅ Onaylandı', 'rejected': 'danger">❌ Reddedildi', 'pending': 'warning">⏳ Beklemede'}
-            content += f'<tr><td>{leave["leave_type"]}</td><td>{leave["start_date"]} - {leave["end_date"]}</td><td><span class="badge bg-{status_badge.get(leave["status"], "secondary")}</span></td></tr>'
-        content += '</tbody></table></div>'
-    else:
-        content += '<p class="text-muted text-center">Henüz izin talebiniz yok.</p>'
-    
-    content += '</div></div>'
+        return redirect(url_for('index'))
     
-    return render_template_string(PANEL_TEMPLATE, title=f"👤 {employee['name']} - İşçi Paneli", content=content, bg_color="#56ab2f 0%, #a8e6cf 100%")
+    employee = db.get_employee(session.get('user_id'))
+    if employee is None:
+        # Çalışan bu arada silinmiş (pasifleştirilmiş) ya da oturum eski biçimde
+        session.clear()
+        return redirect(url_for('index'))
+    _, etag, last_modified = panel_validators('employee', employee['id'])
+    unchanged = not_modified(etag, last_modified)
+    if unchanged is not None:
+        return unchanged
+    # Akış başlamadan önce çekilir: oturum çerezi gövdeden önce gönderilir
+    get_flashed_messages(with_categories=True)
+    leaves = db.iter_employee_leaves(employee['id'])
+    intake = get_intake()
+    if intake is not None:
+        # Henüz aktarılmamış talepler "sırada" olarak en üstte gösterilir
+        leaves = itertools.chain(intake.queued_for(employee['id']), leaves)
+    return with_validators(Response(stream_template(TEMPLATES['employee_panel.html'], title=f"👤 {employee['name']} - İşçi Paneli",
+                                                    employee=employee, leaves=leaves,
+                                                    leave_types=LEAVE_TYPES, bg_color="#56ab2f 0%, #a8e6cf 100%")),
+                           etag, last_modified)
 
 @app.route('/employer_panel')
 def employer_panel():
     if session.get('user_type') != 'employer':
-        return redirect('/')
-    
-    employees = db.get_all_employees()
-    leave_requests = db.get_all_leave_requests()
-    
-    content = f'''
-    <div class="card mb-4"><div class="card-header"><h5>👤 Yeni Çalışan Ekle</h5></div><div class="card-body">
-    <form id="addEmployeeForm" action="/add_employee" method="POST" onsubmit="document.getElementById('submitBtn').disabled=true;document.getElementById('submitBtn').innerHTML='<span class=\'spinner-border spinner-border-sm\' role=\'status\'></span> Ekleniyor...';">
-    <div class="row">
-    <div class="col-md-4 mb-3"><input type="text" class="form-control" name="name" placeholder="Ad" required></div>
-    <div class="col-md-3 mb-3"><input type="password" class="form-control" name="password" placeholder="Şifre" required></div>
-    <div class="col-md-3 mb-3"><input type="number" class="form-control" name="annual_leave" value="20" min="0"></div>
-    <div class="col-md-2 mb-3"><button id="submitBtn" type="submit" class="btn btn-primary w-100">Ekle</button></div>
-    </div></form></div></div>
-    
-    <div class="card mb-4"><div class="card-header"><h5>👥 Çalışanlar ({len(employees)})</h5></div><div class="card-body">
-    '''
-    
-    if employees:
-        content += '''<div class="table-responsive"><table class="table table-striped"><thead><tr><th>Ad</th><th>İzin</th><th>Kullanılan</th><th>Kalan</th><th>İşlem</th></tr></thead><tbody>'''
-        for emp in employees:
-            remaining = emp['annual_leave_days'] - emp['used_leave_days']
-            content += f'''<tr><td><strong>{emp["name"]}</strong></td>
-            <td><span class="badge bg-primary">{emp["annual_leave_days"]}</span></td>
-            <td><span class="badge bg-warning">{emp["used_leave_days"]}</span></td>
-            <td><span class="badge bg-success">{remaining}</span></td>
-            <td><button class="btn btn-danger btn-sm" onclick="if(confirm('{emp["name"]} isimli çalışanı silmek istediğinize emin misiniz? Bu işlem geri alınamaz!')) {{ deleteEmployee('{emp["name"]}'); }}">🗑️ Sil</button></td></tr>'''
-        content += '</tbody></table></div>'
-    else:
-        content += '<p class="text-muted text-center">Henüz çalışan yok.</p>'
-    
-    content += '</div></div><div class="card"><div class="card-header"><h5>📋 İzin Talepleri</h5></div><div class="card-body">'
-    
-    if leave_requests:
-        content += '<div class="table-responsive"><table class="table table-striped"><thead><tr><th>Çalışan</th><th>Tür</th><th>Tarih</th><th>Durum</th><th>İşlem</th></tr></thead><tbody>'
-        for leave in leave_requests:
-            status_badge = {'approved': 'success">✅ Onaylandı', 'rejected': 'danger">❌ Reddedildi', 'pending': 'warning">⏳ Beklemede'}
-            content += f'''<tr><td><strong>{leave["employee_name"]}</strong></td>
-            <td>{leave["leave_type"]}</td><td>{leave["start_date"]} - {leave["end_date"]}</td>
-            <td><span class="badge bg-{status_badge.get(leave["status"], "secondary")}</span></td><td>'''
-            
-            if leave['status'] == 'pending':
-                content += f'''<form action="/update_leave_status" method="POST" style="display:inline">
-                <input type="hidden" name="leave_id" value="{leave["id"]}">
-                <input type="hidden" name="status" value="approved">
-                <button type="submit" class="btn btn-success btn-sm">✅</button></form>
-                <form action="/update_leave_status" method="POST" style="display:inline">
-                <input type="hidden" name="leave_id" value="{leave["id"]}">
-                <input type="hidden" name="status" value="rejected">
-                <button type="submit" class="btn btn-danger btn-sm">❌</button></form>'''
-            
-            content += '</td></tr>'
-        content += '</tbody></table></div>'
-    else:
-        content += '<p class="text-muted text-center">Henüz izin talebi yok.</p>'
-    
-    # Add the JavaScript for handling form submission and employee deletion
-    content += '''</div></div>
-    
-    <script>
-    function deleteEmployee(name) {
-        if (confirm(name + ' isimli çalışanı silmek istediğinize emin misiniz? Bu işlem geri alınamaz!')) {
-            fetch('/delete_employee', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: 'employee_name=' + encodeURIComponent(name)
-            })
-            .then(response => {
-                if (response.ok) {
-                    window.location.reload();
-                } else {
-                    alert('Silme işlemi sırasında bir hata oluştu.');
-                }
-            })
-            .catch(error => {
-                console.error('Error:', error);
-                alert('Silme işlemi sırasında bir hata oluştu: ' + error);
-            });
-        }
+        return redirect(url_for('index'))
+    
+    # Filtreler (varsayılan görünüm: yalnızca bekleyen talepler)
+    filters = {
+        'status': request.args.get('status', 'pending'),
+        'employee': request.args.get('employee', '').strip(),
+        'leave_type': request.args.get('leave_type', ''),
+        'date_from': request.args.get('date_from', ''),
+        'date_to': request.args.get('date_to', ''),
     }
+    if filters['status'] not in LEAVE_STATUSES:
+        filters['status'] = 'pending'
     
-    document.getElementById('addEmployeeForm').addEventListener('submit', function(e) {
-        const form = this;
-        const submitBtn = document.getElementById('submitBtn');
-        submitBtn.disabled = true;
-        submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status"></span> Ekleniyor...';
-        
-        fetch(form.action, {
-            method: 'POST',
-            body: new URLSearchParams(new FormData(form))
-        })
-        .then(response => {
-            if (response.redirected) {
-                window.location.href = response.url;
-            } else {
-                return response.text().then(html => {
-                    document.documentElement.innerHTML = html;
-                });
-            }
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            alert('İşlem sırasında bir hata oluştu: ' + error);
-            submitBtn.disabled = false;
-            submitBtn.textContent = 'Tekrar Dene';
-        });
-        
-        e.preventDefault();
-    });
-    </script>'''
+    # Canlı güncellemeler sayfanın okunduğu andan itibaren akar (arada olay kaçmaz)
+    feed_id, etag, last_modified = panel_validators('employer', request.query_string)
+    unchanged = not_modified(etag, last_modified)
+    if unchanged is not None:
+        return unchanged
+    employee_count = db.count_employees()
+    employees, next_employee = db.get_employees_page(request.args.get('emp_after'))
+    leave_requests, next_cursor = db.get_leave_requests_page(
+        status=None if filters['status'] == 'all' else filters['status'],
+        employee_name=filters['employee'] or None,
+        leave_type=filters['leave_type'] or None,
+        date_from=filters['date_from'] or None,
+        date_to=filters['date_to'] or None,
+        cursor=request.args.get('cursor'))
+    active_filters = {key: value for key, value in filters.items() if value}
     
-    # Return the rendered template
-    return render_template_string(
-        PANEL_TEMPLATE,
+    get_flashed_messages(with_categories=True)
+    return with_validators(Response(stream_template(
+        TEMPLATES['employer_panel.html'],
         title="👔 İşveren Paneli",
-        content=content,
+        employee_count=employee_count,
+        employees=employees,
+        leave_requests=leave_requests,
+        filters=filters,
+        statuses=LEAVE_STATUSES,
+        leave_types=LEAVE_TYPES,
+        next_employees_url=url_for('employer_panel', emp_after=next_employee, **active_filters) if next_employee else None,
+        next_leaves_url=url_for('employer_panel', cursor=next_cursor, **active_filters) if next_cursor else None,
+        first_page_url=url_for('employer_panel', **active_filters) if request.args.get('cursor') else None,
+        # Dışa aktarım, paneldeki filtrelerin tamamını kullanır
+        export_url=url_for('export_leaves', **filters),
+        feed_id=feed_id,
         bg_color="#ff6b6b 0%, #ffa726 100%"
-    )
+    )), etag, last_modified)
+
+@app.route('/events')
+def events():
+    """İşveren paneline yeni talepleri ve değişiklikleri iten SSE akışı."""
+    if session.get('user_type') != 'employer':
+        return Response('yetkisiz\n', status=403, mimetype='text/plain')
+    
+    # Yeniden bağlanan tarayıcı son aldığı olayın kimliğini başlıkta gönderir
+    after = request.headers.get('Last-Event-ID') or request.args.get('after')
+    after = int(after) if after and after.isdigit() else None
+    if request.environ.get('izin.async'):
+        # ASGI kipi (asgi.py): akış iş parçacığı tutmadan olay döngüsünde sürdürülür
+        request.environ['izin.event_stream'] = (g.site.slug, after)
+        return Response(mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # stream_with_context: sitenin veritabanı akış bitene kadar havuzda tutulur
+    return Response(stream_with_context(change_feed.stream(get_db(), after)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/export_leaves')
+def export_leaves():
+    if session.get('user_type') != 'employer':
+        return redirect(url_for('index'))
+    
+    fmt = request.args.get('format', 'csv')
+    status = request.args.get('status', 'all')
+    date_from = request.args.get('date_from') or None
+    date_to = request.args.get('date_to') or None
+    if fmt not in export.WRITERS or status not in LEAVE_STATUSES:
+        flash('Geçersiz dışa aktarım seçeneği!', 'danger')
+        return redirect(url_for('employer_panel'))
+    try:
+        for value in (date_from, date_to):
+            if value:
+                date.fromisoformat(value)
+    except ValueError:
+        flash('Geçersiz tarih aralığı!', 'danger')
+        return redirect(url_for('employer_panel'))
+    
+    rows = db.iter_leave_export(status=None if status == 'all' else status,
+                                employee_name=request.args.get('employee', '').strip() or None,
+                                leave_type=request.args.get('leave_type') or None,
+                                date_from=date_from, date_to=date_to)
+    # Content-Length verilmez: yanıt parça parça (chunked) gönderilir
+    filename = f"izinler_{date.today():%Y%m%d}.{fmt}"
+    return Response(export.WRITERS[fmt](rows), mimetype=export.CONTENT_TYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"', 'X-Accel-Buffering': 'no'})
+
+def _report_params():
+    year = request.args.get('year', date.today().year, type=int)
+    status = request.args.get('status', 'approved')
+    if not 1900 <= year <= 9999:
+        year = date.today().year
+    if status not in LEAVE_STATUSES or status == 'all':
+        status = 'approved'
+    return year, status
+
+@app.route('/reports')
+def reports():
+    if session.get('user_type') != 'employer':
+        return redirect(url_for('index'))
+    
+    year, status = _report_params()
+    employee = request.args.get('employee', '').strip()
+    # Ay x tür tablosu
+    by_month = {f'{year:04d}-{month:02d}': {} for month in range(1, 13)}
+    for row in db.get_usage_by_month(year, status):
+        by_month[row['month']][row['leave_type']] = row['days']
+    usage, next_employee = db.get_usage_by_employee(year, status, employee_name=employee or None,
+                                                    after_name=request.args.get('after'))
+    return render_template(TEMPLATES['reports.html'], title="📊 İzin Kullanım Raporu", year=year, status=status,
+                           employee=employee, statuses={k: v for k, v in LEAVE_STATUSES.items() if k != 'all'},
+                           leave_types=LEAVE_TYPES, by_month=by_month, usage=usage,
+                           next_url=url_for('reports', year=year, status=status, after=next_employee) if next_employee else None,
+                           bg_color="#ff6b6b 0%, #ffa726 100%")
+
+@app.route('/api/reports/usage')
+def usage_report():
+    if session.get('user_type') != 'employer':
+        return jsonify({'error': 'Yetkisiz'}), 403
+    
+    year, status = _report_params()
+    if request.args.get('group', 'month') == 'employee':
+        usage, next_employee = db.get_usage_by_employee(year, status, employee_name=request.args.get('employee') or None,
+                                                        after_name=request.args.get('after'))
+        return jsonify({'year': year, 'status': status, 'employees': usage, 'next': next_employee})
+    return jsonify({'year': year, 'status': status, 'months': db.get_usage_by_month(year, status)})
+
+@app.route('/availability')
+def availability():
+    if session.get('user_type') != 'employer':
+        return redirect(url_for('index'))
+    
+    try:
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+    except ValueError:
+        start = None
+    if start is None:
+        today = date.today()
+        start = today - timedelta(days=today.weekday())
+    length = min(max(request.args.get('days', 14, type=int), 1), 62)
+    end = start + timedelta(days=length - 1)
+    show_pending = request.args.get('pending') == '1'
+    
+    days = [start + timedelta(days=i) for i in range(length)]
+    off_days = set()
+    for year in range(start.year, end.year + 1):
+        off_days |= work_calendar.holidays(year)
+    
+    # Çalışan başına gün gün durum: onaylı izin bekleyen talebin önüne geçer
+    rows = {}
+    for leave in db.get_leaves_in_range(start, end, ('approved', 'pending') if show_pending else ('approved',)):
+        cells = rows.setdefault(leave['employee_name'], [None] * length)
+        first = max((date.fromisoformat(leave['start_date']) - start).days, 0)
+        last = min((date.fromisoformat(leave['end_date']) - start).days, length - 1)
+        for i in range(first, last + 1):
+            if cells[i] != 'approved':
+                cells[i] = leave['status']
+    away_counts = [sum(1 for cells in rows.values() if cells[i] == 'approved') for i in range(length)]
+    
+    return render_template(TEMPLATES['availability.html'], title="📅 Ekip Müsaitlik Takvimi",
+                           days=days, rows=sorted(rows.items()), away_counts=away_counts,
+                           off_days=off_days, show_pending=show_pending, length=length,
+                           prev_start=(start - timedelta(days=length)).isoformat(),
+                           next_start=(start + timedelta(days=length)).isoformat(),
+                           bg_color="#ff6b6b 0%, #ffa726 100%")
+
+def _employer_result(ok, message):
+    """Panelden fetch ile gelen isteğe JSON, form gönderimine flash + yönlendirme döner."""
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'ok': ok, 'message': message}), 200 if ok else 400
+    flash(message, 'success' if ok else 'danger')
+    return redirect(url_for('employer_panel'))
 
 @app.route('/add_employee', methods=['POST'])
 def add_employee():
     if session.get('user_type') != 'employer':
-        return redirect('/')
+        return redirect(url_for('index'))
     
     name = request.form.get('name')
     password = request.form.get('password')
-    annual_leave = int(request.form.get('annual_leave', 20))
+    # Boş bırakılırsa hak kıdemden hesaplanır
+    annual_leave = request.form.get('annual_leave', '').strip()
+    annual_leave = int(annual_leave) if annual_leave else None
     
     try:
         if db.add_employee(name, password, annual_leave):
-            flash(f'{name} başarıyla eklendi!', 'success')
-        else:
-            flash('Çalışan zaten kayıtlı!', 'danger')
+            return _employer_result(True, f'{name} başarıyla eklendi!')
+        return _employer_result(False, 'Bu isimde kayıtlı (ya da arşivlenmiş) bir çalışan var!')
+    except passwords.HashingBusy:
+        return _employer_result(False, 'Sistem şu anda yoğun, lütfen birkaç saniye sonra tekrar deneyin.')
     except Exception as e:
-        flash(f'Hata oluştu: {str(e)}', 'danger')
+        return _employer_result(False, f'Hata oluştu: {str(e)}')
+
+@app.route('/import_employees', methods=['POST'])
+def import_employees():
+    if session.get('user_type') != 'employer':
+        return redirect(url_for('index'))
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Dosya seçilmedi!', 'danger')
+        return redirect(url_for('employer_panel'))
     
-    return redirect('/employer_panel')
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    try:
+        # Küçük partiler de worker iş parçacığında değil, girişlerle aynı sınırlı havuzda özetlenir
+        report = bulk_import.import_employees(db, stream, bulk_import.detect_format(upload.filename), hash_password,
+                                              executor=hasher)
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        flash(f'Dosya okunamadı: {str(e)}', 'danger')
+        return redirect(url_for('employer_panel'))
+    
+    flash(f"{report['inserted']} çalışan eklendi, {len(report['duplicates'])} tekrar, {len(report['errors'])} hata.", 'success')
+    problems = [f'satır {n}: {name} zaten kayıtlı' for n, name in report['duplicates']] + \
+               [f'satır {n}: {message}' for n, message in report['errors']]
+    if problems:
+        more = f' (+{len(problems) - 10} satır daha)' if len(problems) > 10 else ''
+        flash('; '.join(problems[:10]) + more, 'danger')
+    return redirect(url_for('employer_panel'))
 
 @app.route('/delete_employee', methods=['POST'])
 def delete_employee():
     if session.get('user_type') != 'employer':
-        return redirect('/')
+        return redirect(url_for('index'))
     
-    name = request.form.get('employee_name')
-    db.delete_employee(name)
-    flash(f'{name} silindi!', 'success')
-    return redirect('/employer_panel')
+    name = db.delete_employee(request.form.get('employee_id', type=int))
+    if name is not None:
+        return _employer_result(True, f'{name} silindi, izin kayıtları arşive taşındı.')
+    return _employer_result(False, 'Çalışan bulunamadı!')
+
+@app.route('/rename_employee', methods=['POST'])
+def rename_employee():
+    if session.get('user_type') != 'employer':
+        return redirect(url_for('index'))
+    
+    new_name = (request.form.get('name') or '').strip()
+    if not new_name:
+        return _employer_result(False, 'Yeni ad boş olamaz!')
+    if db.rename_employee(request.form.get('employee_id', type=int), new_name):
+        return _employer_result(True, f'Çalışanın adı {new_name} olarak değiştirildi.')
+    return _employer_result(False, 'Çalışan bulunamadı ya da bu ad kullanımda!')
 
 @app.route('/add_leave_request', methods=['POST'])
 def add_leave_request():
     if session.get('user_type') != 'employee':
-        return redirect('/')
+        return redirect(url_for('index'))
     
-    employee_name = session['user_name']
+    employee_id = session.get('user_id')
+    if employee_id is None:
+        return redirect(url_for('index'))
     leave_type = request.form.get('leave_type')
     start_date = request.form.get('start_date')
     end_date = request.form.get('end_date')
     reason = request.form.get('reason', '')
+    if leave_type not in LEAVE_TYPES:
+        flash('Geçersiz izin türü!', 'danger')
+        return redirect(url_for('employee_panel'))
+    try:
+        if date.fromisoformat(end_date) < date.fromisoformat(start_date):
+            raise ValueError
+    except (TypeError, ValueError):
+        flash('Geçersiz tarih aralığı!', 'danger')
+        return redirect(url_for('employee_panel'))
     
-    db.add_leave_request(employee_name, leave_type, start_date, end_date, reason)
+    intake = get_intake()
+    if intake is not None:
+        intake.enqueue(employee_id, leave_type, start_date, end_date, reason)
+        flash('İzin talebi sıraya alındı, kısa süre içinde işlenecek.', 'success')
+        return redirect(url_for('employee_panel'))
+    db.add_leave_request(employee_id, leave_type, start_date, end_date, reason)
     flash('İzin talebi oluşturuldu!', 'success')
-    return redirect('/employee_panel')
+    return redirect(url_for('employee_panel'))
 
 @app.route('/update_leave_status', methods=['POST'])
 def update_leave_status():
     if session.get('user_type') != 'employer':
-        return redirect('/')
+        return redirect(url_for('index'))
     
     leave_id = request.form.get('leave_id')
     status = request.form.get('status')
+    if status not in ('approved', 'rejected', 'pending'):
+        flash('Geçersiz durum!', 'danger')
+        return redirect(url_for('employer_panel'))
     
-    db.update_leave_status(leave_id, status)
-    flash(f'İzin talebi {status}!', 'success')
-    return redirect('/employer_panel')
+    if db.update_leave_status(leave_id, status):
+        flash(f'İzin talebi {status}!', 'success')
+        if status == 'approved':
+            own, others = db.find_leave_conflicts(leave_id)
+            if own:
+                flash('⚠️ Çalışanın bu tarihlerle çakışan onaylı başka izni var: ' +
+                      ', '.join(f"{leave['start_date']} - {leave['end_date']}" for leave in own), 'warning')
+            if others:
+                names = sorted({leave['employee_name'] for leave in others})
+                # Oturum çerezi sınırı için liste kısaltılır
+                more = f' ve {len(names) - 10} kişi daha' if len(names) > 10 else ''
+                flash(f'⚠️ Bu tarihlerde izinli diğer çalışanlar ({len(names)}): ' + ', '.join(names[:10]) + more, 'warning')
+    else:
+        flash('İzin talebi bulunamadı!', 'danger')
+    return redirect(url_for('employer_panel'))
+
+@app.route('/cache_stats')
+def cache_stats():
+    if session.get('user_type') != 'employer':
+        return redirect(url_for('index'))
+    return jsonify(db.cache_info())
+
+@app.route('/update_leave_status_batch', methods=['POST'])
+def update_leave_status_batch():
+    if session.get('user_type') != 'employer':
+        return jsonify({'error': 'Yetkisiz'}), 403
+    
+    status = request.form.get('status')
+    if status not in ('approved', 'rejected', 'pending'):
+        return jsonify({'error': 'Geçersiz durum'}), 400
+    try:
+        leave_ids = sorted({int(value) for value in request.form.getlist('leave_ids')})
+    except ValueError:
+        return jsonify({'error': 'Geçersiz talep numarası'}), 400
+    if not leave_ids or len(leave_ids) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'1 ile {MAX_BATCH_SIZE} arasında talep seçilmelidir'}), 400
+    
+    return jsonify(db.update_leave_statuses(leave_ids, status))
+
+@app.route('/admin/sites_report')
+def admin_sites_report():
+    """Bütün sitelerin birleştirilmiş özeti; IZIN_ADMIN_TOKEN tanımlı değilse kapalıdır."""
+    token = os.environ.get('IZIN_ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Kapalı'}), 404
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Yetkisiz'}), 401
+    year = request.args.get('year', date.today().year, type=int)
+    results = tenants.fan_out(site_pool, lambda handle, site: dict(handle.site_summary(year), name=site.name))
+    return jsonify({'year': year, 'sites': results, 'totals': merge_site_summaries(results.values())})
+
+@app.route('/metrics')
+def metrics():
+    # IZIN_METRICS_TOKEN tanımlıysa "Authorization: Bearer <token>" gerekir
+    token = os.environ.get('IZIN_METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('yetkisiz\n', status=401, mimetype='text/plain')
+    return Response(instrumentation.metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/logout')
 def logout():
+    site = session.get('site')
     session.clear()
+    if site:
+        session['site'] = site
     flash('Çıkış yapıldı!', 'success')
-    return redirect('/')
+    return redirect(url_for('index'))
 
 if __name__ == '__main__':
+    db.bootstrap(seed_demo=os.environ.get('IZIN_SEED_DEMO') == '1')
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,122 @@
+"""
+Kapanmış izin taleplerinin soğuk arşivi
+
+Arşiv ayrı bir SQLite dosyasıdır ve her bağlantıya `archive` adıyla eklenir
+(ATTACH). Ufuk tarihinden önce biten onaylı/reddedilmiş talepler partiler
+halinde, her parti kısa bir işlemle ana tablodan arşive taşınır; böylece
+sıcak tablo ve indeksleri küçük kalır. Silinen çalışanların bitmiş kapanmış
+talepleri de hemen arşive taşınır; bekleyen ve ileri tarihli talepleri
+kapanıp ufku geçene kadar ana tabloda kalır.
+
+Boş olmayan her taşıma app_meta'daki archive_version'ı artırır; panel
+ETag'leri bundan türetildiğinden arşivlenen satır listeden düştüğünde
+tarayıcıdaki kopya geçersiz olur.
+
+Arşivdeki talepler kimliklerini korur; ana tablonun kimlikleri AUTOINCREMENT
+olduğundan taşınan bir kimlik yeniden verilmez ve arşivle çakışmaz. WAL
+kipinde iki dosyaya yayılan işlem çökmeye karşı bölünmez değildir: arşive
+yazılıp ana tablodan silinemeyen satırlar bir sonraki çalıştırmada yeniden
+aday olur, INSERT OR IGNORE ile tekrar yazılmaz ve ana tablodan silinir.
+"""
+
+import os
+import time
+from datetime import date, timedelta
+
+from work_calendar import to_day
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get('IZIN_ARCHIVE_AFTER_DAYS', '730'))
+BATCH_SIZE = 1000
+CLOSED_STATUSES = ('approved', 'rejected')
+# Ufuk gününden önce biten kapanmış talepler; parametreler (ufuk, ufuk, *CLOSED_STATUSES, parti)
+CLOSED_CANDIDATES_SQL = f'''SELECT id FROM main.leave_requests
+    WHERE start_day < ? AND end_day < ?
+      AND status_id IN (SELECT id FROM main.leave_statuses WHERE code IN ({','.join('?' * len(CLOSED_STATUSES))}))
+    LIMIT ?'''
+COLUMNS = 'id, employee_id, leave_type_id, status_id, start_day, end_day, reason, request_date, intake_id'
+
+# Kimlikler ana veritabanındaki employees / leave_types / leave_statuses
+# tablolarına karşılık gelir (veritabanları arası yabancı anahtar olamaz)
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS archive.leave_requests (
+        id INTEGER PRIMARY KEY, employee_id INTEGER NOT NULL, leave_type_id INTEGER NOT NULL, status_id INTEGER NOT NULL,
+        start_day INTEGER, end_day INTEGER, reason TEXT, request_date TEXT, intake_id TEXT,
+        archived_at TEXT DEFAULT CURRENT_TIMESTAMP)''',
+    'CREATE INDEX IF NOT EXISTS archive.idx_archive_employee_date ON leave_requests (employee_id, request_date)',
+    'CREATE INDEX IF NOT EXISTS archive.idx_archive_date ON leave_requests (request_date)',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS archive.leave_intervals USING rtree_i32(id, start_day, end_day)',
+)
+
+
+def default_path(db_path):
+    return os.path.splitext(db_path)[0] + '_archive.db'
+
+
+def attach(conn, path):
+    """Arşiv dosyasını bağlantıya ekler; yoksa oluşturur."""
+    conn.execute('ATTACH DATABASE ? AS archive', (path,))
+    conn.execute('PRAGMA archive.journal_mode = WAL')
+    # Eski (ada dayalı) arşiv tablosu göç 10'da dönüştürülür
+    if not is_legacy(conn):
+        for statement in SCHEMA:
+            conn.execute(statement)
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)')
+
+
+def is_legacy(conn):
+    return any(row[1] == 'employee_name' for row in conn.execute('PRAGMA archive.table_info(leave_requests)'))
+
+
+def max_end_day(conn):
+    """Arşivdeki en geç bitiş günü (1970'ten beri); arşiv boşsa None."""
+    row = conn.execute("SELECT value FROM app_meta WHERE key = 'archive_max_end'").fetchone()
+    return row[0] if row and row[0] else None
+
+
+def version(conn):
+    """Arşiv sürümü; her boş olmayan taşımada artar."""
+    row = conn.execute("SELECT value FROM app_meta WHERE key = 'archive_version'").fetchone()
+    return row[0] if row else 0
+
+
+def _move_batch(conn):
+    """temp.archive_batch'teki talepleri arşive taşır (çağıranın işlemi içinde)."""
+    batch = 'id IN (SELECT id FROM temp.archive_batch)'
+    conn.execute(f'INSERT OR IGNORE INTO archive.leave_requests ({COLUMNS}) SELECT {COLUMNS} FROM main.leave_requests WHERE {batch}')
+    conn.execute(f'INSERT OR REPLACE INTO archive.leave_intervals (id, start_day, end_day) '
+                 f'SELECT id, start_day, end_day FROM main.leave_intervals WHERE {batch}')
+    # Tarih aralığı sorguları arşive yalnızca gerektiğinde iner
+    conn.execute(f'''UPDATE app_meta SET value = MAX(value, COALESCE((SELECT MAX(end_day) FROM main.leave_intervals WHERE {batch}), 0))
+                     WHERE key = 'archive_max_end\'''')
+    moved = conn.execute(f'DELETE FROM main.leave_requests WHERE {batch}').rowcount
+    if moved:
+        conn.execute("UPDATE app_meta SET value = value + 1 WHERE key = 'archive_version'")
+    return moved
+
+
+def archive_closed(db, before=None, batch_size=BATCH_SIZE):
+    """`before` tarihinden önce biten kapanmış talepleri taşır; (taşınan, saniye) döndürür."""
+    started = time.perf_counter()
+    horizon = to_day(before or date.today() - timedelta(days=ARCHIVE_AFTER_DAYS))
+    total = 0
+    while True:
+        with db.transaction() as conn:
+            conn.execute('DELETE FROM temp.archive_batch')
+            conn.execute(f'INSERT INTO temp.archive_batch (id) {CLOSED_CANDIDATES_SQL}',
+                         (horizon, horizon, *CLOSED_STATUSES, batch_size))
+            moved = _move_batch(conn)
+        total += moved
+        if moved < batch_size:
+            break
+    return total, round(time.perf_counter() - started, 3)
+
+
+def archive_employee(conn, employee_id):
+    """Çalışanın bugünden önce biten kapanmış taleplerini arşive taşır (çağıranın işlemi içinde)."""
+    today = to_day(date.today())
+    conn.execute('DELETE FROM temp.archive_batch')
+    conn.execute(f'''INSERT INTO temp.archive_batch (id) SELECT id FROM main.leave_requests
+                     WHERE employee_id = ? AND start_day < ? AND end_day < ?
+                       AND status_id IN (SELECT id FROM main.leave_statuses WHERE code IN ({','.join('?' * len(CLOSED_STATUSES))}))''',
+                 (employee_id, today, today, *CLOSED_STATUSES))
+    return _move_batch(conn)
@@ -0,0 +1,330 @@
+"""
+ASGI ile sunum (gunicorn sync worker'larına seçenek)
+
+    uvicorn asgi:app --port 8000
+    python asgi.py --port 8000                 # aynısı; uvicorn kurulu olmalıdır
+
+HTTP protokolü uvicorn'dadır; bu modül yalnızca Flask uygulamasını ASGI'ye
+uyarlar ve /events akışını change_feed.astream() ile sürdürür.
+
+Bağlantılar olay döngüsünde tutulur: yavaş bir istemci istek gövdesini
+gönderirken ya da yanıtı okurken hiçbir iş parçacığı beklemez; yüzlerce
+keep-alive bağlantı açık kalabilir. Yollar aynı Flask uygulamasıdır; istek
+tamamen alındıktan sonra küçük, ayrılmış bir havuzda (IZIN_ASYNC_THREADS)
+çalışır. Havuzun iş parçacıkları uzun ömürlüdür, site veritabanı
+bağlantılarını (SecureDatabase iş parçacığı başına bağlantı) yeniden
+kullanır; bağlantı sayısı havuz boyutunu geçmez.
+
+Panel gibi akışlı yanıtlar havuzda bütünüyle üretilir ve olay döngüsünde
+tamponlanır; iş parçacığı istemciyi beklemez. Tampon BUFFER_LIMIT'i aşarsa
+(büyük dışa aktarımlar) üretim istemci okuyana kadar durur. /events (SSE)
+akışı havuzu hiç tutmaz: change_feed.astream() AsyncDatabase üzerinden
+yoklar.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+import change_feed
+from app import app as flask_app, site_pool
+from instrumentation import logger
+
+THREADS = int(os.environ.get('IZIN_ASYNC_THREADS', '4'))
+# Boşta keep-alive bağlantının kapatılacağı süre (saniye)
+KEEPALIVE = float(os.environ.get('IZIN_ASYNC_KEEPALIVE', '30'))
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Akışlı yanıtta istemciye gönderilmeyi bekleyen en fazla veri; aşılınca üretim durur
+BUFFER_LIMIT = 1024 * 1024
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """Veritabanı ve görünüm işleri için ayrılmış havuz (süreç başına bir tane)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix='asgi-db')
+            _executor_pid = os.getpid()
+    return _executor
+
+
+class AsyncDatabase:
+    """SecureDatabase'in asenkron yüzü; her çağrı havuzda, o iş parçacığının bağlantısıyla çalışır.
+
+        employee = await AsyncDatabase(handle).get_employee(employee_id)
+    """
+
+    def __init__(self, database, pool=None):
+        self.database = database
+        self.pool = pool or executor()
+
+    def __getattr__(self, name):
+        method = getattr(self.database, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        return call
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, partial(fn, *args, **kwargs))
+
+    async def query(self, fn, *args):
+        """fn(bağlantı, *args): bağlantı alan yardımcılar (ör. change_feed) için."""
+        return await self.run(lambda: fn(self.database.connection(), *args))
+
+
+def build_environ(scope, body):
+    """ASGI kapsamından WSGI ortamı (PEP 3333)."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        # Görünümler ASGI kipinde olduklarını buradan anlar (bkz. /events)
+        'izin.async': True,
+    }
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1').lower(), value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class _Body:
+    """Havuzdaki üretici ile olay döngüsündeki gönderici arasındaki tampon."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.buffered = 0
+        self.aborted = False
+        self.done = False
+        self.condition = threading.Condition()
+
+    async def get(self):
+        item = await self.queue.get()
+        self.done = item is _END
+        return item
+
+    def put(self, item):
+        # Havuz iş parçacığından çağrılır
+        if isinstance(item, bytes):
+            with self.condition:
+                while self.buffered > BUFFER_LIMIT and not self.aborted:
+                    self.condition.wait(1)
+                if self.aborted:
+                    raise ConnectionAbortedError()
+                self.buffered += len(item)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    def sent(self, size):
+        with self.condition:
+            self.buffered -= size
+            self.condition.notify()
+
+    def abort(self):
+        with self.condition:
+            self.aborted = True
+            self.condition.notify()
+
+
+_END = object()
+
+
+def run_wsgi(wsgi_app, environ, body):
+    """Havuzda çalışır: yanıtın başını ('start', durum, başlıklar), sonra parçaları ve _END'i tampona yazar."""
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [int(status.split(' ', 1)[0]), headers]
+
+    def start():
+        if started:
+            body.put(('start', *started))
+            started.clear()
+
+    iterable = None
+    try:
+        iterable = wsgi_app(environ, start_response)
+        for chunk in iterable:
+            start()
+            if chunk:
+                body.put(bytes(chunk))
+        start()
+    except ConnectionAbortedError:
+        pass
+    except Exception as e:
+        logger.exception('ASGI isteği işlenemedi: %s %s', environ['REQUEST_METHOD'], environ['PATH_INFO'])
+        body.put(('error', e))
+    finally:
+        try:
+            if hasattr(iterable, 'close'):
+                # teardown_request burada çalışır (site veritabanı havuza döner)
+                iterable.close()
+        finally:
+            body.put(_END)
+
+
+class Application:
+    """Flask (WSGI) uygulamasını ASGI olarak sunar."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise NotImplementedError(f"Desteklenmeyen ASGI kapsamı: {scope['type']}")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                executor()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                site_pool.close_all()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunks.append(message.get('body', b''))
+            size += len(chunks[-1])
+            if size > MAX_BODY_BYTES:
+                await self.respond(send, 413, b'istek cok buyuk\n')
+                return
+            if not message.get('more_body'):
+                break
+        environ = build_environ(scope, b''.join(chunks))
+        loop = asyncio.get_running_loop()
+        body = _Body(loop)
+        loop.run_in_executor(executor(), run_wsgi, self.wsgi_app, environ, body)
+        try:
+            await self.relay(environ, body, receive, send)
+        except Exception:
+            body.abort()
+            raise
+        finally:
+            # Üretici durdurulduysa kalan parçalar boşaltılır (_END gelene dek)
+            while body.aborted and not body.done:
+                await body.get()
+
+    async def relay(self, environ, body, receive, send):
+        item = await body.get()
+        if item is _END or item[0] == 'error':
+            await self.respond(send, 500, b'sunucu hatasi\n')
+            if item is not _END:
+                await body.get()
+            return
+        _, status, headers = item
+        event_stream = environ.get('izin.event_stream')
+        if event_stream is not None:
+            # Görünüm yetkiyi ve başlangıç kimliğini belirledi; akış olay döngüsünde sürer
+            headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]})
+        while True:
+            item = await body.get()
+            if item is _END:
+                break
+            if isinstance(item, tuple):
+                # Yanıt başladıktan sonra hata: bağlantı yarım yanıtla kapanır
+                raise RuntimeError('yanıt üretilirken hata') from item[1]
+            await send({'type': 'http.response.body', 'body': item, 'more_body': True})
+            body.sent(len(item))
+        if event_stream is not None:
+            await self.events(*event_stream, receive, send)
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def events(self, slug, after, receive, send):
+        """SSE akışı: istemci ayrılana ya da akış ömrü dolana kadar."""
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        handle = site_pool.acquire(slug)
+        stream = change_feed.astream(AsyncDatabase(handle), after)
+        chunk = None
+        try:
+            while True:
+                chunk = asyncio.ensure_future(anext(stream, None))
+                await asyncio.wait((chunk, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    # İstemci ayrıldı; sonraki kalp atışı beklenmez
+                    break
+                if chunk.result() is None:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk.result().encode(), 'more_body': True})
+        finally:
+            disconnected.cancel()
+            if chunk is not None and not chunk.done():
+                chunk.cancel()
+                await asyncio.gather(chunk, return_exceptions=True)
+            await stream.aclose()
+            site_pool.release(slug)
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def respond(send, status, text):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'text/plain; charset=utf-8'), (b'content-length', str(len(text)).encode())]})
+        await send({'type': 'http.response.body', 'body': text})
+
+
+application = app = Application(flask_app.wsgi_app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='İzin Takip Sistemi ASGI sunucusu (uvicorn)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit('uvicorn kurulu değil: pip install "uvicorn>=0.23"')
+    uvicorn.run(application, host=args.host, port=args.port, timeout_keep_alive=int(KEEPALIVE))
+
+
+if __name__ == '__main__':
+    main()
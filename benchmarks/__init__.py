@@ -0,0 +1,8 @@
+"""
+Performans ölçüm araçları
+
+    python -m benchmarks.generate   sentetik veri üretici
+    python -m benchmarks.micro      SecureDatabase metot ölçümleri
+    python -m benchmarks.load       gunicorn'a karşı eşzamanlı yük testi
+    python -m benchmarks.compare    iki sonuç dosyasını karşılaştırır
+"""
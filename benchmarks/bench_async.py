@@ -0,0 +1,175 @@
+"""
+Sync (gunicorn) ve ASGI (uvicorn asgi:app) sunum kiplerinin karşılaştırması
+
+Aynı veritabanına karşı önce gunicorn sync worker'ları, sonra uvicorn ile
+asgi.py başlatılır (uvicorn kurulu olmalıdır). Yüzlerce keep-alive bağlantı açan asenkron istemciler panelleri
+(işveren ve çalışan) ister; --slow oranındaki istemciler mobil bağlantıyı
+taklit eder ve istek başlıklarını --slow-seconds boyunca parça parça
+gönderir. Her kip için hızlı istemcilerin p50/p95/p99 gecikmesi, verim,
+zaman aşımı/hata sayısı ve açılan bağlantı sayısı raporlanır.
+
+Kullanım:
+    python -m benchmarks.generate --db bench.db --employees 2000 --requests 50000
+    python -m benchmarks.bench_async --db bench.db [--connections 300] [--slow 0.1]
+                                     [--seconds 20] [--workers 4] [--async-threads 4]
+"""
+
+import argparse
+import asyncio
+import http.client
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+from benchmarks import common
+from benchmarks.load import free_port, start_gunicorn, wait_for_port
+
+REQUEST_TIMEOUT = 30
+
+
+def start_asgi(db_path, port, threads):
+    env = dict(os.environ, IZIN_DB_PATH=os.path.abspath(db_path), IZIN_ASYNC_THREADS=str(threads))
+    return subprocess.Popen([sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                             '--no-access-log'], cwd=common.ROOT, env=env)
+
+
+def login(port, path, form):
+    """Oturum çerezi (bütün sanal istemciler aynı oturumu paylaşır)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=REQUEST_TIMEOUT)
+    conn.request('POST', path, body=urlencode(form), headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    if response.status != 302:
+        raise RuntimeError(f'{path} girişi başarısız: {response.status}')
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+async def read_response(reader):
+    """(durum, bağlantı açık kalacak mı); gövde okunup atılır."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    headers = {name.strip().lower(): value.strip() for name, value in (line.split(':', 1) for line in lines[1:] if line)}
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def client(port, paths, cookie, slow_seconds, deadline, stats, rnd):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        request = (f'GET {rnd.choice(paths)} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n'
+                   f'Accept-Encoding: gzip\r\nConnection: keep-alive\r\n\r\n').encode()
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                stats['connections'] += 1
+            if slow_seconds:
+                # Mobil istemci: başlıklar yavaş gelir
+                step = max(1, len(request) // 10)
+                for offset in range(0, len(request), step):
+                    writer.write(request[offset:offset + step])
+                    await writer.drain()
+                    await asyncio.sleep(slow_seconds / 10)
+            else:
+                writer.write(request)
+            status, keep_alive = await asyncio.wait_for(read_response(reader), REQUEST_TIMEOUT)
+        except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            stats['errors'][type(e).__name__] = stats['errors'].get(type(e).__name__, 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.1)
+            continue
+        elapsed = time.perf_counter() - started
+        if status == 200:
+            stats['slow' if slow_seconds else 'fast'].append(elapsed)
+        else:
+            stats['errors'][str(status)] = stats['errors'].get(str(status), 0) + 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def drive(port, cookies, connections, slow_share, slow_seconds, seconds):
+    stats = {'fast': [], 'slow': [], 'errors': {}, 'connections': 0}
+    deadline = time.perf_counter() + seconds
+    slow = round(connections * slow_share)
+    tasks = []
+    for i in range(connections):
+        # Her beş istemciden biri işveren paneli ister
+        paths, cookie = (['/employer_panel'], cookies['employer']) if i % 5 == 0 else (['/employee_panel'], cookies['employee'])
+        tasks.append(client(port, paths, cookie, slow_seconds if i < slow else 0, deadline, stats, random.Random(i)))
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    summary = common.summarize(stats['fast'], elapsed)
+    summary['slow_completed'] = len(stats['slow'])
+    summary['connections_opened'] = stats['connections']
+    summary['errors'] = stats['errors']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--connections', type=int, default=300)
+    parser.add_argument('--slow', type=float, default=0.1, help='Yavaş (mobil) istemci oranı')
+    parser.add_argument('--slow-seconds', type=float, default=2)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn sync worker sayısı')
+    parser.add_argument('--async-threads', type=int, default=4, help='IZIN_ASYNC_THREADS')
+    parser.add_argument('--password', default='123456')
+    parser.add_argument('--employer-password', default='admin123')
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    name = conn.execute('SELECT name FROM employees WHERE deleted_at IS NULL ORDER BY id LIMIT 1').fetchone()[0]
+    conn.close()
+
+    results = {}
+    for mode in args.modes.split(','):
+        port = free_port()
+        if mode == 'sync':
+            server = start_gunicorn(args.db, port, args.workers, 1)
+        else:
+            server = start_asgi(args.db, port, args.async_threads)
+        try:
+            wait_for_port('127.0.0.1', port)
+            cookies = {'employer': login(port, '/employer_login', {'password': args.employer_password}),
+                       'employee': login(port, '/employee_login', {'employee_name': name, 'password': args.password})}
+            results[mode] = asyncio.run(drive(port, cookies, args.connections, args.slow, args.slow_seconds, args.seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+    common.print_table({mode: {key: value for key, value in summary.items() if key != 'errors'}
+                        for mode, summary in results.items()})
+    for mode, summary in results.items():
+        if summary['errors']:
+            print(f'{mode} hatalar:', summary['errors'])
+    config = {key: value for key, value in vars(args).items() if key not in ('password', 'employer_password', 'output')}
+    print('Kaydedildi:', common.save_results('async', {'config': config, 'modes': results}, args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+/employer_panel için istek/saniye ölçümü.
+
+Geçici bir dizinde örnek veritabanı oluşturur, işveren olarak giriş yapar ve
+paneli belirtilen süre boyunca birden fazla iş parçacığından ister.
+
+Kullanım:
+    python benchmarks/bench_employer_panel.py [--employees 200] [--requests 2000]
+                                              [--threads 4] [--seconds 10]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(db_path, employees, requests):
+    conn = sqlite3.connect(db_path)
+    rnd = random.Random(42)
+    conn.executemany('INSERT OR IGNORE INTO employees (name, password_hash, start_date, annual_leave_days) VALUES (?, ?, ?, ?)',
+                     [(f'Çalışan {i}', 'x', '2020-01-01', 20) for i in range(employees)])
+    ids = [row[0] for row in conn.execute('SELECT id FROM employees')]
+    rows = []
+    for _ in range(requests):
+        # 2024-03-01 = gün 19783 (1970'ten beri)
+        day = 19782 + rnd.randint(1, 28)
+        rows.append((rnd.choice(ids), 1, day, day, '', rnd.choice([1, 2, 3])))
+    conn.executemany('INSERT INTO leave_requests (employee_id, leave_type_id, start_day, end_day, reason, status_id) VALUES (?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='izin-bench-')
+    os.chdir(workdir)
+    os.environ['IZIN_DB_PATH'] = os.path.join(workdir, 'secure_izin.db')
+    sys.path.insert(0, ROOT)
+    import app as app_module
+    if hasattr(app_module.db, 'bootstrap'):
+        app_module.db.bootstrap()
+
+    seed(app_module.db.db_path, args.employees, args.requests)
+
+    counts = [0] * args.threads
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(index):
+        client = app_module.app.test_client()
+        client.post('/employer_login', data={'password': 'admin123'})
+        while time.perf_counter() < deadline:
+            response = client.get('/employer_panel')
+            assert response.status_code == 200, response.status_code
+            response.get_data()
+            counts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(counts)
+    print(f'{total} istek / {elapsed:.2f} sn = {total / elapsed:.1f} istek/sn '
+          f'({args.threads} iş parçacığı, {args.employees} çalışan, {args.requests} izin talebi)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Giriş yolunun gecikme ve işlemci maliyeti
+
+Önce tek iş parçacığında özet doğrulamasının maliyetini ölçer (eski tuzsuz
+SHA-256, scrypt, PBKDF2). Ardından geçici bir veritabanında çalışanlar
+oluşturur ve /employee_login'e birden çok iş parçacığından doğru şifreyle
+giriş yapar: bir kez özet havuzu (HashingExecutor) ile, bir kez de özetin
+istek iş parçacığında hesaplandığı durumu taklit ederek. Her kipte p50/p95/p99
+gecikme, giriş başına işlemci süresi ve durum kodları (302 başarılı, 503 havuz
+dolu) raporlanır.
+
+Kullanım:
+    python -m benchmarks.bench_login [--threads 16] [--seconds 10]
+                                     [--employees 200] [--hash-workers 2] [--hash-queue 16]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from benchmarks import common
+
+
+def cpu_cost(fn, iterations):
+    """Çağrı başına ortalama işlemci süresi (ms)."""
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return round((time.process_time() - started) * 1000 / iterations, 3)
+
+
+def seed(db_path, employees, password_hash):
+    conn = sqlite3.connect(db_path)
+    conn.executemany('INSERT OR IGNORE INTO employees (name, password_hash, start_date) VALUES (?, ?, ?)',
+                     [(f'Çalışan {i}', password_hash, '2020-01-01') for i in range(employees)])
+    conn.commit()
+    conn.close()
+
+
+class InlineHasher:
+    """Özeti istek iş parçacığında hesaplar (havuz öncesi davranış)."""
+    stats = {'rejected': 0}
+
+    def run(self, fn, *args):
+        return fn(*args)
+
+    def pending(self):
+        return 0
+
+
+def load(app_module, names, threads, seconds):
+    durations = []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = app_module.app.test_client()
+        rnd = random.Random(index)
+        local, codes = [], Counter()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            # Her istek ayrı IP'den: başarılı girişler zaten sınıra takılmaz
+            response = client.post('/employee_login', data={'employee_name': rnd.choice(names), 'password': 'bench'},
+                                   environ_base={'REMOTE_ADDR': f'10.0.{index}.1'})
+            local.append(time.perf_counter() - started)
+            codes[response.status_code] += 1
+            client.get('/logout')
+        with lock:
+            durations.extend(local)
+            statuses.update(codes)
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    summary = common.summarize(durations, elapsed)
+    summary['cpu_ms_per_login'] = round((time.process_time() - cpu_started) * 1000 / max(1, len(durations)), 3)
+    summary['statuses'] = {str(code): count for code, count in sorted(statuses.items())}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--hash-workers', type=int, default=2)
+    parser.add_argument('--hash-queue', type=int, default=16)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='izin-login-')
+    os.environ['IZIN_DB_PATH'] = os.path.join(workdir, 'secure_izin.db')
+    import app as app_module
+    import passwords
+    app_module.db.bootstrap()
+
+    salt = os.urandom(16)
+    legacy = hashlib.sha256(b'bench').hexdigest()
+    results = {'cpu_ms_per_hash': {
+        'sha256_legacy': cpu_cost(lambda: passwords.verify_password('bench', legacy), 2000),
+        'scrypt': cpu_cost(lambda: passwords._scrypt('bench', salt, passwords.SCRYPT_N, passwords.SCRYPT_R, passwords.SCRYPT_P), 20),
+        'pbkdf2_sha256': cpu_cost(lambda: hashlib.pbkdf2_hmac('sha256', b'bench', salt, passwords.PBKDF2_ITERATIONS), 5),
+    }}
+
+    names = [f'Çalışan {i}' for i in range(args.employees)]
+    seed(app_module.db.db_path, args.employees, passwords.hash_password('bench'))
+    hasher = passwords.HashingExecutor(args.hash_workers, args.hash_queue)
+    for mode, implementation in (('executor', hasher), ('inline', InlineHasher())):
+        app_module.hasher = implementation
+        results[mode] = load(app_module, names, args.threads, args.seconds)
+
+    print('Özet başına işlemci (ms):', results['cpu_ms_per_hash'])
+    common.print_table({mode: results[mode] for mode in ('executor', 'inline')})
+    for mode in ('executor', 'inline'):
+        print(f"{mode}: giriş başına {results[mode]['cpu_ms_per_login']} ms işlemci, durumlar {results[mode]['statuses']}")
+    print('Sonuçlar:', common.save_results('login', dict(results, threads=args.threads, hash_workers=args.hash_workers,
+                                                          hash_queue=args.hash_queue), args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Ada dayalı (göç 9) ve tamsayı anahtarlı (göç 10) şemanın karşılaştırması
+
+Geçici bir dizinde eski şemayla sentetik veri üretir, dosyayı kopyalayıp
+kopyayı son şemaya taşır; iki dosyada tablo/indeks boyutlarını (dbstat),
+çalışanlarla birleştirme ve çalışan başına okuma/silme sürelerini ölçer.
+Silmeler geri alınır (ROLLBACK), her ölçüm aynı veri üzerinde çalışır.
+
+Kullanım:
+    python -m benchmarks.bench_schema [--employees 5000] [--requests 300000]
+                                      [--iterations 200] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks import common
+import archive
+import migrations
+from benchmarks.generate import LEAVE_TYPES, employee_names
+
+
+def connect(path):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA foreign_keys = ON')
+    archive.attach(conn, archive.default_path(path))
+    return conn
+
+
+def seed_legacy(conn, rnd, employees, requests):
+    names = list(employee_names(employees))
+    types, weights = zip(*LEAVE_TYPES)
+    today = date.today()
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO employees (name, password_hash, start_date, annual_leave_days) VALUES (?, ?, ?, ?)',
+                     [(name, 'x', '2020-01-01', 20) for name in names])
+    rows = []
+    for _ in range(requests):
+        start = today - timedelta(days=rnd.randrange(365 * 5))
+        end = start + timedelta(days=rnd.choice((0, 1, 2, 4, 9)))
+        rows.append((rnd.choice(names), rnd.choices(types, weights)[0], start.isoformat(), end.isoformat(), '',
+                     rnd.choice(('pending', 'approved', 'approved', 'rejected')),
+                     (start - timedelta(days=rnd.randint(1, 45))).isoformat() + ' 09:00:00'))
+    conn.executemany('INSERT INTO leave_requests (employee_name, leave_type, start_date, end_date, reason, status, request_date) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.execute('COMMIT')
+    conn.execute('ANALYZE')
+
+
+def sizes(conn):
+    """{tablo: (tablo baytı, indeks baytı)} ve dosyanın toplam baytı."""
+    indexes = {}
+    for table, index in conn.execute("SELECT tbl_name, name FROM sqlite_master WHERE type = 'index'"):
+        indexes[index] = table
+    result = {}
+    for name, size in conn.execute("SELECT name, SUM(pgsize) FROM dbstat('main') GROUP BY name"):
+        table = indexes.get(name, name)
+        data, index = result.get(table, (0, 0))
+        result[table] = (data, index + size) if name in indexes else (data + size, index)
+    total = conn.execute('SELECT page_count * page_size FROM pragma_page_count(), pragma_page_size()').fetchone()[0]
+    return result, total
+
+
+def timed(fn, iterations):
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return common.summarize(durations)
+
+
+def rolled_back(conn, sql, params):
+    conn.execute('BEGIN')
+    conn.execute(sql, params)
+    conn.execute('ROLLBACK')
+
+
+def measure(conn, keys, rnd, iterations, normalized):
+    if normalized:
+        join = 'SELECT COUNT(*), SUM(e.annual_leave_days) FROM leave_requests l JOIN employees e ON e.id = l.employee_id'
+        lookup = 'SELECT start_day, end_day, status_id FROM leave_requests WHERE employee_id = ? ORDER BY request_date DESC'
+        delete = 'DELETE FROM leave_requests WHERE employee_id = ?'
+    else:
+        join = 'SELECT COUNT(*), SUM(e.annual_leave_days) FROM leave_requests l JOIN employees e ON e.name = l.employee_name'
+        lookup = 'SELECT start_date, end_date, status FROM leave_requests WHERE employee_name = ? ORDER BY request_date DESC'
+        delete = 'DELETE FROM leave_requests WHERE employee_name = ?'
+    results = {
+        'join_all': timed(lambda: conn.execute(join).fetchone(), max(3, iterations // 50)),
+        'employee_leaves': timed(lambda: conn.execute(lookup, (rnd.choice(keys),)).fetchall(), iterations),
+        'delete_employee_leaves': timed(lambda: rolled_back(conn, delete, (rnd.choice(keys),)), iterations),
+    }
+    if normalized:
+        # Çalışan satırı silinince talepler, defter ve özetler ON DELETE CASCADE ile gider
+        results['delete_employee_cascade'] = timed(
+            lambda: rolled_back(conn, 'DELETE FROM employees WHERE id = ?', (rnd.choice(keys),)), iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=300000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='izin-schema-')
+    legacy_path = os.path.join(workdir, 'legacy.db')
+    normalized_path = os.path.join(workdir, 'normalized.db')
+    try:
+        conn = connect(legacy_path)
+        migrations.migrate(conn, target=9)
+        seed_legacy(conn, random.Random(args.seed), args.employees, args.requests)
+        conn.close()
+        shutil.copy(legacy_path, normalized_path)
+
+        normalized = connect(normalized_path)
+        started = time.perf_counter()
+        migrations.migrate(normalized)
+        migrate_seconds = round(time.perf_counter() - started, 2)
+        normalized.execute('VACUUM')
+        legacy = connect(legacy_path)
+        legacy.execute('VACUUM')
+
+        results = {'employees': args.employees, 'requests': args.requests, 'migrate_seconds': migrate_seconds}
+        for label, conn, is_normalized in (('legacy', legacy, False), ('normalized', normalized, True)):
+            tables, total = sizes(conn)
+            keys = [row[0] for row in conn.execute(f"SELECT {'id' if is_normalized else 'name'} FROM employees")]
+            results[label] = {
+                'file_bytes': total,
+                'leave_requests_bytes': tables['leave_requests'][0],
+                'leave_requests_index_bytes': tables['leave_requests'][1],
+                'timings': measure(conn, keys, random.Random(args.seed), args.iterations, is_normalized),
+            }
+            conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.employees} çalışan, {args.requests} talep; göç 10: {migrate_seconds} sn")
+    print(f"{'':28}{'ada dayalı':>14}{'kimlik':>14}")
+    for key in ('file_bytes', 'leave_requests_bytes', 'leave_requests_index_bytes'):
+        print(f"{key:28}{results['legacy'][key]:>14,}{results['normalized'][key]:>14,}")
+    for name, summary in results['normalized']['timings'].items():
+        before = results['legacy']['timings'].get(name, {}).get('p50_ms')
+        print(f"{name + ' p50 ms':28}{before if before is not None else '-':>14}{summary['p50_ms']:>14}")
+    print('Sonuçlar:', common.save_results('schema', results, args.output))
+
+
+if __name__ == '__main__':
+    main()
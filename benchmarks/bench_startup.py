@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+app.py içe aktarma (worker açılış) süresi ölçümü.
+
+Geçici bir dizinde veritabanını bir kez kurar, ardından `import app`
+komutunu ayrı süreçlerde tekrar tekrar çalıştırıp toplam süreyi ve app
+modülünün kendi payını (-X importtime) raporlar.
+
+Kullanım:
+    python benchmarks/bench_startup.py [--runs 20] [--employees 5000]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT = f'import sys; sys.path.insert(0, {ROOT!r}); import app'
+BOOTSTRAP = IMPORT + "\nif hasattr(app.db, 'bootstrap'): app.db.bootstrap()"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--employees', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='izin-startup-')
+    db_path = os.path.join(workdir, 'secure_izin.db')
+    env = dict(os.environ, IZIN_DB_PATH=db_path)
+    subprocess.run([sys.executable, '-c', BOOTSTRAP], cwd=workdir, env=env, check=True, capture_output=True)
+    conn = sqlite3.connect(db_path)
+    conn.executemany('INSERT OR IGNORE INTO employees (name, password_hash, start_date) VALUES (?, ?, ?)',
+                     [(f'Çalışan {i}', 'x', '2020-01-01') for i in range(args.employees)])
+    conn.commit()
+    conn.close()
+
+    wall, own = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORT],
+                                cwd=workdir, env=env, check=True, capture_output=True, text=True)
+        wall.append((time.perf_counter() - started) * 1000)
+        # "import time: self | cumulative | app" satırındaki modülün kendi süresi
+        match = re.search(r'import time:\s+(\d+) \|\s+\d+ \| app$', result.stderr, re.MULTILINE)
+        if match:
+            own.append(int(match.group(1)) / 1000)
+
+    print(f'süreç (import app): medyan {statistics.median(wall):.1f} ms, en iyi {min(wall):.1f} ms ({args.runs} çalıştırma)')
+    if own:
+        print(f'app modülünün kendi süresi: medyan {statistics.median(own):.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Ölçüm betiklerinin ortak yardımcıları."""
+
+import json
+import os
+import platform
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(durations, elapsed=None):
+    """Süre listesinden (saniye) ms cinsinden özet çıkarır."""
+    values = sorted(durations)
+    summary = {
+        'count': len(values),
+        'p50_ms': _ms(percentile(values, 0.50)),
+        'p95_ms': _ms(percentile(values, 0.95)),
+        'p99_ms': _ms(percentile(values, 0.99)),
+        'max_ms': _ms(values[-1] if values else None),
+    }
+    if elapsed:
+        summary['throughput_per_s'] = round(len(values) / elapsed, 1)
+    return summary
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def save_results(kind, results, output=None):
+    """Sonuçları ortam bilgisiyle birlikte JSON olarak kaydeder, yolu döndürür."""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{kind}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    document = {
+        'kind': kind,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def print_table(rows):
+    """{ad: özet} sözlüğünü hizalı bir tablo olarak yazdırır."""
+    columns = ['count', 'throughput_per_s', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+    width = max([len(name) for name in rows] + [10])
+    print(f"{'':{width}}  " + '  '.join(f'{c:>16}' for c in columns))
+    for name, summary in rows.items():
+        print(f'{name:{width}}  ' + '  '.join(f"{'' if summary.get(c) is None else summary[c]:>16}" for c in columns))
+
+
+class Timer:
+    def __init__(self):
+        self.durations = []
+
+    def __call__(self, func, *args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.durations.append(time.perf_counter() - started)
+        return result
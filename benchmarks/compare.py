@@ -0,0 +1,42 @@
+"""
+İki ölçüm sonucunu karşılaştırır.
+
+Kullanım:
+    python -m benchmarks.compare eski.json yeni.json [--metric p95_ms]
+"""
+
+import argparse
+import json
+
+
+def rows(document):
+    results = document['results']
+    return results.get('methods') or results.get('endpoints') or {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--metric', default='p95_ms')
+    args = parser.parse_args()
+
+    with open(args.old, encoding='utf-8') as f:
+        old = rows(json.load(f))
+    with open(args.new, encoding='utf-8') as f:
+        new = rows(json.load(f))
+
+    width = max([len(name) for name in new] + [10])
+    print(f"{'':{width}}  {'eski':>12}  {'yeni':>12}  {'değişim':>9}")
+    for name in new:
+        before = old.get(name, {}).get(args.metric)
+        after = new[name].get(args.metric)
+        if before and after is not None:
+            change = f'{(after - before) / before * 100:+.1f}%'
+        else:
+            change = '-'
+        print(f"{name:{width}}  {before if before is not None else '-':>12}  {after if after is not None else '-':>12}  {change:>9}")
+
+
+if __name__ == '__main__':
+    main()
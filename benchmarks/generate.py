@@ -0,0 +1,107 @@
+"""
+Sentetik veri üretici
+
+Tohumlu (tekrarlanabilir) rastgelelikle gerçekçi hacimde çalışan ve izin
+talebi üretir: işe giriş tarihleri geçmiş yıllara yayılır, talepler
+yıllara dağılır, geçmiş talepler çoğunlukla sonuçlanmış, yakın tarihli
+olanlar bekler. Bütün çalışanların şifresi --password ile verilir.
+
+Kullanım:
+    python -m benchmarks.generate --db secure_izin.db [--employees 10000]
+                                  [--requests 1000000] [--years 8] [--seed 42]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks import common  # noqa: F401  (sys.path ayarı)
+import leave_ledger
+import leave_summary
+from app import STATUS_IDS, SecureDatabase, hash_password
+from work_calendar import to_day
+
+FIRST_NAMES = ['Ahmet', 'Mehmet', 'Mustafa', 'Ali', 'Hüseyin', 'Hasan', 'İbrahim', 'İsmail', 'Osman', 'Yusuf',
+               'Ayşe', 'Fatma', 'Emine', 'Hatice', 'Zeynep', 'Elif', 'Şule', 'Gül', 'Özlem', 'Çiğdem']
+LAST_NAMES = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın', 'Özdemir',
+              'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek']
+LEAVE_TYPES = [('Yıllık İzin', 70), ('Hastalık İzni', 20), ('Mazeret İzni', 10)]
+BATCH = 50000
+
+
+def employee_names(count):
+    names = [f'{first} {last}' for first in FIRST_NAMES for last in LAST_NAMES]
+    for i in range(count):
+        base = names[i % len(names)]
+        yield base if i < len(names) else f'{base} {i // len(names) + 1}'
+
+
+def leave_rows(rnd, employee_ids, type_ids, count, years, today):
+    types, weights = zip(*((type_ids[name], weight) for name, weight in LEAVE_TYPES))
+    first_day = today - timedelta(days=365 * years)
+    span = (today - first_day).days + 60
+    for _ in range(count):
+        start = first_day + timedelta(days=rnd.randrange(span))
+        end = start + timedelta(days=rnd.choice((0, 0, 1, 2, 4, 4, 9, 13)))
+        requested = start - timedelta(days=rnd.randint(1, 45), seconds=rnd.randrange(86400))
+        if start > today:
+            status = rnd.choice(('pending', 'pending', 'approved'))
+        else:
+            status = 'approved' if rnd.random() < 0.85 else 'rejected'
+        yield (rnd.choice(employee_ids), rnd.choices(types, weights)[0], to_day(start), to_day(end), '',
+               STATUS_IDS[status], requested.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='secure_izin.db')
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=1000000)
+    parser.add_argument('--years', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--password', default='123456')
+    parser.add_argument('--force', action='store_true', help='Dolu veritabanına yine de ekle')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    today = date.today()
+    db = SecureDatabase(args.db)
+    db.bootstrap()
+    conn = db.connection()
+    if conn.execute('SELECT 1 FROM leave_requests LIMIT 1').fetchone() and not args.force:
+        parser.error(f'{args.db} boş değil (--force ile yine de eklenir; bakiye defteri yeniden kurulmaz)')
+
+    started = time.perf_counter()
+    password_hash = hash_password(args.password)
+    names = list(employee_names(args.employees))
+    with db.transaction():
+        conn.executemany('INSERT OR IGNORE INTO employees (name, password_hash, start_date, annual_leave_days) VALUES (?, ?, ?, ?)',
+                         [(name, password_hash, (today - timedelta(days=rnd.randrange(365 * 20))).isoformat(),
+                           rnd.choice((14, 14, 20, 26))) for name in names])
+    print(f'{len(names)} çalışan eklendi ({time.perf_counter() - started:.1f} sn)')
+
+    employee_ids = [row[0] for row in conn.execute('SELECT id FROM employees WHERE deleted_at IS NULL ORDER BY id')]
+    type_ids = dict(conn.execute('SELECT name, id FROM leave_types'))
+    rows = leave_rows(rnd, employee_ids, type_ids, args.requests, args.years, today)
+    inserted = 0
+    while inserted < args.requests:
+        batch = [row for _, row in zip(range(BATCH), rows)]
+        with db.transaction():
+            conn.executemany('INSERT INTO leave_requests (employee_id, leave_type_id, start_day, end_day, reason, status_id, request_date) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+        inserted += len(batch)
+        print(f'\r{inserted}/{args.requests} izin talebi', end='', flush=True)
+    print(f' ({time.perf_counter() - started:.1f} sn)')
+
+    with db.transaction():
+        if not args.force:
+            leave_ledger.backfill(conn)
+        leave_summary.rebuild(conn)
+    conn.execute('ANALYZE')
+    db.close()
+    print(f'Tamamlandı: {args.db} ({time.perf_counter() - started:.1f} sn)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Uçtan uca yük testi
+
+Yerel bir gunicorn başlatır (ya da --url ile çalışan bir sunucuya bağlanır)
+ve eşzamanlı sanal kullanıcılarla şu akışları sürer:
+
+    çalışan: GET /employee_login, POST /employee_login, GET /employee_panel
+    işveren: GET /employer_panel, POST /update_leave_status
+
+Her uç nokta için verim ve p50/p95/p99 gecikmeyi raporlar, sonucu JSON
+olarak kaydeder.
+
+Kullanım:
+    python -m benchmarks.load --db bench.db [--clients 32] [--seconds 30]
+                              [--workers 4] [--threads 1] [--employer-share 0.2]
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks import common
+
+
+class Client:
+    """Çerezleri tutan, bağlantıyı açık tutan basit HTTP istemcisi."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.cookie = None
+        self.conn = None
+
+    def request(self, method, path, form=None):
+        body = urlencode(form, doseq=True) if form is not None else None
+        headers = {'Connection': 'keep-alive'}
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Sunucu (ör. sync worker) bağlantıyı kapattıysa bir kez yeniden dene
+                self.conn.close()
+                self.conn = None
+                if attempt == 2:
+                    raise
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        if response.getheader('Connection', '').lower() == 'close':
+            self.conn.close()
+            self.conn = None
+        return response.status
+
+
+def wait_for_port(host, port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'{host}:{port} açılmadı')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(db_path, port, workers, threads):
+    env = dict(os.environ, IZIN_DB_PATH=os.path.abspath(db_path))
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '--threads', str(threads),
+               '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    return subprocess.Popen(command, cwd=common.ROOT, env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--url', help='Çalışan sunucu (verilmezse gunicorn başlatılır)')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--employer-share', type=float, default=0.2)
+    parser.add_argument('--password', default='123456')
+    parser.add_argument('--employer-password', default='admin123')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    names = [row[0] for row in conn.execute('SELECT name FROM employees WHERE deleted_at IS NULL ORDER BY random() LIMIT 500')]
+    pending = [row[0] for row in conn.execute("SELECT l.id FROM leave_requests l JOIN leave_statuses s ON s.id = l.status_id "
+                                              "WHERE s.code = 'pending' LIMIT 5000")]
+    conn.close()
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        server = start_gunicorn(args.db, port, args.workers, args.threads)
+    try:
+        wait_for_port(host, port)
+        durations = {}
+        errors = {}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+
+        def timed(client, name, method, path, form=None, expected=(200, 302)):
+            started = time.perf_counter()
+            try:
+                status = client.request(method, path, form)
+            except (http.client.HTTPException, OSError):
+                status = None
+            elapsed = time.perf_counter() - started
+            with lock:
+                if status in expected:
+                    durations.setdefault(name, []).append(elapsed)
+                else:
+                    errors[name] = errors.get(name, 0) + 1
+
+        def employee(rnd):
+            client = Client(host, port)
+            while time.perf_counter() < deadline:
+                timed(client, 'GET /employee_login', 'GET', '/employee_login')
+                timed(client, 'POST /employee_login', 'POST', '/employee_login',
+                      {'employee_name': rnd.choice(names), 'password': args.password})
+                for _ in range(3):
+                    timed(client, 'GET /employee_panel', 'GET', '/employee_panel')
+
+        def employer(rnd):
+            client = Client(host, port)
+            client.request('POST', '/employer_login', {'password': args.employer_password})
+            while time.perf_counter() < deadline:
+                timed(client, 'GET /employer_panel', 'GET', '/employer_panel')
+                if pending:
+                    timed(client, 'POST /update_leave_status', 'POST', '/update_leave_status',
+                          {'leave_id': rnd.choice(pending), 'status': rnd.choice(('approved', 'pending'))})
+
+        employers = max(1, round(args.clients * args.employer_share)) if args.employer_share else 0
+        threads = [threading.Thread(target=employer if i < employers else employee, args=(random.Random(args.seed + i),))
+                   for i in range(args.clients)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {name: common.summarize(values, elapsed) for name, values in sorted(durations.items())}
+    results['TOPLAM'] = common.summarize([d for values in durations.values() for d in values], elapsed)
+    for name, count in errors.items():
+        results.setdefault(name, {})['errors'] = count
+    common.print_table(results)
+    if errors:
+        print('Hatalar:', errors)
+    config = {key: value for key, value in vars(args).items() if key not in ('password', 'employer_password', 'output')}
+    print('Kaydedildi:', common.save_results('load', {'config': config, 'endpoints': results}, args.output))
+
+
+if __name__ == '__main__':
+    main()
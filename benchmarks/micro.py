@@ -0,0 +1,103 @@
+"""
+SecureDatabase metot ölçümleri
+
+Üretilmiş bir veritabanı üzerinde her metodu tekrar tekrar çağırır ve çağrı
+başına p50/p95/p99 süreleri ile saniyedeki çağrı sayısını raporlar. Yazan
+metotlar da ölçüldüğü için kopya bir veritabanı kullanılması önerilir.
+
+Kullanım:
+    python -m benchmarks.micro --db bench.db [--iterations 500] [--only get_employee]
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks import common
+from app import STATUS_IDS, SecureDatabase
+
+
+def cases(db, rnd, password):
+    conn = db.connection()
+    employees = conn.execute('SELECT id, name FROM employees WHERE deleted_at IS NULL ORDER BY random() LIMIT 200').fetchall()
+    ids = [employee_id for employee_id, _ in employees]
+    names = [name for _, name in employees]
+    pending = [row[0] for row in conn.execute('SELECT id FROM leave_requests WHERE status_id = ? LIMIT 2000', (STATUS_IDS['pending'],))]
+    latest = conn.execute('SELECT MAX(request_date) FROM leave_requests').fetchone()[0] or '2024-01-01'
+    year = int(latest[:4])
+    _, deep_cursor = db.get_leave_requests_page(status=None, limit=5000)
+    created = []
+
+    def day():
+        return f'{rnd.randint(year - 3, year)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}'
+
+    def one_day_range():
+        single = day()
+        db.get_leaves_in_range(single, single)
+
+    def add_employee():
+        name = f'bench-{time.perf_counter_ns()}'
+        db.add_employee(name, password)
+        created.append(conn.execute('SELECT id FROM employees WHERE name = ?', (name,)).fetchone()[0])
+
+    def delete_employee():
+        if created:
+            db.delete_employee(created.pop())
+
+    def toggle_status():
+        leave_id = rnd.choice(pending)
+        db.update_leave_status(leave_id, 'approved')
+        db.update_leave_status(leave_id, 'pending')
+
+    return {
+        'verify_employer': lambda: db.verify_employer('admin123'),
+        'verify_employee': lambda: db.verify_employee(rnd.choice(names), password),
+        'get_employee': lambda: db.get_employee(rnd.choice(ids)),
+        'get_all_employees': db.get_all_employees,
+        'count_employees': db.count_employees,
+        'get_employees_page': lambda: db.get_employees_page(rnd.choice(names)),
+        'get_employee_leaves': lambda: db.get_employee_leaves(rnd.choice(ids)),
+        'get_leave_requests_page(pending)': lambda: db.get_leave_requests_page(),
+        'get_leave_requests_page(all, deep)': lambda: db.get_leave_requests_page(status=None, cursor=deep_cursor),
+        'get_leave_requests_page(employee)': lambda: db.get_leave_requests_page(status=None, employee_name=rnd.choice(names)),
+        'get_leave_requests_page(range)': lambda: db.get_leave_requests_page(status=None, date_from=day(), date_to=day()),
+        'get_leaves_in_range(1 day)': one_day_range,
+        'find_leave_conflicts': lambda: db.find_leave_conflicts(rnd.choice(pending)),
+        'add_leave_request': lambda: db.add_leave_request(rnd.choice(ids), 'Mazeret İzni', day(), day(), 'bench'),
+        'update_leave_status(approve+revert)': toggle_status,
+        'update_leave_statuses(20)': lambda: db.update_leave_statuses(rnd.sample(pending, min(20, len(pending))), 'pending'),
+        'add_employee': add_employee,
+        'delete_employee': delete_employee,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--password', default='123456')
+    parser.add_argument('--only', action='append', help='Yalnızca bu ölçümleri çalıştır (tekrarlanabilir)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    db = SecureDatabase(args.db)
+    results = {}
+    for name, func in cases(db, rnd, args.password).items():
+        if args.only and name not in args.only:
+            continue
+        func()  # ısınma
+        timer = common.Timer()
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            timer(func)
+        results[name] = common.summarize(timer.durations, time.perf_counter() - started)
+
+    common.print_table(results)
+    print('Kaydedildi:', common.save_results('micro', {'db': args.db, 'iterations': args.iterations, 'methods': results},
+                                             args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Toplu çalışan içe aktarma (CSV / JSON)
+
+Dosya satır satır okunur ve partiler halinde işlenir: her partinin şifreleri
+önce, yazma kilidi alınmadan bir süreç havuzunda özetlenir; ardından parti
+kısa bir işlemle executemany ile eklenir. Böylece büyük bir dosya, izin
+onaylarını ve kuyruk boşaltmayı içe aktarma boyunca bekletmez. Hatalı ya da
+zaten kayıtlı satırlar raporlanır; içe aktarmanın geri kalanı etkilenmez.
+Yarıda kesilen bir içe aktarmada o ana kadarki partiler eklenmiş kalır;
+dosya yeniden verildiğinde bunlar tekrar olarak raporlanır.
+
+CSV başlıkları: name, password, annual_leave_days (isteğe bağlı; verilirse elle
+girilmiş yıllık hak olarak saklanır, boşsa hak kıdemden hesaplanır), start_date
+(isteğe bağlı, YYYY-AA-GG). JSON için aynı anahtarlara sahip
+nesnelerden oluşan bir dizi ya da her satırda bir nesne (JSON Lines).
+"""
+
+import csv
+import json
+import time
+from datetime import date, datetime
+from itertools import islice
+
+from passwords import HashingBusy
+
+BATCH_SIZE = 500
+# Bu sayıdan az satırda süreç havuzu açmak kazançtan çok maliyet getirir
+POOL_THRESHOLD = 200
+
+
+def detect_format(filename):
+    return 'json' if filename.lower().endswith(('.json', '.jsonl', '.ndjson')) else 'csv'
+
+
+def _iter_json(stream):
+    first = ''
+    while not first:
+        first = stream.read(1)
+        if not first:
+            return
+        if first.isspace():
+            first = ''
+    if first == '[':
+        # Tek bir JSON dizisi akış halinde ayrıştırılamaz; dizi bir kerede okunur
+        for number, item in enumerate(json.loads(first + stream.read()), start=1):
+            yield number, item
+        return
+    for number, line in enumerate(_prepend(first, stream), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, e
+
+
+def _prepend(first, stream):
+    line = stream.readline()
+    yield first + line
+    yield from stream
+
+
+def iter_records(stream, fmt):
+    """(satır_no, kayıt) çiftleri üretir; kayıt ayrıştırılamadıysa bir hata nesnesidir."""
+    if fmt == 'json':
+        yield from _iter_json(stream)
+    else:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def validate(record):
+    """(ad, şifre, yıllık_izin, başlangıç) ya da hata mesajı döndürür."""
+    if isinstance(record, Exception):
+        return f'ayrıştırılamadı: {record}'
+    if not isinstance(record, dict):
+        return 'kayıt bir nesne değil'
+    name = str(record.get('name') or '').strip()
+    password = str(record.get('password') or '')
+    if not name:
+        return 'ad boş'
+    if not password:
+        return 'şifre boş'
+    try:
+        annual_leave = record.get('annual_leave_days')
+        annual_leave = None if annual_leave in (None, '') else int(annual_leave)
+        if annual_leave is not None and annual_leave < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return 'annual_leave_days geçersiz'
+    start_date = str(record.get('start_date') or '').strip() or datetime.now().strftime('%Y-%m-%d')
+    try:
+        date.fromisoformat(start_date)
+    except ValueError:
+        return 'start_date geçersiz'
+    return name, password, annual_leave, start_date
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _existing_names(conn, names):
+    placeholders = ','.join('?' * len(names))
+    return {row[0] for row in conn.execute(f'SELECT name FROM employees WHERE name IN ({placeholders})', names)}
+
+
+def import_employees(db, stream, fmt, hash_func, batch_size=BATCH_SIZE, workers=None, executor=None):
+    """Kayıtları içe aktarır ve bir rapor sözlüğü döndürür.
+
+    Rapor: inserted (sayı), duplicates [(satır, ad)], errors [(satır, mesaj)].
+    Eklenen varsa izin hakları hemen yeniden hesaplanır. executor
+    (passwords.HashingExecutor) verilirse süreç havuzu açılmayan küçük
+    partilerin özetleri çağıranın iş parçacığında değil o sınırlı havuzda
+    hesaplanır (web istekleri); havuz doluysa partinin satırları hata olarak
+    raporlanır.
+    """
+    report = {'inserted': 0, 'duplicates': [], 'errors': [], 'seconds': 0.0}
+    started = time.perf_counter()
+    seen = set()
+    pool = None
+    try:
+        for batch in _batches(iter_records(stream, fmt), batch_size):
+            valid = []
+            for number, record in batch:
+                result = validate(record)
+                if isinstance(result, str):
+                    report['errors'].append((number, result))
+                elif result[0] in seen:
+                    report['duplicates'].append((number, result[0]))
+                else:
+                    seen.add(result[0])
+                    valid.append((number, result))
+            if not valid:
+                continue
+
+            existing = _existing_names(db.connection(), [r[0] for _, r in valid])
+            new = []
+            for number, result in valid:
+                if result[0] in existing:
+                    report['duplicates'].append((number, result[0]))
+                else:
+                    new.append((number, result))
+            if not new:
+                continue
+
+            passwords = [r[1] for _, r in new]
+            if pool is None and len(passwords) >= POOL_THRESHOLD:
+                # multiprocessing'in içe aktarma maliyeti yalnızca gerektiğinde ödenir
+                from concurrent.futures import ProcessPoolExecutor
+                pool = ProcessPoolExecutor(max_workers=workers)
+            if pool is not None:
+                hashes = list(pool.map(hash_func, passwords, chunksize=max(1, len(passwords) // 32)))
+            elif executor is not None:
+                try:
+                    hashes = [executor.run(hash_func, p) for p in passwords]
+                except HashingBusy:
+                    report['errors'].extend((number, 'sistem yoğun, satır eklenmedi; tekrar deneyin') for number, _ in new)
+                    continue
+            else:
+                hashes = [hash_func(p) for p in passwords]
+
+            with db.transaction() as conn:
+                # Özetleme sürerken aynı adla eklenen çalışanlar atlanır
+                existing = _existing_names(conn, [r[0] for _, r in new])
+                rows = []
+                for (number, (name, _, annual_leave, start_date)), hashed in zip(new, hashes):
+                    if name in existing:
+                        report['duplicates'].append((number, name))
+                    else:
+                        rows.append((name, hashed, start_date, annual_leave or 0, annual_leave))
+                conn.executemany('INSERT INTO employees (name, password_hash, start_date, annual_leave_days, annual_leave_override) '
+                                 'VALUES (?, ?, ?, ?, ?)', rows)
+            report['inserted'] += len(rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if report['inserted']:
+        # Hakkı dosyada verilmeyen çalışanlar kıdemden hesaplanır
+        db.accrue_leave()
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
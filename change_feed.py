@@ -0,0 +1,141 @@
+"""
+İşveren paneli için değişiklik akışı (server-sent events)
+
+Yeni talep, durum değişikliği ve çalışan ekleme/güncelleme/silme işlemleri
+tetikleyicilerle change_events tablosuna küçük JSON olaylar olarak yazılır
+(göç 11). Olay kimliği sürekli artar; panel son gördüğü kimliği bilir ve
+yalnızca ondan sonraki olayları alır, veri kümesinin tamamı yeniden
+sorgulanmaz.
+
+Akış her yoklamada önce son olay kimliğine (MAX(id), birincil anahtardan tek
+okuma) bakar; yeni olay yoksa olay sorgusu çalışmaz. PRAGMA data_version
+kullanılmaz: aynı bağlantının kendi yazdıklarında değişmez ve ASGI kipinde
+akışı sunan havuz bağlantısı yazmaları da sunar. Sync worker'larda (stream) her akış bir
+worker'ı tutar; bu yüzden uzun yoklama gibi çalışır: ilk olay partisini
+gönderince ya da LONG_POLL saniye sonunda kapanır. ASGI kipinde (astream)
+beklerken iş parçacığı tutulmaz ve akış STREAM_LIFETIME boyunca açık kalır.
+Her iki durumda tarayıcı (EventSource) son olay kimliğiyle (Last-Event-ID)
+kendiliğinden yeniden bağlanır.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+POLL_INTERVAL = float(os.environ.get('IZIN_FEED_POLL', '1'))
+HEARTBEAT = 15
+# Sync worker'ı en fazla bu kadar tutan akış (saniye)
+LONG_POLL = 25
+STREAM_LIFETIME = 300
+BATCH_LIMIT = 200
+# Tarayıcının yeniden bağlanmadan önce beklediği süre (ms)
+RETRY_MS = 2000
+
+_open_streams = 0
+_streams_lock = threading.Lock()
+
+
+def latest_id(conn):
+    return conn.execute('SELECT COALESCE(MAX(id), 0) FROM change_events').fetchone()[0]
+
+
+def latest(conn):
+    """Son olayın (kimlik, UTC zamanı); akış boşsa (0, None)."""
+    row = conn.execute('SELECT id, created_at FROM change_events ORDER BY id DESC LIMIT 1').fetchone()
+    if row is None:
+        return 0, None
+    return row[0], datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+
+def since(conn, after_id, limit=BATCH_LIMIT):
+    """after_id'den sonraki olaylar: [(kimlik, tür, JSON metni), ...]."""
+    return conn.execute('SELECT id, kind, payload FROM change_events WHERE id > ? ORDER BY id LIMIT ?',
+                        (after_id, limit)).fetchall()
+
+
+def open_streams():
+    return _open_streams
+
+
+def _message(event_id, kind, payload):
+    return f'id: {event_id}\nevent: {kind}\ndata: {payload}\n\n'
+
+
+def _opened(delta):
+    global _open_streams
+    with _streams_lock:
+        _open_streams += delta
+
+
+def _start(conn, after_id):
+    """Akışın başlangıç kimliği ve ilk parçaları."""
+    chunks = [f'retry: {RETRY_MS}\n\n']
+    if after_id is None:
+        return latest_id(conn), chunks
+    first = conn.execute('SELECT MIN(id) FROM change_events').fetchone()[0]
+    if first is not None and after_id < first - 1:
+        # Aradaki olaylar silinmiş: panel kendini baştan yüklemeli
+        after_id = latest_id(conn)
+        chunks.append(_message(after_id, 'reset', json.dumps({'after': after_id})))
+    return after_id, chunks
+
+
+def _poll(conn, after_id):
+    """Yeni olaylar varsa (son kimlik, parça), yoksa (after_id, None)."""
+    if latest_id(conn) <= after_id:
+        return after_id, None
+    events = since(conn, after_id)
+    if not events:
+        return after_id, None
+    return events[-1][0], ''.join(_message(*event) for event in events)
+
+
+def stream(db, after_id=None, poll=POLL_INTERVAL, lifetime=LONG_POLL):
+    """text/event-stream parçaları üretir; after_id None ise yalnızca yeni olaylar gönderilir.
+
+    İlk olay partisinden sonra ya da lifetime dolunca biter (uzun yoklama).
+    """
+    conn = db.connection()
+    _opened(1)
+    try:
+        after_id, chunks = _start(conn, after_id)
+        yield from chunks
+        last_sent = started = time.monotonic()
+        while time.monotonic() - started < lifetime:
+            after_id, chunk = _poll(conn, after_id)
+            if chunk:
+                # Worker serbest kalır; tarayıcı RETRY_MS sonra kaldığı yerden bağlanır
+                yield chunk
+                return
+            if time.monotonic() - last_sent >= HEARTBEAT:
+                # Yorum satırı: bağlantıyı açık tutar, kopmuş istemci burada fark edilir
+                last_sent = time.monotonic()
+                yield ': ping\n\n'
+            time.sleep(poll)
+    finally:
+        _opened(-1)
+
+
+async def astream(adb, after_id=None, poll=POLL_INTERVAL, lifetime=STREAM_LIFETIME):
+    """stream() ile aynı parçalar; adb asgi.AsyncDatabase, beklerken iş parçacığı tutmaz."""
+    _opened(1)
+    try:
+        after_id, chunks = await adb.query(_start, after_id)
+        for chunk in chunks:
+            yield chunk
+        last_sent = started = time.monotonic()
+        while time.monotonic() - started < lifetime:
+            after_id, chunk = await adb.query(_poll, after_id)
+            if chunk:
+                last_sent = time.monotonic()
+                yield chunk
+                continue
+            if time.monotonic() - last_sent >= HEARTBEAT:
+                last_sent = time.monotonic()
+                yield ': ping\n\n'
+            await asyncio.sleep(poll)
+    finally:
+        _opened(-1)
@@ -0,0 +1,142 @@
+"""
+Yanıt sıkıştırma (WSGI ara katmanı)
+
+İstemci kabul ediyorsa metin yanıtlar brotli (paket kuruluysa) ya da gzip
+ile sıkıştırılır. Akışlı yanıtlar (panel şablonları, CSV dışa aktarımı) akış
+olarak kalır: ilk parça ve sonrasında her FLUSH_BYTES bayt hemen gönderilir.
+SSE akışı, zaten sıkıştırılmış içerik (XLSX) ve küçük yanıtlar olduğu gibi
+geçer. Önünde sıkıştırma yapan bir vekil varsa IZIN_COMPRESSION=0 ile
+kapatılabilir.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # isteğe bağlı bağımlılık
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+MINIMUM_SIZE = 500
+FLUSH_BYTES = 16384
+
+
+def _accepted(header):
+    """Accept-Encoding başlığındaki kabul edilen kodlamalar (q=0 olanlar hariç)."""
+    accepted = set()
+    for part in header.lower().split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:
+            accepted.add(name.strip())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = _accepted(header or '')
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, level=6, minimum_size=MINIMUM_SIZE):
+        self.app = app
+        self.level = level
+        self.minimum_size = minimum_size
+
+    def _should_compress(self, status, headers):
+        values = {name.lower(): value for name, value in headers}
+        content_type = values.get('content-type', '').lower()
+        if not status.startswith('200') or 'content-encoding' in values:
+            return False
+        if not content_type.startswith(COMPRESSIBLE_TYPES) or content_type.startswith('text/event-stream'):
+            return False
+        if 'no-transform' in values.get('cache-control', ''):
+            return False
+        length = values.get('content-length')
+        return length is None or int(length) >= self.minimum_size
+
+    def __call__(self, environ, start_response):
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        decision = {}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            decision['compress'] = self._should_compress(status, headers)
+            if decision['compress']:
+                headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+                headers = [(name, f'W/{value}' if name.lower() == 'etag' and not value.startswith('W/') else value)
+                           for name, value in headers]
+                vary = [value for name, value in headers if name.lower() == 'vary']
+                headers = [(name, value) for name, value in headers if name.lower() != 'vary']
+                headers.append(('Vary', ', '.join(vary + ['Accept-Encoding'])))
+                headers.append(('Content-Encoding', encoding))
+            return start_response(status, headers, exc_info)
+
+        iterable = self.app(environ, compressing_start_response)
+        if not decision.get('compress'):
+            return iterable
+        return self._compress(iterable, _Brotli(self.level) if encoding == 'br' else _Gzip(self.level))
+
+    @staticmethod
+    def _compress(iterable, compressor):
+        pending = 0
+        first = True
+        try:
+            for chunk in iterable:
+                if not chunk:
+                    continue
+                data = compressor.compress(chunk)
+                pending += len(chunk)
+                # İlk parça (sayfa başı) ve büyük birikimler hemen gönderilir
+                if first or pending >= FLUSH_BYTES:
+                    data += compressor.flush()
+                    pending = 0
+                    first = False
+                if data:
+                    yield data
+            yield compressor.finish()
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
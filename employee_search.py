@@ -0,0 +1,99 @@
+"""
+Çalışan adı araması (FTS5, trigram)
+
+Adlar Türkçe kurallarla katlanmış biçimde (İ/I/ı → i, Ş → s, Ğ → g, ...)
+employee_search tablosunda tutulur; aynı katlama aranan metne de uygulanır.
+Böylece "isik", "IŞIK" ve "ışık" aynı kaydı bulur. Trigram dizini ad içinde
+geçen herhangi bir parçayı indeksle arar; üç harften kısa aramalar
+kelime başlarıyla eşlenir.
+
+Tablo employees üzerindeki tetikleyicilerle güncel tutulur (göç 15):
+katlama SQL'de, FOLD_MAP'in kopyası olan search_fold_map tablosundaki
+replace() adımlarıyla yapıldığından uygulama dışındaki yazmalar (toplu içe
+aktarım, sqlite3 kabuğu) da dizine yansır. Python tarafı aynı tabloyu ve
+SQLite'ın lower()'ı gibi yalnızca ASCII küçültmeyi kullanır; tabloda olmayan
+harfler iki tarafta da olduğu gibi kalır.
+"""
+
+import string
+
+# Sıra önemli: büyük harfler lower() öncesinde ASCII karşılıklarına çevrilir
+TURKISH_FOLD_MAP = (
+    ('İ', 'i'), ('I', 'i'), ('ı', 'i'), ('Î', 'i'), ('î', 'i'),
+    ('Ş', 's'), ('ş', 's'), ('Ğ', 'g'), ('ğ', 'g'),
+    ('Ü', 'u'), ('ü', 'u'), ('Û', 'u'), ('û', 'u'),
+    ('Ö', 'o'), ('ö', 'o'), ('Ç', 'c'), ('ç', 'c'), ('Â', 'a'), ('â', 'a'),
+)
+# Yabancı adlardaki Latin harfleri (göç 15); Azerice Ə dahil
+LATIN_FOLD_MAP = tuple((letter, base) for letters, base in (
+    ('ÀÁÃÄÅĀĄàáãäåāą', 'a'), ('ĆČćč', 'c'), ('ĎĐďđ', 'd'), ('ÈÉÊËĒĘĚƏèéêëēęěə', 'e'),
+    ('ÌÍÏĪìíïī', 'i'), ('ŁĽłľ', 'l'), ('ÑŃŇñńň', 'n'), ('ÒÓÔÕØŌŐòóôõøōő', 'o'), ('ŘŔřŕ', 'r'),
+    ('ŚŠśš', 's'), ('ŤŢťţ', 't'), ('ÙÚŪŮŰùúūůű', 'u'), ('ÝŸýÿ', 'y'), ('ŹŻŽźżž', 'z'),
+) for letter in letters) + (('ß', 'ss'), ('Æ', 'ae'), ('æ', 'ae'))
+FOLD_MAP = TURKISH_FOLD_MAP + LATIN_FOLD_MAP
+_FOLD_TABLE = str.maketrans(dict(FOLD_MAP))
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+MIN_QUERY_LENGTH = 2
+MAX_RESULTS = 20
+
+
+def fold(text):
+    """Aramada kullanılan Türkçe duyarlı küçük harf biçimi (fold_sql ile birebir aynı)."""
+    return text.translate(_FOLD_TABLE).translate(_ASCII_LOWER)
+
+
+def fold_sql(expression):
+    """fold() ile aynı dönüşümü yapan SQL ifadesi (tetikleyiciler için).
+
+    search_fold_map satırları sırayla uygulanır; iç içe replace() zinciri
+    SQLite'ın ayrıştırıcı yığınını 25 civarı derinlikte aşar.
+    """
+    return f'''(WITH RECURSIVE step (n, value) AS (
+                    SELECT 0, {expression}
+                    UNION ALL
+                    SELECT step.n + 1, replace(step.value, m.source, m.target)
+                    FROM step CROSS JOIN search_fold_map m ON m.id = step.n + 1)
+                SELECT lower(value) FROM step ORDER BY n DESC LIMIT 1)'''
+
+
+def replace_chain_sql(expression, mapping):
+    """İç içe replace() zinciriyle katlama (göç 12'nin Türkçe tablosu; uzun tablolarda kullanılamaz)."""
+    for source, target in mapping:
+        expression = f"replace({expression}, '{source}', '{target}')"
+    # SQLite'ın lower() fonksiyonu yalnızca ASCII harfleri dönüştürür; Türkçe harfler yukarıda katlandı
+    return f'lower({expression})'
+
+
+def store_fold_map(conn):
+    """search_fold_map tablosunu FOLD_MAP ile doldurur (çağıranın işlemi içinde)."""
+    conn.execute('DELETE FROM search_fold_map')
+    conn.executemany('INSERT INTO search_fold_map (id, source, target) VALUES (?, ?, ?)',
+                     [(number, source, target) for number, (source, target) in enumerate(FOLD_MAP, 1)])
+
+
+def _like_pattern(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search(conn, query, limit=10):
+    """Ada göre en iyi eşleşen aktif çalışanlar: [(kimlik, ad), ...].
+
+    Adın başıyla, sonra bir kelimenin başıyla eşleşenler öne alınır.
+    """
+    folded = fold(query or '').strip()
+    if len(folded) < MIN_QUERY_LENGTH:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    pattern = _like_pattern(folded)
+    if len(folded) >= 3:
+        # Trigram dizini: '"..."' tümceciği, metnin sürekli bir parça olarak geçmesini ister
+        condition, argument = 'employee_search MATCH ?', '"' + folded.replace('"', '""') + '"'
+    else:
+        # Trigram için çok kısa: yalnızca kelime başları (dizinsiz, LIMIT'e kadar taranır)
+        condition, argument = "(s.folded LIKE ?1 ESCAPE '\\' OR s.folded LIKE '% ' || ?1 ESCAPE '\\')", pattern + '%'
+    return conn.execute(f'''SELECT e.id, e.name FROM employee_search s CROSS JOIN employees e ON e.id = s.rowid
+                            WHERE {condition}
+                            ORDER BY s.folded LIKE ?2 ESCAPE '\\' DESC, instr(' ' || s.folded, ?3) > 0 DESC,
+                                     length(s.folded), e.name
+                            LIMIT ?4''', (argument, pattern + '%', ' ' + folded, limit)).fetchall()
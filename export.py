@@ -0,0 +1,210 @@
+"""
+İzin geçmişinin bordro için dışa aktarımı (CSV / XLSX)
+
+Satırlar veritabanı imlecinden tek tek okunur ve parça parça (chunk) üretilir;
+bellek kullanımı satır sayısından bağımsızdır. XLSX dosyası da zipfile ile
+akış halinde yazılır: hedefin geri sarılabilir (seekable) olması gerekmez,
+her parça üretildiği anda istemciye gönderilebilir.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+
+from work_calendar import working_days
+
+COLUMNS = ['Talep No', 'Çalışan', 'İşe Başlama', 'Yıllık İzin Hakkı', 'Kullanılan İzin', 'İzin Türü',
+           'Başlangıç', 'Bitiş', 'İş Günü', 'Durum', 'Talep Tarihi', 'Açıklama']
+STATUS_LABELS = {'pending': 'Beklemede', 'approved': 'Onaylandı', 'rejected': 'Reddedildi'}
+# Bu kadar satırda bir parça gönderilir
+CHUNK_ROWS = 500
+# Excel'in sayfa başına satır sınırı (başlık satırı dahil)
+XLSX_MAX_ROWS = 1048576
+
+# Hesap tablosunun formül olarak çalıştırdığı hücre başları (CSV formül enjeksiyonu)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8',
+                 'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'}
+
+
+def _days(start_date, end_date):
+    try:
+        return working_days(start_date, end_date)
+    except (TypeError, ValueError):
+        return None
+
+
+def export_row(row):
+    """Veritabanı satırını dışa aktarım sütunlarına çevirir."""
+    (leave_id, employee_name, hire_date, annual_leave, used_leave, leave_type,
+     start_date, end_date, status, request_date, reason) = row
+    return [leave_id, employee_name, hire_date, annual_leave, used_leave, leave_type, start_date, end_date,
+            _days(start_date, end_date), STATUS_LABELS.get(status, status), request_date, reason]
+
+
+def csv_cell(value):
+    """Formül gibi başlayan metni ' ile öneklendirir; Excel/LibreOffice onu metin olarak gösterir."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    """UTF-8 (BOM'lu, Excel uyumlu) CSV parçaları üretir."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(COLUMNS)
+    count = 0
+    for row in rows:
+        # XLSX hücreleri satır içi metin yazıldığından yalnızca CSV'de gerekir
+        writer.writerow([csv_cell(value) for value in export_row(row)])
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _Sink:
+    """zipfile için geri sarılamayan yazma hedefi; yazılanlar take() ile alınır."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+# XML 1.0'da izin verilmeyen kontrol karakterleri
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EXCEL_EPOCH = date(1899, 12, 30)
+_DATE_COLUMNS = frozenset([2, 6, 7])
+
+
+def _cell(index, value):
+    if value is None or value == '':
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    if index in _DATE_COLUMNS:
+        try:
+            # s="1": tarih biçimli hücre stili
+            return f'<c s="1"><v>{(date.fromisoformat(value) - _EXCEL_EPOCH).days}</v></c>'
+        except (TypeError, ValueError):
+            pass
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _sheet_row(values):
+    return '<row>' + ''.join(_cell(i, value) for i, value in enumerate(values)) + '</row>'
+
+
+_SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+               '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/></sheetView></sheetViews>'
+               '<sheetData>')
+_SHEET_TAIL = '</sheetData></worksheet>'
+_STYLES = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+           '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+           '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+           '<borders count="1"><border/></borders>'
+           '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+           '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+           '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+           '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+           '</styleSheet>')
+
+
+def _workbook_parts(sheet_count):
+    ns = 'http://schemas.openxmlformats.org'
+    sheets = ''.join(f'<sheet name="İzinler{"" if i == 1 else f" {i}"}" sheetId="{i}" r:id="rId{i}"/>'
+                     for i in range(1, sheet_count + 1))
+    sheet_rels = ''.join(f'<Relationship Id="rId{i}" Type="{ns}/officeDocument/2006/relationships/worksheet" '
+                         f'Target="worksheets/sheet{i}.xml"/>' for i in range(1, sheet_count + 1))
+    sheet_types = ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                          'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                          for i in range(1, sheet_count + 1))
+    head = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return {
+        'xl/workbook.xml': f'{head}<workbook xmlns="{ns}/spreadsheetml/2006/main" '
+                           f'xmlns:r="{ns}/officeDocument/2006/relationships"><sheets>{sheets}</sheets></workbook>',
+        'xl/_rels/workbook.xml.rels': f'{head}<Relationships xmlns="{ns}/package/2006/relationships">{sheet_rels}'
+                                      f'<Relationship Id="rId{sheet_count + 1}" Type="{ns}/officeDocument/2006/relationships/styles" '
+                                      'Target="styles.xml"/></Relationships>',
+        'xl/styles.xml': _STYLES,
+        '_rels/.rels': f'{head}<Relationships xmlns="{ns}/package/2006/relationships">'
+                       f'<Relationship Id="rId1" Type="{ns}/officeDocument/2006/relationships/officeDocument" '
+                       'Target="xl/workbook.xml"/></Relationships>',
+        '[Content_Types].xml': f'{head}<Types xmlns="{ns}/package/2006/content-types">'
+                               '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                               '<Default Extension="xml" ContentType="application/xml"/>'
+                               '<Override PartName="/xl/workbook.xml" '
+                               'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                               '<Override PartName="/xl/styles.xml" '
+                               'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                               f'{sheet_types}</Types>',
+    }
+
+
+def iter_xlsx(rows):
+    """XLSX parçaları üretir; satırlar sayfa sınırını aşarsa yeni sayfa açılır.
+
+    Sayfa sayısı ancak sonda bilindiğinden çalışma kitabı tanımları en sona
+    yazılır (ZIP içindeki sıra önemli değildir).
+    """
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    header = _sheet_row(COLUMNS)
+    sheet_count = 0
+    sheet = None
+    sheet_rows = XLSX_MAX_ROWS
+    pending = []
+    for row in rows:
+        if sheet_rows >= XLSX_MAX_ROWS:
+            if sheet is not None:
+                sheet.write(''.join(pending).encode('utf-8') + _SHEET_TAIL.encode('utf-8'))
+                pending = []
+                sheet.close()
+            sheet_count += 1
+            sheet = archive.open(f'xl/worksheets/sheet{sheet_count}.xml', 'w')
+            sheet.write((_SHEET_HEAD + header).encode('utf-8'))
+            sheet_rows = 1
+        pending.append(_sheet_row(export_row(row)))
+        sheet_rows += 1
+        if len(pending) >= CHUNK_ROWS:
+            sheet.write(''.join(pending).encode('utf-8'))
+            pending = []
+            data = sink.take()
+            if data:
+                yield data
+    if sheet is None:
+        # Hiç satır yoksa yalnızca başlıklı boş bir sayfa yazılır
+        sheet_count = 1
+        sheet = archive.open('xl/worksheets/sheet1.xml', 'w')
+        sheet.write((_SHEET_HEAD + header).encode('utf-8'))
+    sheet.write(''.join(pending).encode('utf-8') + _SHEET_TAIL.encode('utf-8'))
+    sheet.close()
+    for name, content in _workbook_parts(sheet_count).items():
+        archive.writestr(name, content)
+    archive.close()
+    yield sink.take()
+
+
+WRITERS = {'csv': iter_csv, 'xlsx': iter_xlsx}
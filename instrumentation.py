@@ -0,0 +1,271 @@
+"""
+Ölçüm ve kayıt (logging) katmanı
+
+- Her Flask isteği ve her SecureDatabase sorgusu için süre histogramları ve
+  sayaçlar tutulur; /metrics bunları Prometheus metin biçiminde sunar.
+  Değerler süreç (worker) başınadır.
+- Yavaş sorgular, sırasında en sık çalışan SQL ifadeleri (tekilleştirilmiş,
+  kısaltılmış parametrelerle) ve EXPLAIN QUERY PLAN çıktılarıyla birlikte
+  kaydedilir.
+- Kayıtlar bir QueueHandler üzerinden arka plandaki dinleyiciye aktarılır;
+  istek iş parçacıkları stdout/stderr yazımını beklemez.
+"""
+
+import atexit
+import functools
+import logging
+import logging.handlers
+import os
+import queue
+import sqlite3
+import threading
+import time
+import types
+
+logger = logging.getLogger('izin')
+
+# Saniye cinsinden histogram sınırları
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SLOW_QUERY_SECONDS = float(os.environ.get('IZIN_SLOW_QUERY_MS', '100')) / 1000
+# Yavaş sorgu kaydında en fazla bu kadar farklı ifade (en sık çalışanlar) ve planı
+SLOW_QUERY_STATEMENTS = 5
+MAX_SQL_CHARS = 500
+MAX_PARAMETER_CHARS = 200
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def register_collector(self, collector):
+        """collector() -> [(ad, tür, açıklama, {etiketler}, değer), ...] (gauge vb.)"""
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._histograms.items())
+        described = set()
+
+        def header(name, kind, help_text=None):
+            if name not in described:
+                described.add(name)
+                kind, help_text = self._help.get(name, (kind, help_text or name))
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f'{name}{_labels(labels)} {value}')
+        for (name, labels), (buckets, total, count) in histograms:
+            header(name, 'histogram')
+            for bound, bucket_count in zip(BUCKETS, buckets):
+                lines.append(f'{name}_bucket{_labels(labels + (("le", repr(bound)),))} {bucket_count}')
+            lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{_labels(labels)} {total:.6f}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                header(name, kind, help_text)
+                lines.append(f'{name}{_labels(tuple(sorted(labels.items())))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+               for key, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+metrics = Metrics()
+metrics.describe('http_request_duration_seconds', 'histogram', 'Flask isteklerinin yanıt süresi (akışlı gövde hariç)')
+metrics.describe('http_requests_total', 'counter', 'Uç nokta ve durum koduna göre istek sayısı')
+metrics.describe('db_query_duration_seconds', 'histogram', 'SecureDatabase metot süreleri')
+metrics.describe('db_query_rows_total', 'counter', 'SecureDatabase metotlarının döndürdüğü satır sayısı')
+metrics.describe('db_slow_queries_total', 'counter', 'Eşiği aşan SecureDatabase çağrıları')
+
+# Etkin sorgu ölçümünün sırasında çalışan SQL ifadeleri (iş parçacığı başına)
+_current = threading.local()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Yavaş sorgu kaydı için çalışan ifadeleri not eden bağlantı sınıfı."""
+
+    def execute(self, sql, parameters=()):
+        statements = getattr(_current, 'statements', None)
+        if statements is not None:
+            _note(statements, sql, parameters)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        statements = getattr(_current, 'statements', None)
+        if statements is not None:
+            _note(statements, sql, None)
+        return super().executemany(sql, seq_of_parameters)
+
+
+def _note(statements, sql, parameters):
+    # Aynı ifade bir kez tutulur: {sql: [çalışma sayısı, ilk parametreler]}
+    entry = statements.get(sql)
+    if entry is None:
+        statements[sql] = [1, parameters]
+    else:
+        entry[0] += 1
+
+
+def _row_count(result):
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    if isinstance(result, (list, dict)):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def _shorten(text, limit):
+    return text if len(text) <= limit else text[:limit] + f'... (+{len(text) - limit})'
+
+
+def _log_slow(db, name, duration, statements):
+    metrics.inc('db_slow_queries_total', query=name)
+    details = []
+    conn = db.connection()
+    # En sık çalışan SLOW_QUERY_STATEMENTS ifade kaydedilir ve yalnızca onların planı alınır
+    ranked = sorted(statements.items(), key=lambda item: -item[1][0])
+    for sql, (count, parameters) in ranked[:SLOW_QUERY_STATEMENTS]:
+        text = _shorten(' '.join(sql.split()), MAX_SQL_CHARS)
+        line = f'{count}x {text}'
+        if parameters is not None and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            # Yazma ifadelerinin parametreleri (ör. şifre özetleri) kayda geçmez
+            if parameters:
+                line += f'\n      parametreler: {_shorten(repr(parameters), MAX_PARAMETER_CHARS)}'
+            try:
+                plan = ' | '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, parameters))
+            except sqlite3.Error as e:
+                plan = f'plan alınamadı: {e}'
+            line += f'\n      plan: {plan}'
+        details.append(line)
+    if len(ranked) > SLOW_QUERY_STATEMENTS:
+        details.append(f'... ve {len(ranked) - SLOW_QUERY_STATEMENTS} farklı ifade daha')
+    logger.warning('Yavaş sorgu %s: %.1f ms, %d ifade\n    %s', name, duration * 1000,
+                   sum(count for count, _ in statements.values()), '\n    '.join(details) or '-')
+
+
+def _finish(db, name, started, statements, rows):
+    duration = time.perf_counter() - started
+    metrics.observe('db_query_duration_seconds', duration, query=name)
+    metrics.inc('db_query_rows_total', rows, query=name)
+    if duration >= SLOW_QUERY_SECONDS and statements is not None:
+        _log_slow(db, name, duration, statements)
+
+
+def _timed_generator(db, name, generator):
+    started = time.perf_counter()
+    rows = 0
+    try:
+        for item in generator:
+            rows += 1
+            yield item
+    finally:
+        _finish(db, name, started, None, rows)
+
+
+def timed_query(func):
+    """SecureDatabase metodunu süre, satır sayısı ve yavaş sorgu kaydıyla sarar."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        outermost = getattr(_current, 'statements', None) is None
+        if outermost:
+            _current.statements = {}
+        started = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            statements = _current.statements if outermost else None
+            if outermost:
+                _current.statements = None
+        if isinstance(result, types.GeneratorType):
+            # Akışlı sonuçlar tükenene kadar ölçülür
+            return _timed_generator(self, name, result)
+        _finish(self, name, started, statements, _row_count(result))
+        return result
+
+    return wrapper
+
+
+def init_app(app):
+    """İstek süresi ölçümünü Flask uygulamasına bağlar."""
+
+    @app.before_request
+    def _start_timer():
+        from flask import g
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        from flask import g, request
+        started = g.pop('request_started', None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                            endpoint=endpoint, method=request.method)
+            metrics.inc('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+        return response
+
+
+_listener = None
+
+
+def _start_listener(records, handler):
+    global _listener
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def setup_logging(level=logging.INFO):
+    """'izin' kayıtlarını kuyruk üzerinden arka plan iş parçacığına yönlendirir."""
+    if _listener is not None:
+        return
+    records = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter('%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s'))
+    _start_listener(records, stream)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(level)
+    logger.propagate = False
+    atexit.register(_stop_listener)
+    # gunicorn --preload: dinleyici iş parçacığı fork'tan sonra çocukta yeniden başlatılır
+    os.register_at_fork(after_in_child=lambda: _start_listener(records, stream))
@@ -0,0 +1,282 @@
+"""
+İzin talepleri için yazma-arkası (write-behind) giriş kuyruğu
+
+Yoğun anlarda her talep için SQLite yazma kilidini beklemek yerine talep
+doğrulanır ve diskteki bir ekleme dosyasına (JSON satırı, fsync ile) yazılır;
+kullanıcıya hemen yanıt dönülür. Arka plandaki boşaltıcı iş parçacığı
+biriken satırları dosya başına tek işlemle leave_requests tablosuna aktarır.
+
+Dosya düzeni (kuyruk dizininde):
+    pending.jsonl       yazarların eklediği dosya
+    pending.lock        yazarlar paylaşımlı, döndürücü özel kilit alır
+    batch-*.jsonl       boşaltılmak üzere döndürülmüş dosyalar
+    dead-*.jsonl        aktarılamayan kayıtlar (elle incelenir)
+    drain.lock          aynı anda tek bir boşaltıcı çalışır
+
+Her kaydın benzersiz intake_id değeri vardır; boşaltma sırasında çökme
+olursa aynı dosya yeniden işlenir ve zaten eklenmiş kayıtlar atlanır.
+Her kayıt kendi SAVEPOINT'i içinde eklenir: veritabanı kilidi dışındaki bir
+hatayla (bozuk tarih, silinmiş çalışan, yabancı anahtar) aktarılamayan kayıt
+yalnız başına dead-*.jsonl dosyasına yazılır, partinin geri kalanı eklenir.
+Dosya olarak okunamayan parti bütünüyle kenara alınır; sonraki partiler
+beklemez.
+
+depth() ve queued_for() her istekte çağrılır; dosyalar her seferinde baştan
+okunmaz. Süreç içindeki dizin (inode başına okunan konum, satır sayısı ve
+çalışana göre kayıtlar) yalnızca dosyalara son okumadan beri eklenen
+satırları okur. Döndürülen dosya aynı inode'u taşıdığından yeniden okunmaz.
+"""
+
+import fcntl
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import leave_summary
+from instrumentation import logger, metrics
+from work_calendar import to_day
+
+DRAIN_INTERVAL = float(os.environ.get('IZIN_INTAKE_INTERVAL', '0.5'))
+
+
+@contextmanager
+def _locked(path, mode, blocking=True):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, mode if blocking else mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+    finally:
+        os.close(fd)
+
+
+class IntakeQueue:
+    def __init__(self, db, directory, fsync=True):
+        self.db = db
+        self.directory = directory
+        self.fsync = fsync
+        self.pending_path = os.path.join(directory, 'pending.jsonl')
+        self._stop = threading.Event()
+        self._drainer = None
+        self._drainer_pid = None
+        self._lock = threading.Lock()
+        # inode -> [okunan bayt, satır sayısı, {çalışan: [kayıtlar]}, ilk satır]
+        self._index = {}
+        self._index_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def enqueue(self, employee_id, leave_type, start_date, end_date, reason=''):
+        """Talebi kuyruğa yazar ve intake_id döndürür (veritabanı kilidi beklenmez)."""
+        record = {
+            'intake_id': uuid.uuid4().hex,
+            'employee_id': employee_id,
+            'leave_type': leave_type,
+            'start_date': start_date,
+            'end_date': end_date,
+            'reason': reason,
+            'queued_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with _locked(os.path.join(self.directory, 'pending.lock'), fcntl.LOCK_SH):
+            fd = os.open(self.pending_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        metrics.inc('intake_enqueued_total')
+        self.ensure_drainer()
+        return record['intake_id']
+
+    def _rotate(self):
+        """pending.jsonl dosyasını boşaltılacak bir parti dosyasına çevirir."""
+        with _locked(os.path.join(self.directory, 'pending.lock'), fcntl.LOCK_EX):
+            if os.path.exists(self.pending_path) and os.path.getsize(self.pending_path):
+                os.rename(self.pending_path, os.path.join(self.directory, f'batch-{time.time_ns()}-{os.getpid()}.jsonl'))
+
+    def _batch_files(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'batch-*.jsonl')))
+
+    @staticmethod
+    def _read(path):
+        records = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Yarım kalmış satır (ör. disk doldu) atlanır
+                    logger.warning('Kuyrukta okunamayan satır atlandı: %s', path)
+        return records
+
+    def drain(self):
+        """Biriken talepleri veritabanına aktarır; eklenen kayıt sayısını döndürür."""
+        inserted = 0
+        with _locked(os.path.join(self.directory, 'drain.lock'), fcntl.LOCK_EX, blocking=False) as acquired:
+            if not acquired:
+                return 0
+            self._rotate()
+            for path in self._batch_files():
+                try:
+                    inserted += self._drain_file(path)
+                except sqlite3.OperationalError:
+                    # Kilit/meşguliyet gibi geçici hata: dosya yerinde kalır, sonra yeniden denenir
+                    raise
+                except Exception:
+                    dead = os.path.join(self.directory, 'dead-' + os.path.basename(path)[len('batch-'):])
+                    logger.exception('Kuyruk dosyası işlenemedi, kenara alındı: %s', dead)
+                    os.rename(path, dead)
+                    metrics.inc('intake_dead_batches_total')
+        if inserted:
+            metrics.inc('intake_drained_total', inserted)
+        return inserted
+
+    def _drain_file(self, path):
+        inserted = 0
+        dead = []
+        records = self._read(path)
+        with self.db.transaction() as conn:
+            type_ids = dict(conn.execute('SELECT name, id FROM leave_types'))
+            for r in records:
+                conn.execute('SAVEPOINT intake_record')
+                try:
+                    inserted += self._insert(conn, type_ids, r)
+                except sqlite3.OperationalError:
+                    # Geçici hata: bütün işlem geri alınır, dosya sonra yeniden denenir
+                    raise
+                except Exception as e:
+                    conn.execute('ROLLBACK TO intake_record')
+                    logger.warning('Kuyruktaki talep aktarılamadı, kenara alındı: %s (%s)', r.get('intake_id'), e)
+                    dead.append(r)
+                conn.execute('RELEASE intake_record')
+        if dead:
+            # Yeniden işlenen dosya aynı kayıtları aynı dosyaya yazar
+            dead_path = os.path.join(self.directory, 'dead-' + os.path.basename(path)[len('batch-'):])
+            with open(dead_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in dead)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            metrics.inc('intake_dead_records_total', len(dead))
+        os.unlink(path)
+        return inserted
+
+    @classmethod
+    def _insert(cls, conn, type_ids, r):
+        """Kaydı ekler; eklendiyse 1, daha önce aktarılmışsa 0. Eşleşmeyen kayıtta ValueError."""
+        employee_id = cls._employee_id(conn, r)
+        leave_type_id = type_ids.get(r['leave_type'])
+        if employee_id is None:
+            raise ValueError('çalışan bulunamadı ya da silinmiş')
+        if leave_type_id is None:
+            raise ValueError(f"bilinmeyen izin türü: {r['leave_type']}")
+        start_day, end_day = to_day(r['start_date']), to_day(r['end_date'])
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO leave_requests (employee_id, leave_type_id, start_day, end_day, reason, request_date, intake_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (employee_id, leave_type_id, start_day, end_day, r.get('reason', ''), r['queued_at'], r['intake_id']))
+        # Daha önce aktarılmış (tekrar işlenen) kayıtlar özetlere iki kez yazılmaz
+        if not cursor.rowcount:
+            return 0
+        # status_id 1: 'pending' (göç 10'da sabit kimlikle eklenir)
+        leave_summary.apply(conn, employee_id, leave_type_id, start_day, end_day, 1)
+        return 1
+
+    @staticmethod
+    def _employee_id(conn, record):
+        """Kaydın çalışan kimliği; çalışan yoksa ya da silinmişse None."""
+        if 'employee_id' in record:
+            row = conn.execute('SELECT id FROM employees WHERE id = ? AND deleted_at IS NULL', (record['employee_id'],)).fetchone()
+        else:
+            # Şema değişikliğinden önce kuyruğa yazılmış, ada dayalı kayıt
+            row = conn.execute('SELECT id FROM employees WHERE name = ? AND deleted_at IS NULL',
+                               (record.get('employee_name'),)).fetchone()
+        return row[0] if row else None
+
+    def _scan(self):
+        """Dizini günceller; bekleyen dosyaların dizin kayıtlarını döndürür."""
+        with self._index_lock:
+            live = {}
+            for path in self._batch_files() + [self.pending_path]:
+                try:
+                    with open(path, 'rb') as f:
+                        inode = os.fstat(f.fileno()).st_ino
+                        # İlk satır (benzersiz intake_id) inode yeniden kullanıldıysa farkı gösterir
+                        head = f.readline()
+                        entry = self._index.get(inode)
+                        if entry is None or entry[3] and entry[3] != head:
+                            entry = [0, 0, {}, b'']
+                        f.seek(entry[0])
+                        data = f.read()
+                except FileNotFoundError:
+                    continue
+                # Yazımı sürmekte olan son (yarım) satır bir sonraki okumaya kalır
+                complete = data[:data.rfind(b'\n') + 1]
+                for line in complete.splitlines():
+                    entry[1] += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    entry[2].setdefault(record.get('employee_id'), []).append(record)
+                entry[0] += len(complete)
+                if not entry[3] and complete:
+                    entry[3] = complete[:complete.find(b'\n') + 1]
+                live[inode] = entry
+            # Aktarılıp silinen dosyalar dizinden düşer
+            self._index = live
+            return list(live.values())
+
+    def queued_for(self, employee_id):
+        """Henüz veritabanına aktarılmamış talepler (çalışan panelinde 'sırada')."""
+        records = [r for entry in self._scan() for r in entry[2].get(employee_id, ())]
+        if not records:
+            return []
+        # Aktarılmış ama dosyası henüz silinmemiş kayıtları çıkar
+        placeholders = ','.join('?' * len(records))
+        committed = {row[0] for row in self.db.connection().execute(
+            f'SELECT intake_id FROM leave_requests WHERE intake_id IN ({placeholders})', [r['intake_id'] for r in records])}
+        return [{'leave_type': r['leave_type'], 'start_date': r['start_date'], 'end_date': r['end_date'], 'status': 'queued'}
+                for r in reversed(records) if r['intake_id'] not in committed]
+
+    def depth(self):
+        return sum(entry[1] for entry in self._scan())
+
+    def ensure_drainer(self):
+        """Bu süreçte boşaltıcı iş parçacığı yoksa başlatır (fork sonrası dahil)."""
+        if self._drainer_pid == os.getpid() and self._drainer.is_alive():
+            return
+        with self._lock:
+            if self._drainer_pid == os.getpid() and self._drainer.is_alive():
+                return
+            self._stop = threading.Event()
+            self._drainer = threading.Thread(target=self._run, name='intake-drainer', daemon=True)
+            self._drainer_pid = os.getpid()
+            self._drainer.start()
+
+    def _run(self):
+        while not self._stop.wait(DRAIN_INTERVAL):
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Giriş kuyruğu boşaltılamadı')
+
+    def stop(self):
+        """Boşaltıcıyı durdurur ve kalanları son bir kez aktarır."""
+        if self._drainer is not None and self._drainer_pid == os.getpid():
+            self._stop.set()
+            self._drainer.join(timeout=5)
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Giriş kuyruğu kapanışta boşaltılamadı')
@@ -0,0 +1,85 @@
+"""
+İzin bakiye defteri
+
+Onaylanan her yıllık izin, çalışanın bakiyesine iş günü cinsinden bir
+hareket (delta) olarak yazılır; onay geri alınırsa ters hareket eklenir.
+employees.used_leave_days bu hareketlerin toplamıdır ve durum değişikliğiyle
+aynı işlem içinde güncellenir. reconcile() tüm bakiyeleri defterden tek bir
+SQL ifadesiyle yeniden hesaplar.
+"""
+
+import leave_summary
+from work_calendar import working_days
+
+# Yıllık izin bakiyesinden düşülen izin türleri
+CHARGED_LEAVE_TYPES = frozenset(['Yıllık İzin'])
+
+
+def _days(start_date, end_date):
+    # Tarihi bozuk eski kayıtlar bakiyeye yansıtılamaz
+    try:
+        return working_days(start_date, end_date)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _is_charged(leave_type, status):
+    return status == 'approved' and leave_type in CHARGED_LEAVE_TYPES
+
+
+def status_delta(leave_type, start_date, end_date, old_status, new_status):
+    """Durum değişikliğinin bakiyeye etkisi (gün)."""
+    was_charged = _is_charged(leave_type, old_status)
+    is_charged = _is_charged(leave_type, new_status)
+    if was_charged == is_charged:
+        return 0
+    days = _days(start_date, end_date)
+    return days if is_charged else -days
+
+
+def record(conn, employee_id, leave_request_id, delta, reason):
+    """Hareketi deftere yazar ve bakiyeyi günceller (çağıranın işlemi içinde)."""
+    if not delta:
+        return
+    conn.execute('INSERT INTO leave_ledger (employee_id, leave_request_id, delta_days, reason) VALUES (?, ?, ?, ?)',
+                 (employee_id, leave_request_id, delta, reason))
+    conn.execute('UPDATE employees SET used_leave_days = used_leave_days + ? WHERE id = ?', (delta, employee_id))
+
+
+def apply_status_change(conn, leave_request_id, new_status):
+    """Talebin durumunu değiştirir; bakiye hareketini ve rapor özetlerini uygular.
+
+    Talep yoksa None, varsa (çalışan_adı, eski_durum, delta) döndürür.
+    """
+    row = conn.execute('''SELECT l.employee_id, e.name, l.leave_type_id, t.name, l.start_day, l.end_day, l.status_id, s.code
+                          FROM leave_requests l CROSS JOIN employees e ON e.id = l.employee_id
+                          CROSS JOIN leave_types t ON t.id = l.leave_type_id CROSS JOIN leave_statuses s ON s.id = l.status_id
+                          WHERE l.id = ?''', (leave_request_id,)).fetchone()
+    if row is None:
+        return None
+    employee_id, employee_name, leave_type_id, leave_type, start_day, end_day, old_status_id, old_status = row
+    new_status_id = conn.execute('SELECT id FROM leave_statuses WHERE code = ?', (new_status,)).fetchone()[0]
+    conn.execute('UPDATE leave_requests SET status_id = ? WHERE id = ?', (new_status_id, leave_request_id))
+    delta = status_delta(leave_type, start_day, end_day, old_status, new_status)
+    record(conn, employee_id, leave_request_id, delta, f'{old_status} -> {new_status}')
+    leave_summary.change_status(conn, employee_id, leave_type_id, start_day, end_day, old_status_id, new_status_id)
+    return employee_name, old_status, delta
+
+
+def reconcile(conn):
+    """Bakiyeleri defterden yeniden hesaplar; düzeltilen çalışan sayısını döndürür."""
+    total = 'SELECT COALESCE(SUM(delta_days), 0) FROM leave_ledger WHERE leave_ledger.employee_id = employees.id'
+    cursor = conn.execute(f'UPDATE employees SET used_leave_days = ({total}) WHERE used_leave_days IS NOT ({total})')
+    return cursor.rowcount
+
+
+def backfill(conn):
+    """Defter öncesinde onaylanmış talepler için açılış hareketlerini yazar."""
+    rows = conn.execute('''SELECT l.id, l.employee_id, t.name, l.start_day, l.end_day
+                           FROM leave_requests l CROSS JOIN leave_types t ON t.id = l.leave_type_id
+                           CROSS JOIN leave_statuses s ON s.id = l.status_id WHERE s.code = ?''', ('approved',))
+    conn.executemany('INSERT INTO leave_ledger (employee_id, leave_request_id, delta_days, reason) VALUES (?, ?, ?, ?)',
+                     [(employee_id, leave_id, _days(start, end), 'açılış')
+                      for leave_id, employee_id, leave_type, start, end in rows.fetchall()
+                      if leave_type in CHARGED_LEAVE_TYPES and _days(start, end)])
+    reconcile(conn)
@@ -0,0 +1,465 @@
+"""
+Veritabanı şema göçleri
+
+Her göç (sürüm, açıklama, adımlar) üçlüsüdür. Adımlar SQL metni ya da
+bağlantıyı parametre olarak alan bir fonksiyondur. Göçler sürüm sırasıyla,
+her biri tek bir işlem (transaction) içinde uygulanır ve schema_version
+tablosuna kaydedilir; yarıda kalan bir göç hiç uygulanmamış sayılır.
+"""
+
+from datetime import date, timedelta
+
+import employee_search
+import leave_summary
+from work_calendar import EPOCH, working_days
+
+
+def _day(column):
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+
+def _valid_range(prefix):
+    return (f"julianday({prefix}start_date) IS NOT NULL AND julianday({prefix}end_date) IS NOT NULL "
+            f"AND {prefix}end_date >= {prefix}start_date")
+
+
+# Göç 5, 8 ve 10'un adımları uygulandıkları şemaya göre sabitlenmiştir; modüllerin
+# güncel fonksiyonları değişse de eski veritabanları hep aynı biçimde yükseltilir
+
+def _legacy_days(start_date, end_date):
+    try:
+        return working_days(start_date, end_date)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _legacy_ledger_backfill(conn):
+    """Defter öncesinde onaylanmış yıllık izinler için açılış hareketleri (göç 5)."""
+    rows = conn.execute('''SELECT id, employee_name, start_date, end_date FROM leave_requests
+                           WHERE status = 'approved' AND leave_type = 'Yıllık İzin' ''').fetchall()
+    conn.executemany('INSERT INTO leave_ledger (employee_name, leave_request_id, delta_days, reason) VALUES (?, ?, ?, ?)',
+                     [(name, leave_id, _legacy_days(start, end), 'açılış')
+                      for leave_id, name, start, end in rows if _legacy_days(start, end)])
+    total = 'SELECT COALESCE(SUM(delta_days), 0) FROM leave_ledger WHERE leave_ledger.employee_name = employees.name'
+    conn.execute(f'UPDATE employees SET used_leave_days = ({total}) WHERE used_leave_days IS NOT ({total})')
+
+
+def _legacy_summary_rebuild(conn):
+    """Kullanım özetlerini leave_requests'ten hesaplar (göç 8; aylar 'YYYY-AA')."""
+    monthly = {}
+    for name, leave_type, start, end, status in conn.execute(
+            'SELECT employee_name, leave_type, start_date, end_date, status FROM leave_requests'):
+        for month, days in leave_summary.month_segments(start, end):
+            entry = monthly.setdefault((name or '', leave_type or '', f'{month // 100:04d}-{month % 100:02d}', status), [0, 0])
+            entry[0] += days
+            entry[1] += 1
+    conn.executemany('INSERT INTO leave_usage_monthly (employee_name, leave_type, month, status, days, requests) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', [(*key, days, requests) for key, (days, requests) in monthly.items()])
+    conn.execute('''INSERT INTO leave_usage_totals (leave_type, month, status, days, requests)
+                    SELECT leave_type, month, status, SUM(days), SUM(requests) FROM leave_usage_monthly
+                    GROUP BY leave_type, month, status''')
+
+
+# change_events tablosunda tutulan en fazla olay sayısı (göç 11)
+CHANGE_FEED_RETENTION = 10000
+
+MIGRATIONS = [
+    (1, 'Temel tablolar', [
+        '''CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY, name TEXT UNIQUE, password_hash TEXT,
+            start_date TEXT, annual_leave_days INTEGER DEFAULT 20, used_leave_days INTEGER DEFAULT 0)''',
+        '''CREATE TABLE IF NOT EXISTS leave_requests (
+            id INTEGER PRIMARY KEY, employee_name TEXT, leave_type TEXT,
+            start_date TEXT, end_date TEXT, reason TEXT, status TEXT DEFAULT 'pending',
+            request_date TEXT DEFAULT CURRENT_TIMESTAMP)''',
+        '''CREATE TABLE IF NOT EXISTS employers (
+            id INTEGER PRIMARY KEY, password_hash TEXT)''',
+    ]),
+    (2, 'leave_requests sık kullanılan sorgu indeksleri', [
+        'CREATE INDEX IF NOT EXISTS idx_leave_requests_employee_date ON leave_requests (employee_name, request_date)',
+        'CREATE INDEX IF NOT EXISTS idx_leave_requests_status_date ON leave_requests (status, request_date)',
+        'CREATE INDEX IF NOT EXISTS idx_leave_requests_range ON leave_requests (start_date, end_date)',
+        'ANALYZE',
+    ]),
+    (3, 'Filtresiz izin listesi için tarih indeksi', [
+        'CREATE INDEX IF NOT EXISTS idx_leave_requests_date ON leave_requests (request_date)',
+    ]),
+    (4, 'Çalışan listesi önbelleği için sürüm sayacı', [
+        'CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)',
+        "INSERT OR IGNORE INTO app_meta (key, value) VALUES ('roster_version', 0)",
+        # Tetikleyiciler her yazmada sayacı artırır; böylece bütün worker'lar
+        # (ve doğrudan SQL ile yapılan değişiklikler) önbelleği geçersiz kılar
+        '''CREATE TRIGGER IF NOT EXISTS trg_employees_insert_version AFTER INSERT ON employees
+           BEGIN UPDATE app_meta SET value = value + 1 WHERE key = 'roster_version'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_employees_update_version AFTER UPDATE ON employees
+           BEGIN UPDATE app_meta SET value = value + 1 WHERE key = 'roster_version'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_employees_delete_version AFTER DELETE ON employees
+           BEGIN UPDATE app_meta SET value = value + 1 WHERE key = 'roster_version'; END''',
+    ]),
+    (5, 'İzin bakiye defteri', [
+        '''CREATE TABLE IF NOT EXISTS leave_ledger (
+            id INTEGER PRIMARY KEY, employee_name TEXT NOT NULL, leave_request_id INTEGER,
+            delta_days INTEGER NOT NULL, reason TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP)''',
+        'CREATE INDEX IF NOT EXISTS idx_leave_ledger_employee ON leave_ledger (employee_name)',
+        'CREATE INDEX IF NOT EXISTS idx_leave_ledger_request ON leave_ledger (leave_request_id)',
+        _legacy_ledger_backfill,
+    ]),
+    (6, 'İzin aralıkları için R*Tree indeksi', [
+        # Tarihler 1970-01-01'den itibaren gün sayısı olarak tutulur
+        'CREATE VIRTUAL TABLE IF NOT EXISTS leave_intervals USING rtree_i32(id, start_day, end_day)',
+        f'''INSERT OR REPLACE INTO leave_intervals (id, start_day, end_day)
+            SELECT id, {_day('start_date')}, {_day('end_date')} FROM leave_requests
+            WHERE {_valid_range('')}''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_leave_intervals_insert AFTER INSERT ON leave_requests
+            WHEN {_valid_range('NEW.')}
+            BEGIN INSERT INTO leave_intervals (id, start_day, end_day)
+                  VALUES (NEW.id, {_day('NEW.start_date')}, {_day('NEW.end_date')}); END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_leave_intervals_update AFTER UPDATE OF start_date, end_date ON leave_requests
+            BEGIN DELETE FROM leave_intervals WHERE id = OLD.id;
+                  INSERT INTO leave_intervals (id, start_day, end_day)
+                  SELECT NEW.id, {_day('NEW.start_date')}, {_day('NEW.end_date')} WHERE {_valid_range('NEW.')}; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_leave_intervals_delete AFTER DELETE ON leave_requests
+            BEGIN DELETE FROM leave_intervals WHERE id = OLD.id; END''',
+    ]),
+    (7, 'Giriş kuyruğundan aktarılan talepler için tekil kimlik', [
+        'ALTER TABLE leave_requests ADD COLUMN intake_id TEXT',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_leave_requests_intake ON leave_requests(intake_id) WHERE intake_id IS NOT NULL',
+    ]),
+    (8, 'Raporlama için izin kullanım özetleri', [
+        '''CREATE TABLE IF NOT EXISTS leave_usage_monthly (
+            employee_name TEXT NOT NULL, leave_type TEXT NOT NULL, month TEXT NOT NULL, status TEXT NOT NULL,
+            days INTEGER NOT NULL DEFAULT 0, requests INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_name, leave_type, month, status)) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS leave_usage_totals (
+            leave_type TEXT NOT NULL, month TEXT NOT NULL, status TEXT NOT NULL,
+            days INTEGER NOT NULL DEFAULT 0, requests INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, status, leave_type)) WITHOUT ROWID''',
+        _legacy_summary_rebuild,
+    ]),
+    (9, 'Çalışanların geçmişi silinmeden pasifleştirilmesi ve arşiv', [
+        'ALTER TABLE employees ADD COLUMN deleted_at TEXT',
+        # Arşivdeki en geç bitiş günü; tarih aralığı sorguları arşive gerektiğinde iner
+        "INSERT OR IGNORE INTO app_meta (key, value) VALUES ('archive_max_end', 0)",
+    ]),
+    (10, 'Tamsayı anahtarlı şema: employee_id, tür/durum tabloları, gün sayısı tarihler', [
+        'CREATE TABLE IF NOT EXISTS leave_types (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)',
+        'CREATE TABLE IF NOT EXISTS leave_statuses (id INTEGER PRIMARY KEY, code TEXT NOT NULL UNIQUE)',
+        "INSERT OR IGNORE INTO leave_types (id, name) VALUES (1, 'Yıllık İzin'), (2, 'Hastalık İzni'), (3, 'Mazeret İzni')",
+        "INSERT OR IGNORE INTO leave_statuses (id, code) VALUES (1, 'pending'), (2, 'approved'), (3, 'rejected')",
+        lambda conn: _normalize(conn),
+    ]),
+    (11, 'Değişiklik akışı (işveren panelinin canlı güncellemesi)', [
+        '''CREATE TABLE IF NOT EXISTS change_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP)''',
+        # Olaylar tetikleyicilerle yazılır (kuyruk boşaltıcı ve doğrudan SQL dahil);
+        # tablo son CHANGE_FEED_RETENTION olayla sınırlı tutulur
+        f'''CREATE TRIGGER IF NOT EXISTS trg_change_events_trim AFTER INSERT ON change_events
+           BEGIN DELETE FROM change_events WHERE id <= NEW.id - {CHANGE_FEED_RETENTION}; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_feed_leave_insert AFTER INSERT ON leave_requests
+           BEGIN INSERT INTO change_events (kind, payload)
+                 SELECT 'leave_created', json_object('id', NEW.id, 'employee_id', NEW.employee_id, 'employee_name', e.name,
+                        'leave_type', t.name, 'start_date', date(NEW.start_day * 86400, 'unixepoch'),
+                        'end_date', date(NEW.end_day * 86400, 'unixepoch'), 'status', s.code)
+                 FROM employees e, leave_types t, leave_statuses s
+                 WHERE e.id = NEW.employee_id AND t.id = NEW.leave_type_id AND s.id = NEW.status_id; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_feed_leave_status AFTER UPDATE OF status_id ON leave_requests
+           WHEN NEW.status_id IS NOT OLD.status_id
+           BEGIN INSERT INTO change_events (kind, payload)
+                 SELECT 'leave_status', json_object('id', NEW.id, 'status', s.code)
+                 FROM leave_statuses s WHERE s.id = NEW.status_id; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_feed_employee_insert AFTER INSERT ON employees
+           WHEN NEW.deleted_at IS NULL
+           BEGIN INSERT INTO change_events (kind, payload)
+                 VALUES ('employee_added', json_object('id', NEW.id, 'name', NEW.name,
+                         'annual_leave_days', NEW.annual_leave_days, 'used_leave_days', NEW.used_leave_days)); END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_feed_employee_update AFTER UPDATE OF name, annual_leave_days, used_leave_days ON employees
+           WHEN NEW.deleted_at IS NULL
+           BEGIN INSERT INTO change_events (kind, payload)
+                 VALUES ('employee_updated', json_object('id', NEW.id, 'name', NEW.name,
+                         'annual_leave_days', NEW.annual_leave_days, 'used_leave_days', NEW.used_leave_days)); END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_feed_employee_remove AFTER UPDATE OF deleted_at ON employees
+           WHEN OLD.deleted_at IS NULL AND NEW.deleted_at IS NOT NULL
+           BEGIN INSERT INTO change_events (kind, payload) VALUES ('employee_removed', json_object('id', NEW.id, 'name', NEW.name)); END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_feed_employee_delete AFTER DELETE ON employees
+           WHEN OLD.deleted_at IS NULL
+           BEGIN INSERT INTO change_events (kind, payload) VALUES ('employee_removed', json_object('id', OLD.id, 'name', OLD.name)); END''',
+    ]),
+    (12, 'Çalışan adı araması (FTS5 trigram, Türkçe katlama)', [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS employee_search USING fts5(folded, tokenize = 'trigram')",
+        # Yalnızca aktif çalışanlar aranır; pasifleştirilen çalışan dizinden çıkar
+        f'''INSERT INTO employee_search (rowid, folded)
+           SELECT id, {employee_search.replace_chain_sql('name', employee_search.TURKISH_FOLD_MAP)} FROM employees WHERE deleted_at IS NULL''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_search_employee_insert AFTER INSERT ON employees
+           WHEN NEW.deleted_at IS NULL
+           BEGIN INSERT INTO employee_search (rowid, folded) VALUES (NEW.id, {employee_search.replace_chain_sql('NEW.name', employee_search.TURKISH_FOLD_MAP)}); END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_search_employee_update AFTER UPDATE OF name, deleted_at ON employees
+           BEGIN DELETE FROM employee_search WHERE rowid = OLD.id;
+                 INSERT INTO employee_search (rowid, folded)
+                 SELECT NEW.id, {employee_search.replace_chain_sql('NEW.name', employee_search.TURKISH_FOLD_MAP)} WHERE NEW.deleted_at IS NULL; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_search_employee_delete AFTER DELETE ON employees
+           BEGIN DELETE FROM employee_search WHERE rowid = OLD.id; END''',
+    ]),
+    (13, 'Kıdeme göre yıllık izin hakkı (accrual.py)', [
+        # Son hesaplamadaki hizmet yılı; NULL ise çalışan henüz hesaplanmadı
+        'ALTER TABLE employees ADD COLUMN accrued_years INTEGER',
+        'ALTER TABLE employees ADD COLUMN carry_over_days INTEGER NOT NULL DEFAULT 0',
+        # Son çalıştırmada işlenmiş en büyük bakiye defteri kimliği
+        "INSERT OR IGNORE INTO app_meta (key, value) VALUES ('accrual_ledger_id', 0)",
+    ]),
+    (14, 'Elle girilen yıllık izin hakkı (yasal kademelerin yerine yıllık gün)', [
+        # Hizmet yılı başına gün; NULL ise hak kıdemden hesaplanır
+        'ALTER TABLE employees ADD COLUMN annual_leave_override INTEGER',
+        # Kıdem hesabının henüz dokunmadığı ve varsayılandan (20) farklı haklar elle girilmiştir
+        'UPDATE employees SET annual_leave_override = annual_leave_days WHERE accrued_years IS NULL AND annual_leave_days IS NOT 20',
+    ]),
+    (15, 'Çalışan adı araması: yabancı adlardaki Latin harfleri de katlanır', [
+        # employee_search.FOLD_MAP'in kopyası; id sırası uygulama sırasıdır
+        'CREATE TABLE IF NOT EXISTS search_fold_map (id INTEGER PRIMARY KEY, source TEXT NOT NULL, target TEXT NOT NULL)',
+        employee_search.store_fold_map,
+        'DROP TRIGGER IF EXISTS trg_search_employee_insert',
+        'DROP TRIGGER IF EXISTS trg_search_employee_update',
+        f'''CREATE TRIGGER trg_search_employee_insert AFTER INSERT ON employees
+           WHEN NEW.deleted_at IS NULL
+           BEGIN INSERT INTO employee_search (rowid, folded) VALUES (NEW.id, {employee_search.fold_sql('NEW.name')}); END''',
+        f'''CREATE TRIGGER trg_search_employee_update AFTER UPDATE OF name, deleted_at ON employees
+           BEGIN DELETE FROM employee_search WHERE rowid = OLD.id;
+                 INSERT INTO employee_search (rowid, folded)
+                 SELECT NEW.id, {employee_search.fold_sql('NEW.name')} WHERE NEW.deleted_at IS NULL; END''',
+        'DELETE FROM employee_search',
+        f'''INSERT INTO employee_search (rowid, folded)
+           SELECT id, {employee_search.fold_sql('name')} FROM employees WHERE deleted_at IS NULL''',
+    ]),
+    (16, 'Arşiv sürümü: her taşımada artar, panel ETag\'leri değişir', [
+        "INSERT OR IGNORE INTO app_meta (key, value) VALUES ('archive_version', 0)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _legacy_sources(conn):
+    """Ada dayalı eski talep tabloları (ana tablo ve varsa eski arşiv)."""
+    sources = ['main.leave_requests']
+    if any(row[1] == 'employee_name' for row in conn.execute('PRAGMA archive.table_info(leave_requests)')):
+        sources.append('archive.leave_requests')
+    return sources
+
+
+# archive.SCHEMA'nın göç 10'daki hali
+_V10_ARCHIVE_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS archive.leave_requests (
+        id INTEGER PRIMARY KEY, employee_id INTEGER NOT NULL, leave_type_id INTEGER NOT NULL, status_id INTEGER NOT NULL,
+        start_day INTEGER, end_day INTEGER, reason TEXT, request_date TEXT, intake_id TEXT,
+        archived_at TEXT DEFAULT CURRENT_TIMESTAMP)''',
+    'CREATE INDEX IF NOT EXISTS archive.idx_archive_employee_date ON leave_requests (employee_id, request_date)',
+    'CREATE INDEX IF NOT EXISTS archive.idx_archive_date ON leave_requests (request_date)',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS archive.leave_intervals USING rtree_i32(id, start_day, end_day)',
+)
+
+
+def _v10_ledger_backfill(conn):
+    """Onaylı yıllık izinler için açılış hareketleri ve bakiyeler (göç 10; kimliğe dayalı)."""
+    rows = conn.execute('''SELECT l.id, l.employee_id, l.start_day, l.end_day
+                           FROM leave_requests l CROSS JOIN leave_types t ON t.id = l.leave_type_id
+                           CROSS JOIN leave_statuses s ON s.id = l.status_id
+                           WHERE s.code = 'approved' AND t.name = 'Yıllık İzin' ''').fetchall()
+    conn.executemany('INSERT INTO leave_ledger (employee_id, leave_request_id, delta_days, reason) VALUES (?, ?, ?, ?)',
+                     [(employee_id, leave_id, _legacy_days(start, end), 'açılış')
+                      for leave_id, employee_id, start, end in rows if _legacy_days(start, end)])
+    total = 'SELECT COALESCE(SUM(delta_days), 0) FROM leave_ledger WHERE leave_ledger.employee_id = employees.id'
+    conn.execute(f'UPDATE employees SET used_leave_days = ({total}) WHERE used_leave_days IS NOT ({total})')
+
+
+def _v10_summary_rebuild(conn):
+    """Kullanım özetlerini sıcak tablo ve arşivin R*Tree aralıklarından hesaplar (göç 10; aylar YYYYAA)."""
+    conn.execute('''CREATE TEMP TABLE usage_calendar (
+        day INTEGER PRIMARY KEY, month INTEGER, month_end INTEGER, working INTEGER, cumulative INTEGER)''')
+    first, last = conn.execute('''SELECT MIN(first), MAX(last) FROM (
+        SELECT MIN(start_day) AS first, MAX(end_day) AS last FROM main.leave_intervals
+        UNION ALL SELECT MIN(start_day), MAX(end_day) FROM archive.leave_intervals)''').fetchone()
+    if first is not None:
+        rows = []
+        cumulative = 0
+        day = date((EPOCH + timedelta(days=first)).year, 1, 1)
+        end = date((EPOCH + timedelta(days=last)).year, 12, 31)
+        while day <= end:
+            working = working_days(day, day)
+            cumulative += working
+            next_month = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+            rows.append(((day - EPOCH).days, day.year * 100 + day.month, (next_month - EPOCH).days - 1,
+                         working, cumulative))
+            day += timedelta(days=1)
+        conn.executemany('INSERT INTO usage_calendar VALUES (?, ?, ?, ?, ?)', rows)
+    conn.execute('''
+        INSERT INTO leave_usage_monthly (employee_id, leave_type_id, month, status_id, days, requests)
+        WITH RECURSIVE segments (id, segment_start, end_day) AS (
+            SELECT id, start_day, end_day FROM main.leave_intervals
+            UNION ALL
+            SELECT id, start_day, end_day FROM archive.leave_intervals
+            UNION ALL
+            SELECT s.id, c.month_end + 1, s.end_day
+            FROM segments s JOIN usage_calendar c ON c.day = s.segment_start
+            WHERE c.month_end < s.end_day
+        )
+        SELECT COALESCE(h.employee_id, a.employee_id), COALESCE(h.leave_type_id, a.leave_type_id), first.month,
+               COALESCE(h.status_id, a.status_id),
+               SUM(last.cumulative - first.cumulative + first.working), COUNT(*)
+        FROM segments s
+        JOIN usage_calendar first ON first.day = s.segment_start
+        JOIN usage_calendar last ON last.day = MIN(s.end_day, first.month_end)
+        LEFT JOIN main.leave_requests h ON h.id = s.id
+        LEFT JOIN archive.leave_requests a ON a.id = s.id AND h.id IS NULL
+        WHERE h.id IS NOT NULL OR a.id IS NOT NULL
+        GROUP BY 1, 2, 3, 4''')
+    conn.execute('''INSERT INTO leave_usage_totals (leave_type_id, month, status_id, days, requests)
+                    SELECT leave_type_id, month, status_id, SUM(days), SUM(requests) FROM leave_usage_monthly
+                    GROUP BY leave_type_id, month, status_id''')
+    conn.execute('DROP TABLE temp.usage_calendar')
+
+
+def _normalize(conn):
+    sources = _legacy_sources(conn)
+    for source in sources:
+        conn.execute(f"INSERT OR IGNORE INTO leave_types (name) SELECT DISTINCT COALESCE(leave_type, '') FROM {source}")
+        conn.execute(f"INSERT OR IGNORE INTO leave_statuses (code) SELECT DISTINCT COALESCE(status, 'pending') FROM {source}")
+        # Çalışan kaydı olmayan talepler için geçmişi koruyan pasif çalışan kaydı
+        conn.execute(f'''INSERT OR IGNORE INTO employees (name, deleted_at)
+                         SELECT DISTINCT COALESCE(employee_name, ''), CURRENT_TIMESTAMP FROM {source}''')
+    conn.execute('''INSERT OR IGNORE INTO employees (name, deleted_at)
+                    SELECT DISTINCT employee_name, CURRENT_TIMESTAMP FROM leave_ledger''')
+
+    def converted(source):
+        return f'''SELECT l.id, e.id, t.id, s.id,
+                          CASE WHEN {_valid_range('l.')} THEN {_day('l.start_date')} END,
+                          CASE WHEN {_valid_range('l.')} THEN {_day('l.end_date')} END,
+                          l.reason, l.request_date, l.intake_id
+                   FROM {source} l
+                   JOIN employees e ON e.name = COALESCE(l.employee_name, '')
+                   JOIN leave_types t ON t.name = COALESCE(l.leave_type, '')
+                   JOIN leave_statuses s ON s.code = COALESCE(l.status, 'pending')'''
+
+    # leave_requests yeniden kurulur (SQLite sütun tipini/anahtarını ALTER ile değiştiremez)
+    # AUTOINCREMENT: silinen ya da arşive taşınan talebin kimliği yeniden verilmez
+    conn.execute('''CREATE TABLE leave_requests_v10 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id INTEGER NOT NULL REFERENCES employees (id) ON DELETE CASCADE,
+        leave_type_id INTEGER NOT NULL REFERENCES leave_types (id),
+        status_id INTEGER NOT NULL DEFAULT 1 REFERENCES leave_statuses (id),
+        start_day INTEGER, end_day INTEGER, reason TEXT,
+        request_date TEXT DEFAULT CURRENT_TIMESTAMP, intake_id TEXT)''')
+    conn.execute(f'INSERT INTO leave_requests_v10 {converted("main.leave_requests")}')
+    conn.execute('DROP TABLE leave_requests')
+    conn.execute('ALTER TABLE leave_requests_v10 RENAME TO leave_requests')
+    for statement in (
+            'CREATE INDEX idx_leave_requests_employee_date ON leave_requests (employee_id, request_date)',
+            'CREATE INDEX idx_leave_requests_status_date ON leave_requests (status_id, request_date)',
+            'CREATE INDEX idx_leave_requests_range ON leave_requests (start_day, end_day)',
+            'CREATE INDEX idx_leave_requests_date ON leave_requests (request_date)',
+            'CREATE UNIQUE INDEX idx_leave_requests_intake ON leave_requests (intake_id) WHERE intake_id IS NOT NULL',
+            # R*Tree içeriği (kimlik ve gün sayıları) değişmez; tetikleyiciler yeni sütunlarla kurulur
+            '''CREATE TRIGGER trg_leave_intervals_insert AFTER INSERT ON leave_requests
+               WHEN NEW.start_day IS NOT NULL AND NEW.end_day >= NEW.start_day
+               BEGIN INSERT INTO leave_intervals (id, start_day, end_day) VALUES (NEW.id, NEW.start_day, NEW.end_day); END''',
+            '''CREATE TRIGGER trg_leave_intervals_update AFTER UPDATE OF start_day, end_day ON leave_requests
+               BEGIN DELETE FROM leave_intervals WHERE id = OLD.id;
+                     INSERT INTO leave_intervals (id, start_day, end_day)
+                     SELECT NEW.id, NEW.start_day, NEW.end_day WHERE NEW.start_day IS NOT NULL AND NEW.end_day >= NEW.start_day; END''',
+            '''CREATE TRIGGER trg_leave_intervals_delete AFTER DELETE ON leave_requests
+               BEGIN DELETE FROM leave_intervals WHERE id = OLD.id; END'''):
+        conn.execute(statement)
+
+    if 'archive.leave_requests' in sources:
+        conn.execute('''CREATE TABLE archive.leave_requests_v10 (
+            id INTEGER PRIMARY KEY, employee_id INTEGER NOT NULL, leave_type_id INTEGER NOT NULL, status_id INTEGER NOT NULL,
+            start_day INTEGER, end_day INTEGER, reason TEXT, request_date TEXT, intake_id TEXT,
+            archived_at TEXT DEFAULT CURRENT_TIMESTAMP)''')
+        conn.execute(f'''INSERT INTO archive.leave_requests_v10
+                         SELECT c.*, l.archived_at FROM ({converted("archive.leave_requests")}) c
+                         JOIN archive.leave_requests l ON l.id = c.id''')
+        conn.execute('DROP TABLE archive.leave_requests')
+        conn.execute('ALTER TABLE archive.leave_requests_v10 RENAME TO leave_requests')
+        for statement in _V10_ARCHIVE_SCHEMA:
+            conn.execute(statement)
+    # Arşive taşınmış kimlikler de yeniden verilmez
+    conn.execute("DELETE FROM main.sqlite_sequence WHERE name = 'leave_requests'")
+    conn.execute('''INSERT INTO main.sqlite_sequence (name, seq)
+                    SELECT 'leave_requests', MAX((SELECT COALESCE(MAX(id), 0) FROM main.leave_requests),
+                                                 (SELECT COALESCE(MAX(id), 0) FROM archive.leave_requests))''')
+
+    conn.execute('''CREATE TABLE leave_ledger_v10 (
+        id INTEGER PRIMARY KEY,
+        employee_id INTEGER NOT NULL REFERENCES employees (id) ON DELETE CASCADE,
+        leave_request_id INTEGER, delta_days INTEGER NOT NULL, reason TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP)''')
+    conn.execute('''INSERT INTO leave_ledger_v10 (id, employee_id, leave_request_id, delta_days, reason, created_at)
+                    SELECT g.id, e.id, g.leave_request_id, g.delta_days, g.reason, g.created_at
+                    FROM leave_ledger g JOIN employees e ON e.name = g.employee_name''')
+    conn.execute('DROP TABLE leave_ledger')
+    conn.execute('ALTER TABLE leave_ledger_v10 RENAME TO leave_ledger')
+    conn.execute('CREATE INDEX idx_leave_ledger_employee ON leave_ledger (employee_id)')
+    conn.execute('CREATE INDEX idx_leave_ledger_request ON leave_ledger (leave_request_id)')
+    if conn.execute('SELECT 1 FROM leave_ledger LIMIT 1').fetchone() is None:
+        _v10_ledger_backfill(conn)
+
+    conn.execute('DROP TABLE leave_usage_monthly')
+    conn.execute('DROP TABLE leave_usage_totals')
+    conn.execute('''CREATE TABLE leave_usage_monthly (
+        employee_id INTEGER NOT NULL REFERENCES employees (id) ON DELETE CASCADE,
+        leave_type_id INTEGER NOT NULL, month INTEGER NOT NULL, status_id INTEGER NOT NULL,
+        days INTEGER NOT NULL DEFAULT 0, requests INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (employee_id, leave_type_id, month, status_id)) WITHOUT ROWID''')
+    conn.execute('''CREATE TABLE leave_usage_totals (
+        leave_type_id INTEGER NOT NULL, month INTEGER NOT NULL, status_id INTEGER NOT NULL,
+        days INTEGER NOT NULL DEFAULT 0, requests INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, status_id, leave_type_id)) WITHOUT ROWID''')
+    _v10_summary_rebuild(conn)
+    conn.execute('ANALYZE')
+
+
+def _ensure_version_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY, description TEXT,
+        applied_at TEXT DEFAULT CURRENT_TIMESTAMP)''')
+
+
+def current_version(conn):
+    row = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone()
+    if row is None:
+        return 0
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Bekleyen göçleri uygular, uygulanan sürümlerin listesini döndürür.
+
+    Bağlantı autocommit (isolation_level=None) modunda olmalıdır.
+    """
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if version > target:
+            break
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            _ensure_version_table(conn)
+            # Yazma kilidi alındıktan sonra tekrar kontrol: aynı anda açılan
+            # başka bir worker bu göçü uygulamış olabilir
+            if current_version(conn) >= version:
+                conn.execute('COMMIT')
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (version, description))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        applied.append(version)
+    # Worker'ların ucuz sürüm kontrolü (PRAGMA user_version) için
+    version = current_version(conn)
+    if conn.execute('PRAGMA user_version').fetchone()[0] != version:
+        conn.execute(f'PRAGMA user_version = {version}')
+    return applied
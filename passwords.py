@@ -0,0 +1,226 @@
+"""
+Şifre özetleri ve giriş denemesi sınırları
+
+Şifreler tuzlu scrypt ile saklanır: scrypt$n$r$p$tuz$özet (base64). scrypt
+bulunmayan Python derlemelerinde PBKDF2-SHA256 kullanılır. Eski, tuzsuz
+SHA-256 özetleri (64 onaltılık karakter) hâlâ doğrulanır ve başarılı girişte
+yeni biçime çevrilir.
+
+Bir özet onlarca milisaniye işlemci harcar. Giriş istekleri bunu worker
+iş parçacığında değil, boyutu sınırlı bir havuzda (HashingExecutor) yapar;
+havuz ve kuyruğu doluysa istek beklemeden HashingBusy ile geri çevrilir.
+LoginThrottle aynı IP'den ve aynı IP'den aynı hesaba yapılan başarısız
+denemeleri sınırlar. Hesap sınırı IP'ye bağlıdır: çalışan adları herkese
+açık aramadan öğrenilebildiğinden, yalnızca hesaba bağlı bir kilit tek bir
+istemcinin bütün hesapları (işveren dahil) sürekli kilitlemesine izin
+verirdi. Sayaçlar süreç içindedir (her gunicorn worker'ı ayrı sayar).
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# scrypt: n=2^14, r=8 -> özet başına ~16 MB bellek
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+HASH_WORKERS = int(os.environ.get('IZIN_HASH_WORKERS', '2'))
+# Çalışan özetlerin yanında sırada bekleyebilecek en fazla istek
+HASH_QUEUE = int(os.environ.get('IZIN_HASH_QUEUE', '16'))
+HASH_TIMEOUT = float(os.environ.get('IZIN_LOGIN_TIMEOUT', '5'))
+
+# Kayan pencerede (saniye) izin verilen başarısız deneme sayıları
+LOGIN_WINDOW = 300
+IP_FAILURE_LIMIT = 20
+# (hesap, IP) çifti başına
+ACCOUNT_FAILURE_LIMIT = 5
+
+HAS_SCRYPT = hasattr(hashlib, 'scrypt')
+
+
+class HashingBusy(RuntimeError):
+    """Özet havuzu ve kuyruğu dolu; istek sonra tekrarlanmalı."""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=KEY_BYTES)
+
+
+def hash_password(password):
+    """Yeni tuzlu özet (veritabanına yazılacak metin)."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    if HAS_SCRYPT:
+        key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f'scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}'
+    key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS, KEY_BYTES)
+    return f'pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(key)}'
+
+
+def is_legacy(stored):
+    return len(stored) == 64 and all(c in '0123456789abcdef' for c in stored)
+
+
+def needs_rehash(stored):
+    """Eski biçim ya da güncel olmayan parametrelerle saklanmış özet."""
+    if HAS_SCRYPT:
+        return stored.split('$')[:4] != ['scrypt', str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return stored.split('$')[:2] != ['pbkdf2_sha256', str(PBKDF2_ITERATIONS)]
+
+
+def verify_password(password, stored):
+    """Şifre özetle eşleşiyor mu (sabit sürede karşılaştırılır)."""
+    if not stored:
+        return False
+    if is_legacy(stored):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            salt, expected = base64.b64decode(parts[4]), base64.b64decode(parts[5])
+            key = _scrypt(password, salt, int(parts[1]), int(parts[2]), int(parts[3]))
+        elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            salt, expected = base64.b64decode(parts[2]), base64.b64decode(parts[3])
+            key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, int(parts[1]), len(expected))
+        else:
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(key, expected)
+
+
+# Bilinmeyen kullanıcı adında da aynı iş yapılır; süre farkından hesap varlığı anlaşılmaz
+_DUMMY_HASH = None
+
+
+def _dummy_hash():
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_password(secrets.token_hex(8))
+    return _DUMMY_HASH
+
+
+def check(password, stored):
+    """verify_password(); kayıt yoksa (stored None) sahte özetle aynı süre harcanıp False döner."""
+    if stored is None:
+        verify_password(password or '', _dummy_hash())
+        return False
+    return verify_password(password or '', stored)
+
+
+class HashingExecutor:
+    """Sınırlı sayıda iş parçacığı ve sınırlı kuyruk; hashlib özet sırasında GIL'i bırakır."""
+
+    def __init__(self, workers=HASH_WORKERS, queue_size=HASH_QUEUE, timeout=HASH_TIMEOUT):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.stats = {'completed': 0, 'rejected': 0}
+
+    def _pool(self):
+        # gunicorn --preload: ebeveynin iş parçacıkları fork sonrası yoktur
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def run(self, fn, *args):
+        """fn(*args) sonucunu havuzda hesaplar; yer yoksa ya da süre dolarsa HashingBusy."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats['rejected'] += 1
+            raise HashingBusy()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._finished(None)
+            raise
+        # Yer iş gerçekten bitince (ya da kuyruktan iptal edilince) boşalır;
+        # zaman aşımında hâlâ çalışan özet yerini tutmaya devam eder
+        future.add_done_callback(self._finished)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # 3.11 öncesinde concurrent.futures.TimeoutError yerleşik TimeoutError değildir
+            future.cancel()
+            with self._lock:
+                self.stats['rejected'] += 1
+            raise HashingBusy()
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled():
+                self.stats['completed'] += 1
+        self._slots.release()
+
+    def pending(self):
+        return self._pending
+
+
+class LoginThrottle:
+    """Anahtar (IP ya da hesap ve IP) başına kayan pencerede başarısız deneme sınırı."""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._failures = {}
+        self._lock = threading.Lock()
+        self.blocked_total = 0
+
+    def _recent(self, key, now):
+        # Kilit altında çağrılır
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, key):
+        """Anahtar engelliyse beklenecek saniye, değilse 0."""
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None or len(failures) < self.limit:
+                return 0
+            self.blocked_total += 1
+            return max(1, int(failures[0] + self.window - now) + 1)
+
+    def failed(self, key):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now) or self._failures.setdefault(key, deque())
+            failures.append(now)
+            if len(self._failures) > 100000:
+                # Çok sayıda farklı anahtarla bellek şişirilemez
+                self._failures.clear()
+
+    def succeeded(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
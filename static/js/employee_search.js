@@ -0,0 +1,69 @@
+// Çalışan adı önerileri: data-employee-search özniteliği taşıyan kutular
+// yazmaya ara verildiğinde özniteliğin adresindeki (site önekli /api/employees/search)
+// sonuçlarla datalist'i doldurur.
+// Listeden bir ad seçilince kutu 'employee-picked' olayını yayar.
+(function () {
+    const DELAY_MS = 200;
+    const MIN_LENGTH = 2;
+
+    function attach(input) {
+        const list = document.getElementById(input.getAttribute('list'));
+        const site = input.form && input.form.elements.site;
+        let timer = null;
+        let lastQuery = '';
+        let controller = null;
+        let names = new Set();
+
+        function render(employees) {
+            names = new Set(employees.map(employee => employee.name));
+            list.replaceChildren(...employees.map(employee => {
+                const option = document.createElement('option');
+                option.value = employee.name;
+                return option;
+            }));
+        }
+
+        function lookup(query) {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            // Giriş ekranında site seçiliyse arama o sitenin çalışanlarında yapılır
+            const url = (input.dataset.employeeSearch || '/api/employees/search') + '?q=' + encodeURIComponent(query) +
+                (site ? '&site=' + encodeURIComponent(site.value) : '');
+            fetch(url, {signal: controller.signal})
+            .then(response => response.json())
+            .then(result => render(result.employees || []))
+            .catch(error => {
+                if (error.name !== 'AbortError') console.error('Error:', error);
+            });
+        }
+
+        if (site) {
+            site.addEventListener('change', () => {
+                render([]);
+                lastQuery = '';
+            });
+        }
+
+        input.addEventListener('input', () => {
+            const query = input.value.trim();
+            if (names.has(input.value)) {
+                // Tarayıcı listeden seçilen adı kutuya yazdı
+                input.dispatchEvent(new CustomEvent('employee-picked', {detail: input.value}));
+                return;
+            }
+            clearTimeout(timer);
+            if (query.length < MIN_LENGTH) {
+                render([]);
+                lastQuery = '';
+                return;
+            }
+            if (query === lastQuery) return;
+            timer = setTimeout(() => {
+                lastQuery = query;
+                lookup(query);
+            }, DELAY_MS);
+        });
+    }
+
+    document.querySelectorAll('input[data-employee-search]').forEach(attach);
+})();
@@ -0,0 +1,213 @@
+// İşveren paneli: toplu onay/ret, çalışan işlemleri ve canlı güncellemeler (SSE)
+function showMessage(ok, text) {
+    const box = document.getElementById('liveMessage');
+    box.className = 'alert alert-' + (ok ? 'success' : 'danger');
+    box.textContent = text;
+}
+
+// Form verisini JSON yanıt bekleyerek gönderir; tablolar canlı akışla güncellenir
+function postForm(url, body) {
+    return fetch(url, {method: 'POST', body: body, headers: {'Accept': 'application/json'}})
+    .then(response => response.json())
+    .then(result => {
+        showMessage(result.ok, result.message);
+        return result;
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showMessage(false, 'İşlem sırasında bir hata oluştu: ' + error);
+        return {ok: false};
+    });
+}
+
+function renameEmployee(row) {
+    const newName = prompt('Yeni ad:', row.dataset.name);
+    if (!newName || newName.trim() === row.dataset.name) return;
+    const body = new URLSearchParams();
+    body.append('employee_id', row.dataset.id);
+    body.append('name', newName.trim());
+    postForm(FEED.urls.rename, body);
+}
+
+function deleteEmployee(row) {
+    if (confirm(row.dataset.name + ' isimli çalışanı silmek istediğinize emin misiniz? Bu işlem geri alınamaz!')) {
+        const body = new URLSearchParams();
+        body.append('employee_id', row.dataset.id);
+        postForm(FEED.urls.delete, body).then(result => {
+            if (result.ok) removeEmployee(row.dataset.id);
+        });
+    }
+}
+
+const BADGES = {'approved': ['success', '✅ Onaylandı'], 'rejected': ['danger', '❌ Reddedildi'], 'pending': ['warning', '⏳ Beklemede']};
+
+document.getElementById('selectAll').addEventListener('change', function() {
+    document.querySelectorAll('.leave-select').forEach(box => { box.checked = this.checked; });
+});
+
+function batchUpdate(status) {
+    const ids = Array.from(document.querySelectorAll('.leave-select:checked')).map(box => box.value);
+    if (!ids.length) {
+        alert('Önce talep seçin.');
+        return;
+    }
+    const body = new URLSearchParams();
+    body.append('status', status);
+    ids.forEach(id => body.append('leave_ids', id));
+    fetch(FEED.urls.batch, {method: 'POST', body: body})
+    .then(response => response.json())
+    .then(summary => {
+        if (summary.error) {
+            alert(summary.error);
+            return;
+        }
+        // Satırlar sayfa yenilenmeden yerinde güncellenir
+        summary.updated.forEach(id => markStatus(id, summary.status));
+        document.getElementById('selectAll').checked = false;
+        document.getElementById('batchResult').textContent = summary.updated.length + ' talep güncellendi' +
+            (summary.not_found.length ? ', ' + summary.not_found.length + ' talep bulunamadı' : '');
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('İşlem sırasında bir hata oluştu: ' + error);
+    });
+}
+
+document.getElementById('addEmployeeForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const form = this;
+    const submitBtn = document.getElementById('submitBtn');
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status"></span> Ekleniyor...';
+    postForm(form.action, new URLSearchParams(new FormData(form))).then(result => {
+        if (result.ok) form.reset();
+        submitBtn.disabled = false;
+        submitBtn.textContent = 'Ekle';
+    });
+});
+
+function badgeHtml(status) {
+    const badge = BADGES[status] || ['secondary', status];
+    const span = document.createElement('span');
+    span.className = 'badge bg-' + badge[0];
+    span.textContent = badge[1];
+    return span;
+}
+
+function markStatus(id, status) {
+    const row = document.getElementById('leave-' + id);
+    if (!row) return;
+    row.querySelector('.leave-status').replaceChildren(badgeHtml(status));
+    if (status !== 'pending') {
+        row.querySelector('.leave-actions').innerHTML = '';
+        row.querySelector('td').innerHTML = '';
+    }
+}
+
+function setCount(delta) {
+    const count = document.getElementById('employeeCount');
+    count.textContent = Math.max(0, parseInt(count.textContent, 10) + delta);
+}
+
+function fillEmployee(row, employee) {
+    row.id = 'emp-' + employee.id;
+    row.dataset.id = employee.id;
+    row.dataset.name = employee.name;
+    row.querySelector('.emp-name').textContent = employee.name;
+    row.querySelector('.emp-annual').textContent = employee.annual_leave_days;
+    row.querySelector('.emp-used').textContent = employee.used_leave_days;
+    row.querySelector('.emp-remaining').textContent = employee.annual_leave_days - employee.used_leave_days;
+}
+
+function removeEmployee(id) {
+    const row = document.getElementById('emp-' + id);
+    if (!row) return;
+    row.remove();
+    setCount(-1);
+    // Talepleri arşive taşındı
+    document.querySelectorAll('#leaveRows tr[data-employee-id="' + id + '"]').forEach(leave => leave.remove());
+}
+
+// Sayfadaki filtreler (canlı gelen yeni talep yalnızca bunlara uyuyorsa eklenir) ve
+// site önekini (/s/<site>) içeren uç nokta adresleri
+const FEED = JSON.parse(document.getElementById('panelData').textContent);
+
+function matchesFilters(leave) {
+    const f = FEED.filters;
+    return FEED.firstPage
+        && (f.status === 'all' || f.status === leave.status)
+        && (!f.employee || f.employee === leave.employee_name)
+        && (!f.leave_type || f.leave_type === leave.leave_type)
+        && (!f.date_from || leave.end_date >= f.date_from)
+        && (!f.date_to || leave.start_date <= f.date_to);
+}
+
+const HANDLERS = {
+    leave_created(leave) {
+        if (document.getElementById('leave-' + leave.id) || !matchesFilters(leave)) return;
+        const row = document.getElementById('leaveRowTemplate').content.firstElementChild.cloneNode(true);
+        row.id = 'leave-' + leave.id;
+        row.dataset.employeeId = leave.employee_id;
+        row.querySelector('.leave-select').value = leave.id;
+        row.querySelector('.leave-employee').textContent = leave.employee_name;
+        row.querySelector('.leave-type').textContent = leave.leave_type;
+        row.querySelector('.leave-dates').textContent = leave.start_date + ' - ' + leave.end_date;
+        row.querySelector('.leave-status').replaceChildren(badgeHtml(leave.status));
+        row.querySelectorAll('input[name="leave_id"]').forEach(input => { input.value = leave.id; });
+        const rows = document.getElementById('leaveRows');
+        rows.querySelectorAll('.empty-row').forEach(empty => empty.remove());
+        rows.prepend(row);
+    },
+    leave_status(leave) {
+        markStatus(leave.id, leave.status);
+    },
+    employee_added(employee) {
+        if (document.getElementById('emp-' + employee.id)) return;
+        setCount(1);
+        // Ada göre sıralı sayfada yerine eklenir; sonraki sayfaya düşüyorsa eklenmez
+        const rows = document.getElementById('employeeRows');
+        const before = Array.from(rows.querySelectorAll('tr[data-name]')).find(row => row.dataset.name > employee.name);
+        if (!before && !FEED.lastEmployeePage) return;
+        const row = document.getElementById('employeeRowTemplate').content.firstElementChild.cloneNode(true);
+        fillEmployee(row, employee);
+        rows.querySelectorAll('.empty-row').forEach(empty => empty.remove());
+        rows.insertBefore(row, before || null);
+    },
+    employee_updated(employee) {
+        const row = document.getElementById('emp-' + employee.id);
+        if (row) fillEmployee(row, employee);
+        document.querySelectorAll('#leaveRows tr[data-employee-id="' + employee.id + '"] .leave-employee')
+            .forEach(cell => { cell.textContent = employee.name; });
+    },
+    employee_removed(employee) {
+        removeEmployee(employee.id);
+    },
+    reset() {
+        window.location.reload();
+    },
+};
+
+// Aramada bir çalışan seçilince o çalışanın tüm geçmişi listelenir
+document.getElementById('employeeFilter').addEventListener('employee-picked', event => {
+    const form = event.target.form;
+    form.elements.status.value = 'all';
+    form.submit();
+});
+
+if (window.EventSource) {
+    const source = new EventSource(FEED.urls.events + '?after=' + FEED.after);
+    const liveStatus = document.getElementById('liveStatus');
+    Object.entries(HANDLERS).forEach(([kind, handler]) => {
+        source.addEventListener(kind, event => handler(JSON.parse(event.data)));
+    });
+    // Sunucu akışı düzenli olarak kapatır (uzun yoklama); kısa kopukluklar gösterilmez
+    let reconnecting = null;
+    source.onopen = () => {
+        clearTimeout(reconnecting);
+        liveStatus.textContent = '🟢 Canlı';
+    };
+    source.onerror = () => {
+        clearTimeout(reconnecting);
+        reconnecting = setTimeout(() => { liveStatus.textContent = '⚪ Yeniden bağlanıyor...'; }, 5000);
+    };
+}
@@ -0,0 +1,108 @@
+"""
+Sürümlü statik dosyalar
+
+Şablonlar dosyaları asset_url() ile bağlar; adres içeriğin özetini taşır
+(/static/css/app.css?v=3f2a...). İçerik değişince adres de değiştiği için
+tarayıcı dosyayı bir yıl önbellekte tutabilir (immutable).
+
+Bootstrap static/vendor altından sunulur; dosyalar yoksa (henüz
+`flask --app app fetch-assets` çalıştırılmadıysa) CDN adresine düşülür ve
+bağlantıya integrity= (SRI) özeti eklenir. fetch-assets indirdiği dosyayı
+aynı özetle doğrular; tutmayan dosya yazılmaz.
+"""
+
+import base64
+import hashlib
+import os
+import urllib.request
+
+FAR_FUTURE = 365 * 24 * 3600
+
+BOOTSTRAP_VERSION = '5.1.3'
+# {yol: (CDN adresi, SRI özeti)}; özetler Bootstrap'in bu sürüm için yayımladığı integrity= değerleridir
+VENDOR_FILES = {
+    'vendor/bootstrap/bootstrap.min.css': (
+        f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/css/bootstrap.min.css',
+        'sha384-1BmE4kWBq78iYhFldvKuhfTAU6auU8tT94WrHftjDbrCEXSU1oBoqyl2QvZ6jIW3'),
+    'vendor/bootstrap/bootstrap.bundle.min.js': (
+        f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/js/bootstrap.bundle.min.js',
+        'sha384-ka7Sk0Gln4gmtz2MlQnikT1wXgYsOg+OMhuP+IlRH9sENBO0LRn5q+8nbTov4+1p'),
+}
+
+
+class VendorIntegrityError(RuntimeError):
+    """İndirilen dosyanın özeti VENDOR_FILES'taki SRI özetiyle tutmuyor."""
+
+
+class AssetVersions:
+    def __init__(self, static_folder, static_url_path='/static'):
+        self.static_folder = static_folder
+        self.static_url_path = static_url_path
+        self.versions = {}
+        self.refresh()
+
+    def refresh(self):
+        """Statik dosyaların içerik özetlerini hesaplar (başlangıçta bir kez)."""
+        self.versions = digest_tree(self.static_folder)
+
+    def url(self, filename):
+        version = self.versions.get(filename)
+        if version is None:
+            # Yerelde olmayan üçüncü parti dosya: CDN
+            return VENDOR_FILES[filename][0] if filename in VENDOR_FILES else f'{self.static_url_path}/{filename}'
+        return f'{self.static_url_path}/{filename}?v={version}'
+
+    def integrity(self, filename):
+        """CDN'den sunulan dosyanın SRI özeti; yerel dosyada None."""
+        if filename in self.versions or filename not in VENDOR_FILES:
+            return None
+        return VENDOR_FILES[filename][1]
+
+    def is_current(self, filename, version):
+        return version is not None and self.versions.get(filename) == version
+
+
+def digest_tree(folder):
+    """{göreli yol: içerik özeti} (dizin yoksa boş)."""
+    digests = {}
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            digests[os.path.relpath(path, folder).replace(os.sep, '/')] = digest
+    return digests
+
+
+def build_id(*folders):
+    """Dizinlerdeki bütün dosyaların birleşik özeti; dağıtım değişince sayfa ETag'leri de değişir."""
+    return hashlib.sha256(repr([sorted(digest_tree(folder).items()) for folder in folders]).encode()).hexdigest()[:12]
+
+
+def sri_digest(data):
+    """integrity= özniteliği biçiminde SHA-384 özeti."""
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+def fetch_vendor(static_folder, timeout=30):
+    """Bootstrap dosyalarını static/vendor altına indirir; yazılan yolları döndürür.
+
+    Dosyalar önce indirilip doğrulanır; biri tutmazsa hiçbiri yazılmaz (VendorIntegrityError).
+    """
+    downloads = {}
+    for filename, (url, expected) in VENDOR_FILES.items():
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = response.read()
+        actual = sri_digest(data)
+        if actual != expected:
+            raise VendorIntegrityError(f'{url}: beklenen {expected}, gelen {actual}')
+        downloads[filename] = data
+    written = []
+    for filename, data in downloads.items():
+        path = os.path.join(static_folder, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+        written.append(path)
+    return written
@@ -0,0 +1,197 @@
+"""
+Çoklu site: her site için ayrı SQLite veritabanı
+
+Siteler IZIN_SITES_FILE ile verilen JSON dosyasında tanımlanır:
+
+    {"gunkent": {"name": "Günkent Sitesi", "db_path": "sites/gunkent.db"},
+     "yesilvadi": {"name": "Yeşilvadi Sitesi", "db_path": "sites/yesilvadi.db"}}
+
+Göreli yollar dosyanın bulunduğu dizine göredir; isteğe bağlı archive_path
+verilmezse arşiv, veritabanının yanında durur. Dosya tanımlı değilse tek bir
+site vardır (IZIN_DB_PATH, varsayılan secure_izin.db) ve davranış eskisi
+gibidir.
+
+Her sitenin yazmaları kendi dosyasının kilidini bekler; bir sitedeki yoğunluk
+diğerlerini durdurmaz. Açık veritabanı nesneleri DatabasePool'da en son
+kullanılana göre sınırlı tutulur (IZIN_SITE_POOL_SIZE); kullanımda olan bir
+nesne kapatılmaz, boşa çıkınca sıradan düşer.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from instrumentation import logger
+
+DEFAULT_SITE = 'default'
+DEFAULT_SITE_NAME = 'Günkent Sitesi'
+POOL_SIZE = int(os.environ.get('IZIN_SITE_POOL_SIZE', '32'))
+# Siteler arası raporda aynı anda sorgulanan en fazla site
+REPORT_WORKERS = 8
+# Yol öneki: /s/<site>/employer_panel
+PATH_PREFIX = '/s/'
+
+Site = namedtuple('Site', 'slug name db_path archive_path')
+
+
+class UnknownSiteError(LookupError):
+    pass
+
+
+def load_sites(path=None):
+    """{kısa ad: Site} sözlüğü; ilk tanımlanan site varsayılandır."""
+    path = path or os.environ.get('IZIN_SITES_FILE')
+    if not path:
+        return {DEFAULT_SITE: Site(DEFAULT_SITE, DEFAULT_SITE_NAME, os.environ.get('IZIN_DB_PATH', 'secure_izin.db'),
+                                   os.environ.get('IZIN_ARCHIVE_PATH'))}
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    sites = {}
+    for slug, entry in entries.items():
+        if not slug.isidentifier() or slug != slug.lower():
+            raise ValueError(f'Geçersiz site adı: {slug!r} (küçük harf, rakam ve _)')
+        archive_path = entry.get('archive_path')
+        sites[slug] = Site(slug, entry.get('name', slug), os.path.join(base, entry['db_path']),
+                           os.path.join(base, archive_path) if archive_path else None)
+    if not sites:
+        raise ValueError(f'{path}: hiç site tanımlanmamış')
+    return sites
+
+
+def site_from_host(sites, host):
+    """Alt alan adından site: gunkent.izin.example.com -> gunkent."""
+    host = (host or '').split(':')[0].lower()
+    label = host.split('.')[0]
+    return label if label in sites and host.count('.') >= 2 else None
+
+
+class SitePrefixMiddleware:
+    """/s/<site>/... adreslerinde öneki SCRIPT_NAME'e taşır; url_for önekli adres üretir."""
+
+    def __init__(self, app, sites):
+        self.app = app
+        self.sites = sites
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(PATH_PREFIX):
+            slug, _, rest = path[len(PATH_PREFIX):].partition('/')
+            if slug in self.sites:
+                environ['izin.site'] = slug
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + PATH_PREFIX + slug
+                environ['PATH_INFO'] = '/' + rest
+        return self.app(environ, start_response)
+
+
+class DatabasePool:
+    """Site başına tek veritabanı nesnesi; en son kullanılana göre sınırlı (LRU).
+
+    acquire() ile alınan nesne release() edilene kadar kapatılmaz. Kapasite
+    aşıldığında boşta olan en eski nesneler kapatılır; hepsi kullanımdaysa
+    sınır geçici olarak aşılır.
+    """
+
+    def __init__(self, sites, factory, capacity=POOL_SIZE):
+        self.sites = sites
+        self.factory = factory
+        self.capacity = max(1, capacity)
+        self._handles = OrderedDict()
+        self._leases = {}
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'evicted': 0}
+
+    def acquire(self, slug):
+        site = self.sites.get(slug)
+        if site is None:
+            raise UnknownSiteError(slug)
+        with self._lock:
+            handle = self._handles.get(slug)
+            if handle is None:
+                handle = self._handles[slug] = self.factory(site)
+                self.stats['opened'] += 1
+            self._handles.move_to_end(slug)
+            self._leases[slug] = self._leases.get(slug, 0) + 1
+            idle = self._evict()
+        self._close(idle)
+        return handle
+
+    def release(self, slug):
+        with self._lock:
+            self._leases[slug] -= 1
+            idle = self._evict()
+        self._close(idle)
+
+    def pin(self, slug):
+        """Süreç boyunca açık kalacak nesne (CLI ve arka plan iş parçacıkları için)."""
+        with self._lock:
+            if slug in self._pinned:
+                return self._handles[slug]
+        handle = self.acquire(slug)
+        with self._lock:
+            self._pinned.add(slug)
+        return handle
+
+    @contextmanager
+    def lease(self, slug):
+        handle = self.acquire(slug)
+        try:
+            yield handle
+        finally:
+            self.release(slug)
+
+    def _evict(self):
+        # Kilit altında çağrılır; kapatılacak nesneleri döndürür
+        idle = []
+        for slug in list(self._handles):
+            if len(self._handles) - len(idle) <= self.capacity:
+                break
+            if not self._leases.get(slug):
+                idle.append(self._handles.pop(slug))
+                self._leases.pop(slug, None)
+        self.stats['evicted'] += len(idle)
+        return idle
+
+    @staticmethod
+    def _close(handles):
+        for handle in handles:
+            handle.close()
+
+    def open_handles(self):
+        with self._lock:
+            return list(self._handles.values())
+
+    def close_all(self):
+        with self._lock:
+            handles = list(self._handles.values())
+        self._close(handles)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def fan_out(pool, fn, slugs=None):
+    """fn(veritabanı, site) çağrısını sitelerde paralel çalıştırır: {site: sonuç}.
+
+    Hata veren site sonucu {'error': ...} olur; rapor diğer sitelerle tamamlanır.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='site-report')
+
+    def run(slug):
+        try:
+            with pool.lease(slug) as handle:
+                return fn(handle, pool.sites[slug])
+        except Exception as e:
+            logger.exception('Site sorgulanamadı: %s', slug)
+            return {'error': str(e)}
+
+    slugs = list(slugs or pool.sites)
+    return dict(zip(slugs, _executor.map(run, slugs)))
@@ -0,0 +1,33 @@
+"""Sık çalışan sorguların (app.HOT_QUERIES) indeks kullandığını denetler."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+class QueryPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = app.SecureDatabase(os.path.join(self.directory.name, 'plans.db'))
+        self.db.bootstrap()
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_hot_queries_use_indexes(self):
+        self.assertEqual(self.db.explain_hot_queries(), {})
+
+    def test_missing_index_is_reported(self):
+        with self.db.transaction() as conn:
+            conn.execute('DROP INDEX idx_leave_requests_employee_date')
+        self.assertIn('iter_employee_leaves', self.db.explain_hot_queries())
+
+
+if __name__ == '__main__':
+    unittest.main()
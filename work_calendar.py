@@ -0,0 +1,118 @@
+"""
+Çalışma günü takvimi (Türkiye)
+
+Her yıl için bir kez, yılın her günü için birikimli iş günü sayısını tutan
+bir dizi hesaplanır. Böylece iki tarih arasındaki iş günü sayısı gün gün
+döngü kurmadan, iki dizi okumasıyla bulunur.
+"""
+
+import logging
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+
+logger = logging.getLogger('izin')
+
+# Pazartesi-Cuma
+WORKING_WEEKDAYS = frozenset(range(5))
+
+# Sabit tarihli resmi tatiller (ay, gün)
+FIXED_HOLIDAYS = [
+    (1, 1),    # Yılbaşı
+    (4, 23),   # Ulusal Egemenlik ve Çocuk Bayramı
+    (5, 1),    # Emek ve Dayanışma Günü
+    (5, 19),   # Atatürk'ü Anma, Gençlik ve Spor Bayramı
+    (7, 15),   # Demokrasi ve Milli Birlik Günü (2017'den itibaren)
+    (8, 30),   # Zafer Bayramı
+    (10, 29),  # Cumhuriyet Bayramı
+]
+
+# Dini bayramların ilk günleri (Diyanet takvimi). Ramazan Bayramı 3, Kurban
+# Bayramı 4 gündür; arife yarım günleri iş günü sayılır. Yeni yıllar
+# Diyanet'in açıkladığı tarihlerle buraya eklenmelidir; tablo dışındaki
+# yıllar için uyarı yazılır ve o yılın bayramları iş günü sayılır.
+RELIGIOUS_HOLIDAYS = {
+    2020: [(date(2020, 5, 24), 3), (date(2020, 7, 31), 4)],
+    2021: [(date(2021, 5, 13), 3), (date(2021, 7, 20), 4)],
+    2022: [(date(2022, 5, 2), 3), (date(2022, 7, 9), 4)],
+    2023: [(date(2023, 4, 21), 3), (date(2023, 6, 28), 4)],
+    2024: [(date(2024, 4, 10), 3), (date(2024, 6, 16), 4)],
+    2025: [(date(2025, 3, 30), 3), (date(2025, 6, 6), 4)],
+    2026: [(date(2026, 3, 20), 3), (date(2026, 5, 27), 4)],
+    2027: [(date(2027, 3, 9), 3), (date(2027, 5, 16), 4)],
+    2028: [(date(2028, 2, 26), 3), (date(2028, 5, 4), 4)],
+}
+
+
+@lru_cache(maxsize=None)
+def _warn_missing(year):
+    # Yıl başına bir kez
+    logger.warning('%d yılının dini bayram tarihleri work_calendar.RELIGIOUS_HOLIDAYS tablosunda yok (%d-%d); '
+                   'bayram günleri iş günü sayılıyor', year, min(RELIGIOUS_HOLIDAYS), max(RELIGIOUS_HOLIDAYS))
+
+
+def holidays(year):
+    days = set()
+    for month, day in FIXED_HOLIDAYS:
+        if (month, day) == (7, 15) and year < 2017:
+            continue
+        days.add(date(year, month, day))
+    if year not in RELIGIOUS_HOLIDAYS:
+        _warn_missing(year)
+    for first_day, length in RELIGIOUS_HOLIDAYS.get(year, []):
+        days.update(first_day + timedelta(days=i) for i in range(length))
+    return days
+
+
+@lru_cache(maxsize=None)
+def _year_prefix(year):
+    """prefix[n] = yılın ilk n günündeki iş günü sayısı (prefix[0] = 0)."""
+    off_days = holidays(year)
+    day = date(year, 1, 1)
+    prefix = array('H', [0])
+    running = 0
+    while day.year == year:
+        if day.weekday() in WORKING_WEEKDAYS and day not in off_days:
+            running += 1
+        prefix.append(running)
+        day += timedelta(days=1)
+    return prefix
+
+
+# Veritabanında tarihler bu günden itibaren gün sayısı (tamsayı) olarak tutulur
+EPOCH = date(1970, 1, 1)
+
+
+def to_date(value):
+    """ISO metni, gün sayısı ya da date nesnesini date'e çevirir."""
+    if isinstance(value, date):
+        return value
+    if isinstance(value, int):
+        return EPOCH + timedelta(days=value)
+    return date.fromisoformat(value)
+
+
+def to_day(value):
+    """Tarihi 1970-01-01'den itibaren gün sayısına çevirir."""
+    return value if isinstance(value, int) else (to_date(value) - EPOCH).days
+
+
+def from_day(day):
+    """Gün sayısını ISO tarih metnine çevirir (None ise None)."""
+    return None if day is None else (EPOCH + timedelta(days=day)).isoformat()
+
+
+def working_days(start, end):
+    """[start, end] aralığındaki (iki uç dahil) iş günü sayısı."""
+    start, end = to_date(start), to_date(end)
+    if end < start:
+        return 0
+    first = _year_prefix(start.year)
+    start_index = start.timetuple().tm_yday - 1
+    end_index = end.timetuple().tm_yday
+    if start.year == end.year:
+        return first[end_index] - first[start_index]
+    total = first[-1] - first[start_index]
+    for year in range(start.year + 1, end.year):
+        total += _year_prefix(year)[-1]
+    return total + _year_prefix(end.year)[end_index]